@@ -6,7 +6,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel
-from app.utils.admin import get_user_profile
+from app.utils.admin import get_user_profile, invalidate_user_profile
+from app.utils.db import fetch_all
 from app.utils.supabase import supabase
 
 router = APIRouter(prefix="/api/account", tags=["account"])
@@ -28,32 +29,21 @@ async def get_my_account(profile=Depends(get_user_profile)):
     Récupère les informations complètes du compte utilisateur
     """
     try:
-        # Récupérer les projets
-        projects = (
+        # Projets, illustrations et exports : requêtes indépendantes, en parallèle
+        user_id = profile["id"]
+        projects, illustrations, exports = await fetch_all(
             supabase.table("projects")
-            .select("*", count="exact")
-            .eq("user_id", profile["id"])
-            .execute()
-        )
-
-        # Récupérer les illustrations
-        illustrations = (
+            .select("id", count="exact")
+            .eq("user_id", user_id)
+            .limit(1),
             supabase.table("illustrations")
-            .select("*", count="exact")
-            .in_("project_id", [p["id"] for p in projects.data])
-            .execute()
-            if projects.data
-            else None
-        )
-
-        # Récupérer les exports
-        exports = (
+            .select("id, projects!inner(user_id)", count="exact")
+            .eq("projects.user_id", user_id)
+            .limit(1),
             supabase.table("exports")
-            .select("*", count="exact")
-            .in_("project_id", [p["id"] for p in projects.data])
-            .execute()
-            if projects.data
-            else None
+            .select("id, projects!inner(user_id)", count="exact")
+            .eq("projects.user_id", user_id)
+            .limit(1),
         )
 
         return {
@@ -61,8 +51,8 @@ async def get_my_account(profile=Depends(get_user_profile)):
             "profile": profile,
             "stats": {
                 "projects_count": projects.count or 0,
-                "illustrations_count": illustrations.count or 0 if illustrations else 0,
-                "exports_count": exports.count or 0 if exports else 0,
+                "illustrations_count": illustrations.count or 0,
+                "exports_count": exports.count or 0,
                 "credits_remaining": profile.get("credits_illustrations", 0),
             },
             "subscription": {
@@ -126,6 +116,7 @@ async def update_subscription(
         if not result.data:
             raise HTTPException(status_code=404, detail="Profil introuvable")
 
+        invalidate_user_profile(profile["id"])
         return {
             "success": True,
             "message": f"Abonnement mis à jour vers {subscription.tier}",
@@ -202,6 +193,7 @@ async def delete_my_account(
 
         # 6. Supprimer le profil
         supabase.table("profiles").delete().eq("id", user_id).execute()
+        invalidate_user_profile(user_id)
 
         # 7. Supprimer l'utilisateur Auth (si possible)
         # Note: Cela nécessite les droits service_role, à faire côté admin
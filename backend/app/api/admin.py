@@ -3,156 +3,91 @@ API endpoint pour les statistiques et métriques admin
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional
-from app.utils.admin import get_user_profile, require_admin
-from app.utils.supabase import supabase
+import asyncio
+from app.config import settings
+from app.utils.admin import (
+    get_user_profile,
+    require_admin,
+    invalidate_user_profile,
+    auth_cache_stats,
+)
+from app.utils.cache import TTLCache
+from app.utils.db import fetch_all, or_filter
+from app.utils.supabase import supabase, supabase_admin
+from app.api.chatbot import chatbot_cache_stats, purge_chatbot_cache
+from app.services.ai_service import prompt_cache_stats
+from app.utils.cpu_pool import cpu_pool
+from app.utils.rate_limit import rate_limiter
+from app.services.export_jobs import export_jobs
+from app.services.illustration_jobs import illustration_jobs
+from app.services.manuscript_service import manuscript_service
+from app.services.conversation_context import conversation_context
+from app.services.revision_service import revision_service
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
+# Agrégats du tableau de bord (days -> JSON de get_admin_dashboard_metrics)
+_metrics_cache = TTLCache(maxsize=32, ttl=settings.admin_metrics_cache_ttl_seconds)
+
 
 @router.get("/metrics", dependencies=[Depends(require_admin)])
 async def get_admin_metrics(
-    days: Optional[int] = 30, profile=Depends(get_user_profile)
+    days: Optional[int] = 30,
+    refresh: bool = False,
+    profile=Depends(get_user_profile),
 ):
     """
     Récupère les métriques globales pour l'admin
 
     Args:
         days: Nombre de jours pour les statistiques (défaut: 30)
+        refresh: Ignorer le cache et recalculer les agrégats
 
     Returns:
         Dictionnaire avec toutes les métriques
     """
     try:
-        # Calculer la date de début
-        start_date = (datetime.now() - timedelta(days=days)).isoformat()
-
-        # 1. Statistiques des utilisateurs
-        users_total = (
-            supabase.table("profiles").select("*", count="exact", head=True).execute()
-        )
-        users_new = (
-            supabase.table("profiles")
-            .select("*", count="exact", head=True)
-            .gte("created_at", start_date)
-            .execute()
-        )
-
-        # Par tier
-        users_by_tier = {}
-        for tier in ["free", "creator", "author", "studio"]:
-            count = (
-                supabase.table("profiles")
-                .select("*", count="exact", head=True)
-                .eq("subscription_tier", tier)
-                .execute()
+        # Toutes les agrégations en un seul appel (cache TTL court)
+        metrics = None if refresh else _metrics_cache.get(days)
+        if metrics is None:
+            result = await asyncio.to_thread(
+                lambda: supabase_admin.rpc(
+                    "get_admin_dashboard_metrics", {"p_days": days}
+                ).execute()
             )
-            users_by_tier[tier] = count.count or 0
-
-        # 2. Statistiques des projets
-        projects_total = (
-            supabase.table("projects").select("*", count="exact", head=True).execute()
-        )
-        projects_new = (
-            supabase.table("projects")
-            .select("*", count="exact", head=True)
-            .gte("created_at", start_date)
-            .execute()
-        )
+            metrics = result.data
+            _metrics_cache.set(days, metrics)
 
-        # Par statut
-        projects_by_status = {}
-        for status in ["draft", "in_progress", "completed"]:
-            count = (
-                supabase.table("projects")
-                .select("*", count="exact", head=True)
-                .eq("status", status)
-                .execute()
-            )
-            projects_by_status[status] = count.count or 0
+        users, projects = metrics["users"], metrics["projects"]
+        illustrations, exports = metrics["illustrations"], metrics["exports"]
 
-        # 3. Statistiques des illustrations
-        illustrations_total = (
-            supabase.table("illustrations")
-            .select("*", count="exact", head=True)
-            .execute()
-        )
-        illustrations_new = (
-            supabase.table("illustrations")
-            .select("*", count="exact", head=True)
-            .gte("created_at", start_date)
-            .execute()
-        )
-
-        # Par style
-        illustrations_by_style = {}
-        styles = ["manga", "realistic", "comic", "watercolor", "oil_painting"]
-        for style in styles:
-            count = (
-                supabase.table("illustrations")
-                .select("*", count="exact", head=True)
-                .eq("style", style)
-                .execute()
-            )
-            illustrations_by_style[style] = count.count or 0
-
-        # 4. Statistiques des exports
-        exports_total = (
-            supabase.table("exports").select("*", count="exact", head=True).execute()
-        )
-        exports_new = (
-            supabase.table("exports")
-            .select("*", count="exact", head=True)
-            .gte("created_at", start_date)
-            .execute()
-        )
-
-        # Par format
-        exports_by_format = {}
-        for format_type in ["pdf", "epub"]:
-            count = (
-                supabase.table("exports")
-                .select("*", count="exact", head=True)
-                .eq("format", format_type)
-                .execute()
-            )
-            exports_by_format[format_type] = count.count or 0
+        users_by_tier = {
+            tier: users["by_tier"].get(tier, 0)
+            for tier in ["free", "creator", "author", "studio"]
+        }
+        projects_by_status = {
+            status: projects["by_status"].get(status, 0)
+            for status in ["draft", "in_progress", "completed"]
+        }
+        illustrations_by_style = {
+            style: illustrations["by_style"].get(style, 0)
+            for style in ["manga", "realistic", "comic", "watercolor", "oil_painting"]
+        }
+        exports_by_format = {
+            format_type: exports["by_format"].get(format_type, 0)
+            for format_type in ["pdf", "epub"]
+        }
 
-        # 5. Activité récente (dernières 24h)
-        yesterday = (datetime.now() - timedelta(days=1)).isoformat()
+        # Activité récente (dernières 24h)
         activity_24h = {
-            "new_users": supabase.table("profiles")
-            .select("*", count="exact", head=True)
-            .gte("created_at", yesterday)
-            .execute()
-            .count
-            or 0,
-            "new_projects": supabase.table("projects")
-            .select("*", count="exact", head=True)
-            .gte("created_at", yesterday)
-            .execute()
-            .count
-            or 0,
-            "new_illustrations": supabase.table("illustrations")
-            .select("*", count="exact", head=True)
-            .gte("created_at", yesterday)
-            .execute()
-            .count
-            or 0,
-            "new_exports": supabase.table("exports")
-            .select("*", count="exact", head=True)
-            .gte("created_at", yesterday)
-            .execute()
-            .count
-            or 0,
+            "new_users": users["new_24h"],
+            "new_projects": projects["new_24h"],
+            "new_illustrations": illustrations["new_24h"],
+            "new_exports": exports["new_24h"],
         }
 
-        # 6. Top utilisateurs (plus actifs)
-        top_users = supabase.rpc(
-            "get_top_users_by_projects", {"limit_count": 10}
-        ).execute()
-
         # 7. Calculs financiers
         # Prix des plans (€/mois)
         tier_prices = {
@@ -175,10 +110,8 @@ async def get_admin_metrics(
         )
 
         # Calcul des coûts de production
-        illustration_costs = (illustrations_total.count or 0) * costs[
-            "illustration_generation"
-        ]
-        project_costs = (projects_total.count or 0) * costs["storage_per_project"]
+        illustration_costs = illustrations["total"] * costs["illustration_generation"]
+        project_costs = projects["total"] * costs["storage_per_project"]
         total_costs = illustration_costs + project_costs
 
         # Calcul de la marge
@@ -214,7 +147,7 @@ async def get_admin_metrics(
                 "percentage": round(margin_percentage, 2),
             },
             "metrics": {
-                "avg_revenue_per_user": round(mrr / max(users_total.count or 1, 1), 2),
+                "avg_revenue_per_user": round(mrr / max(users["total"], 1), 2),
                 "avg_ltv": round(avg_ltv, 2),
                 "cost_per_illustration": costs["illustration_generation"],
             },
@@ -231,27 +164,27 @@ async def get_admin_metrics(
             "success": True,
             "period_days": days,
             "users": {
-                "total": users_total.count or 0,
-                "new": users_new.count or 0,
+                "total": users["total"],
+                "new": users["new"],
                 "by_tier": users_by_tier,
             },
             "projects": {
-                "total": projects_total.count or 0,
-                "new": projects_new.count or 0,
+                "total": projects["total"],
+                "new": projects["new"],
                 "by_status": projects_by_status,
             },
             "illustrations": {
-                "total": illustrations_total.count or 0,
-                "new": illustrations_new.count or 0,
+                "total": illustrations["total"],
+                "new": illustrations["new"],
                 "by_style": illustrations_by_style,
             },
             "exports": {
-                "total": exports_total.count or 0,
-                "new": exports_new.count or 0,
+                "total": exports["total"],
+                "new": exports["new"],
                 "by_format": exports_by_format,
             },
             "activity_24h": activity_24h,
-            "top_users": top_users.data if top_users.data else [],
+            "top_users": metrics["top_users"],
             "revenue": revenue_data,
         }
 
@@ -279,19 +212,19 @@ async def get_all_users(
             query = query.eq("subscription_tier", tier)
 
         if search:
-            query = query.or_(f"email.ilike.%{search}%,full_name.ilike.%{search}%")
+            query = or_filter(query, f"email.ilike.%{search}%,full_name.ilike.%{search}%")
 
         query = query.order("created_at", desc=True).range(offset, offset + limit - 1)
 
         result = query.execute()
 
         # Compter le total
-        count_query = supabase.table("profiles").select("*", count="exact", head=True)
+        count_query = supabase.table("profiles").select("id", count="exact").limit(1)
         if tier:
             count_query = count_query.eq("subscription_tier", tier)
         if search:
-            count_query = count_query.or_(
-                f"email.ilike.%{search}%,full_name.ilike.%{search}%"
+            count_query = or_filter(
+                count_query, f"email.ilike.%{search}%,full_name.ilike.%{search}%"
             )
 
         total = count_query.execute().count or 0
@@ -317,41 +250,29 @@ async def get_user_details(user_id: str):
     Récupère les détails complets d'un utilisateur
     """
     try:
-        # Profile
-        profile = supabase.table("profiles").select("*").eq("id", user_id).execute()
-        if not profile.data:
-            raise HTTPException(status_code=404, detail="Utilisateur introuvable")
-
-        # Projets
-        projects = (
-            supabase.table("projects").select("*").eq("user_id", user_id).execute()
-        )
-
-        # Illustrations
-        illustrations = (
+        # Profil, projets, illustrations et exports en parallèle
+        profile, projects, illustrations, exports = await fetch_all(
+            supabase.table("profiles").select("*").eq("id", user_id),
+            supabase.table("projects").select("*").eq("user_id", user_id),
             supabase.table("illustrations")
-            .select("*")
-            .in_("project_id", [p["id"] for p in projects.data])
-            .execute()
-        )
-
-        # Exports
-        exports = (
+            .select("id, projects!inner(user_id)", count="exact")
+            .eq("projects.user_id", user_id)
+            .limit(1),
             supabase.table("exports")
-            .select("*")
-            .in_("project_id", [p["id"] for p in projects.data])
-            .execute()
+            .select("id, projects!inner(user_id)", count="exact")
+            .eq("projects.user_id", user_id)
+            .limit(1),
         )
+        if not profile.data:
+            raise HTTPException(status_code=404, detail="Utilisateur introuvable")
 
         return {
             "success": True,
             "profile": profile.data[0],
             "stats": {
                 "projects_count": len(projects.data),
-                "illustrations_count": (
-                    len(illustrations.data) if illustrations.data else 0
-                ),
-                "exports_count": len(exports.data) if exports.data else 0,
+                "illustrations_count": illustrations.count or 0,
+                "exports_count": exports.count or 0,
             },
             "projects": projects.data,
         }
@@ -390,6 +311,7 @@ async def update_user_tier(user_id: str, tier: str):
         if not result.data:
             raise HTTPException(status_code=404, detail="Utilisateur introuvable")
 
+        invalidate_user_profile(user_id)
         return {
             "success": True,
             "message": f"Tier mis à jour vers {tier}",
@@ -416,6 +338,7 @@ async def delete_user(user_id: str):
 
         # Supprimer le profil
         result = supabase.table("profiles").delete().eq("id", user_id).execute()
+        invalidate_user_profile(user_id)
 
         if not result.data:
             raise HTTPException(status_code=404, detail="Utilisateur introuvable")
@@ -428,3 +351,52 @@ async def delete_user(user_id: str):
         raise HTTPException(
             status_code=500, detail=f"Erreur lors de la suppression: {str(e)}"
         )
+
+
+@router.get("/system", dependencies=[Depends(require_admin)])
+async def get_system_metrics():
+    """
+    Métriques d'exécution du worker (pool de processus, jobs d'export)
+    """
+    return {
+        "success": True,
+        "cpu_pool": cpu_pool.stats(),
+        "exports": export_jobs.stats(),
+        "illustrations": illustration_jobs.stats(),
+        "manuscripts": manuscript_service.stats(),
+        "chapter_revisions": revision_service.stats(),
+        "conversation_summaries": conversation_context.stats(),
+        "auth_cache": auth_cache_stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "prompt_cache": prompt_cache_stats(),
+        "chatbot_cache": chatbot_cache_stats(),
+        "admin_metrics_cache": _metrics_cache.stats(),
+    }
+
+
+@router.post("/chatbot/cache/purge", dependencies=[Depends(require_admin)])
+async def purge_chatbot_responses(context: Optional[str] = None):
+    """
+    Vide le cache des réponses du chatbot (après modification des prompts)
+    """
+    purged = purge_chatbot_cache(context)
+    return {"success": True, "purged": purged}
+
+
+@router.post("/chapter-revisions/prune", dependencies=[Depends(require_admin)])
+async def prune_chapter_revisions(keep_days: int = 30, keep_min: int = 20):
+    """
+    Purge l'historique ancien des chapitres (normalement planifiée via pg_cron)
+    """
+    try:
+        result = await asyncio.to_thread(
+            lambda: supabase_admin.rpc(
+                "prune_chapter_revisions",
+                {"p_keep_days": keep_days, "p_keep_min": keep_min},
+            ).execute()
+        )
+        return {"success": True, "deleted": result.data or 0}
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Erreur lors de la purge: {str(e)}"
+        )
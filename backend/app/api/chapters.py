@@ -1,27 +1,93 @@
 """Chapters routes."""
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.models.schemas import Chapter, ChapterCreate, ChapterUpdate
-from app.utils.supabase import supabase
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Optional
+from app.models.schemas import (
+    Chapter,
+    ChapterCreate,
+    ChapterPatch,
+    ChapterPatchResult,
+    ChapterRevision,
+    ChapterRevisionContent,
+    ChapterSummary,
+    ChapterUpdate,
+)
+from app.services.revision_service import revision_service
+from app.utils.supabase import supabase, supabase_admin
 from app.utils.admin import get_user_profile, assert_project_access
+from app.utils.chapter_digest import (
+    build_chapter_digest,
+    build_chapter_digest_from_edges,
+)
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    finish_page,
+    keyset_page,
+    select_fields,
+)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[Chapter])
-async def get_chapters(project_id: str, profile: dict = Depends(get_user_profile)):
-    """Get all chapters for a project"""
+CHAPTER_KEYS = ("number",)
+REVISION_KEYS = ("version",)
+
+
+def _get_chapter_content(project_id: str, chapter_number: int) -> Optional[dict]:
+    """id, content et version courants (base de la prochaine révision)"""
+    result = (
+        supabase.table("chapters")
+        .select("id, content, version")
+        .eq("project_id", project_id)
+        .eq("number", chapter_number)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+def _record_revision(previous: dict, updated: dict) -> None:
+    """Historise la nouvelle version si le contenu a changé"""
+    if updated["version"] == previous["version"]:
+        return
+    # Base fiable seulement si aucune autre écriture ne s'est intercalée
+    before = (
+        previous["content"] or ""
+        if updated["version"] == previous["version"] + 1
+        else None
+    )
+    revision_service.record(
+        updated["id"],
+        updated["version"],
+        before,
+        updated["content"] or "",
+        updated["word_count"] or 0,
+    )
+
+
+@router.get(
+    "/", response_model=List[ChapterSummary], response_model_exclude_unset=True
+)
+async def get_chapters(
+    project_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    profile: dict = Depends(get_user_profile),
+):
+    """Get a page of chapters (without content) for a project"""
     try:
         assert_project_access(profile, project_id)
-        result = (
+        query = (
             supabase.table("chapters")
-            .select("*")
+            .select(select_fields(fields, ChapterSummary, CHAPTER_KEYS))
             .eq("project_id", project_id)
-            .order("number")
-            .execute()
         )
-        return result.data
+        query = keyset_page(query, cursor, limit, CHAPTER_KEYS)
+        return finish_page(query.execute().data, CHAPTER_KEYS, limit, response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -87,9 +153,12 @@ async def update_chapter(
         assert_project_access(profile, project_id)
         chapter_data = chapter.model_dump(exclude_unset=True)
 
-        # Update word count if content is provided
-        if "content" in chapter_data and chapter_data["content"]:
-            chapter_data["word_count"] = len(chapter_data["content"].split())
+        previous = None
+        if "content" in chapter_data:
+            # Update word count and keep the generation digest in sync
+            chapter_data["word_count"] = len((chapter_data["content"] or "").split())
+            chapter_data.update(build_chapter_digest(chapter_data["content"]))
+            previous = _get_chapter_content(project_id, chapter_number)
 
         result = (
             supabase.table("chapters")
@@ -100,7 +169,188 @@ async def update_chapter(
         )
         if not result.data:
             raise HTTPException(status_code=404, detail="Chapter not found")
-        return result.data[0]
+        updated = result.data[0]
+        if previous:
+            _record_revision(previous, updated)
+        return updated
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.patch("/{chapter_number}", response_model=ChapterPatchResult)
+async def patch_chapter(
+    project_id: str,
+    chapter_number: int,
+    patch: ChapterPatch,
+    profile: dict = Depends(get_user_profile),
+):
+    """
+    Apply text operations to a chapter's content (autosave)
+
+    The patch targets `version`: if the chapter changed since, 409 with the
+    current version so the client can reload before retrying.
+    """
+    try:
+        assert_project_access(profile, project_id)
+        ops = [(op.start, op.end, op.text) for op in patch.ops]
+
+        # Opérations appliquées en base (overlay) : le contenu complet ne
+        # transite pas entre l'API et Postgres
+        result = supabase_admin.rpc(
+            "patch_chapter_content",
+            {
+                "p_project_id": project_id,
+                "p_number": chapter_number,
+                "p_version": patch.version,
+                "p_ops": [
+                    {"start": start, "end": end, "text": text}
+                    for start, end, text in ops
+                ],
+            },
+        ).execute()
+        patched = result.data
+        if not patched:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+        if patched.get("conflict"):
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Chapter was modified since this version",
+                    "version": patched["version"],
+                },
+            )
+        if patched.get("error"):
+            raise HTTPException(status_code=422, detail=patched["error"])
+
+        if patched["version"] != patch.version:
+            # Digest recalculé à partir des extrémités du texte renvoyées
+            if "content" in patched:
+                digest = build_chapter_digest(patched["content"])
+            else:
+                digest = build_chapter_digest_from_edges(
+                    patched["head"], patched["tail"]
+                )
+            supabase.table("chapters").update(digest).eq("id", patched["id"]).eq(
+                "version", patched["version"]
+            ).execute()
+
+            # Les opérations du patch servent de delta (pas de diff du chapitre)
+            revision_service.record(
+                patched["id"],
+                patched["version"],
+                None,
+                patched.get("content"),
+                patched["word_count"],
+                ops=ops,
+                content_length=patched["length"],
+            )
+
+        return {
+            "id": patched["id"],
+            "number": patched["number"],
+            "version": patched["version"],
+            "word_count": patched["word_count"],
+            "length": patched["length"],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/{chapter_number}/revisions",
+    response_model=List[ChapterRevision],
+)
+async def get_chapter_revisions(
+    project_id: str,
+    chapter_number: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    profile: dict = Depends(get_user_profile),
+):
+    """Get a page of a chapter's revisions (most recent first)"""
+    try:
+        assert_project_access(profile, project_id)
+        chapter = _get_chapter_content(project_id, chapter_number)
+        if not chapter:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+        query = (
+            supabase.table("chapter_revisions")
+            .select(select_fields(None, ChapterRevision))
+            .eq("chapter_id", chapter["id"])
+        )
+        query = keyset_page(query, cursor, limit, REVISION_KEYS, desc=True)
+        return finish_page(query.execute().data, REVISION_KEYS, limit, response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/{chapter_number}/revisions/{version}", response_model=ChapterRevisionContent
+)
+async def get_chapter_revision(
+    project_id: str,
+    chapter_number: int,
+    version: int,
+    profile: dict = Depends(get_user_profile),
+):
+    """Rebuild the content of a past version"""
+    try:
+        assert_project_access(profile, project_id)
+        chapter = _get_chapter_content(project_id, chapter_number)
+        if not chapter:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+        revision = revision_service.rebuild(chapter["id"], version)
+        if revision is None:
+            raise HTTPException(status_code=404, detail="Revision not found")
+        content, word_count = revision
+        return {"version": version, "content": content, "word_count": word_count}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{chapter_number}/revisions/{version}/restore", response_model=Chapter)
+async def restore_chapter_revision(
+    project_id: str,
+    chapter_number: int,
+    version: int,
+    profile: dict = Depends(get_user_profile),
+):
+    """Restore a past version (recorded as a new version, history is kept)"""
+    try:
+        assert_project_access(profile, project_id)
+        chapter = _get_chapter_content(project_id, chapter_number)
+        if not chapter:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+        revision = revision_service.rebuild(chapter["id"], version)
+        if revision is None:
+            raise HTTPException(status_code=404, detail="Revision not found")
+        content, word_count = revision
+
+        chapter_data = {"content": content, "word_count": word_count}
+        chapter_data.update(build_chapter_digest(content))
+        result = (
+            supabase.table("chapters")
+            .update(chapter_data)
+            .eq("id", chapter["id"])
+            .eq("version", chapter["version"])
+            .execute()
+        )
+        if not result.data:
+            raise HTTPException(
+                status_code=409, detail="Chapter was modified concurrently"
+            )
+        updated = result.data[0]
+        _record_revision(chapter, updated)
+        return updated
     except HTTPException:
         raise
     except Exception as e:
@@ -2,9 +2,13 @@
 Chatbot API endpoints
 """
 
+import re
+import unicodedata
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from app.config import settings
 from app.services.ai_service import AIService
+from app.utils.cache import TTLCache
 from typing import Optional
 
 router = APIRouter(prefix="/chatbot", tags=["chatbot"])
@@ -45,6 +49,34 @@ Réponds à la question de l'utilisateur de manière concise (2-3 phrases maximu
 }
 
 
+# Cache des réponses : (contexte, message normalisé) -> réponse
+_response_cache = TTLCache(
+    maxsize=settings.chatbot_cache_max_entries, ttl=settings.chatbot_cache_ttl_seconds
+)
+
+
+def _normalize_message(text: str) -> str:
+    """Minuscules, sans accents, ponctuation ni espaces superflus"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def purge_chatbot_cache(context: Optional[str] = None) -> int:
+    """
+    Vide le cache des réponses (tout, ou un seul contexte).
+    À déclencher quand le texte de CHATBOT_PROMPTS change.
+    """
+    if context is None:
+        return _response_cache.clear()
+    return _response_cache.delete_where(lambda key: key[0] == context)
+
+
+def chatbot_cache_stats() -> dict:
+    return _response_cache.stats()
+
+
 @router.post("", response_model=ChatResponse)
 async def chat(message: ChatMessage):
     """
@@ -52,7 +84,14 @@ async def chat(message: ChatMessage):
     """
     try:
         # Get the appropriate system prompt
-        system_prompt = CHATBOT_PROMPTS.get(message.context, CHATBOT_PROMPTS["general"])
+        context = message.context if message.context in CHATBOT_PROMPTS else "general"
+        system_prompt = CHATBOT_PROMPTS[context]
+
+        # Questions fréquentes : réponse servie depuis le cache
+        cache_key = (context, _normalize_message(message.message))
+        cached = _response_cache.get(cache_key) if cache_key[1] else None
+        if cached is not None:
+            return ChatResponse(response=cached)
 
         # Generate response using Claude
         full_prompt = (
@@ -60,6 +99,8 @@ async def chat(message: ChatMessage):
         )
 
         result = await ai_service.generate_text(prompt=full_prompt, max_tokens=300)
+        if cache_key[1]:
+            _response_cache.set(cache_key, result.text)
         return ChatResponse(response=result.text)
 
     except Exception as e:
@@ -2,8 +2,10 @@
 Conversations routes - Chat créatif
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
+import asyncio
+from app.config import settings
 from app.models.schemas import (
     Conversation,
     ConversationCreate,
@@ -12,7 +14,10 @@ from app.models.schemas import (
 )
 from app.utils.supabase import supabase
 from app.services.ai_service import AIService
+from app.services.conversation_context import conversation_context
+from app.services.conversation_service import conversation_service
 from app.utils.admin import get_user_profile, assert_project_access
+from app.utils.streaming import sse_event, sse_response
 
 router = APIRouter()
 ai_service = AIService()
@@ -24,32 +29,34 @@ async def get_conversation(
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Get conversation for a project"""
+    """Get conversation for a project (with its latest messages)"""
     try:
         assert_project_access(profile, project_id)
-        result = (
-            supabase.table("conversations")
-            .select("*")
-            .eq("project_id", project_id)
-            .execute()
+        # Create new conversation if doesn't exist
+        conversation = conversation_service.get_or_create(project_id)
+        conversation["messages"] = conversation_service.recent_messages(
+            conversation["id"], settings.conversation_page_messages
         )
+        return conversation
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        if not result.data:
-            # Create new conversation if doesn't exist
-            new_conv = (
-                supabase.table("conversations")
-                .insert(
-                    {
-                        "project_id": project_id,
-                        "phase": "exploration",
-                        "messages": [],
-                    }
-                )
-                .execute()
-            )
-            return new_conv.data[0]
 
-        return result.data[0]
+@router.get("/{project_id}/messages")
+async def get_messages(
+    project_id: str,
+    before: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user_id: Optional[str] = None,
+    profile: dict = Depends(get_user_profile),
+):
+    """Get older messages (before a given `seq`), oldest first"""
+    try:
+        assert_project_access(profile, project_id)
+        conversation = conversation_service.get_or_create(project_id)
+        return conversation_service.recent_messages(
+            conversation["id"], limit, before_seq=before
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -63,51 +70,33 @@ async def send_message(
 ):
     """Send a message and get AI response"""
     try:
-        assert_project_access(profile, project_id)
-        # Get current conversation
-        conv_result = (
-            supabase.table("conversations")
-            .select("*")
-            .eq("project_id", project_id)
-            .execute()
-        )
+        project = assert_project_access(profile, project_id)
+        conversation = conversation_service.get_or_create(project_id)
+        phase = conversation.get("phase") or "exploration"
 
-        if not conv_result.data:
-            raise HTTPException(status_code=404, detail="Conversation not found")
-
-        conversation = conv_result.data[0]
-        messages = conversation.get("messages", [])
-        phase = conversation.get("phase", "exploration")
-
-        # Add user message
-        user_msg = {
-            "role": "user",
-            "content": message.content,
-            "timestamp": "now()",
-        }
-        messages.append(user_msg)
+        # Recent messages within the token budget + rolling summary
+        history, overflow = conversation_context.window(conversation, message.content)
 
         # Get AI response based on phase
         ai_response = await ai_service.chat_response(
-            message.content, phase=phase, history=messages, project_id=project_id
+            message.content,
+            phase=phase,
+            history=history,
+            project=project,
+            summary=conversation.get("summary"),
         )
 
-        # Add assistant message
-        assistant_msg = {
-            "role": "assistant",
-            "content": ai_response,
-            "timestamp": "now()",
-        }
-        messages.append(assistant_msg)
-
-        # Update conversation
-        updated = (
-            supabase.table("conversations")
-            .update({"messages": messages})
-            .eq("id", conversation["id"])
-            .execute()
+        # One insert per turn: user message + assistant reply
+        _, assistant_msg = conversation_service.append(
+            conversation["id"],
+            {"role": "user", "content": message.content},
+            {"role": "assistant", "content": ai_response},
         )
 
+        # Older messages left the window: fold them into the summary
+        if overflow:
+            conversation_context.schedule_fold(conversation, history)
+
         return {
             "message": assistant_msg,
             "conversation_id": conversation["id"],
@@ -116,6 +105,91 @@ async def send_message(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _stream_reply(
+    conversation: dict,
+    content: str,
+    phase: str,
+    history: List[dict],
+    overflow: bool,
+    project: dict,
+):
+    """
+    Relaie la réponse de Claude en SSE puis enregistre le tour.
+    Événements : `token` {text}, puis `done` {message, conversation_id, complete}
+    ou `error` {detail}. Si le client se déconnecte, Starlette annule ce
+    générateur : le flux Claude est fermé et le texte partiel enregistré.
+    """
+    parts: List[str] = []
+    complete = False
+    saved = None
+    stream = ai_service.stream_chat_response(
+        content,
+        phase=phase,
+        history=history,
+        project=project,
+        summary=conversation.get("summary"),
+    )
+    try:
+        async for chunk in stream:
+            if chunk["type"] == "token":
+                parts.append(chunk["text"])
+                yield sse_event("token", {"text": chunk["text"]})
+            else:
+                complete = True
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+    finally:
+        await stream.aclose()
+        if parts:
+            try:
+                # Shield : l'enregistrement aboutit même si la requête est annulée
+                _, saved = await asyncio.shield(
+                    asyncio.to_thread(
+                        conversation_service.append,
+                        conversation["id"],
+                        {"role": "user", "content": content},
+                        {"role": "assistant", "content": "".join(parts)},
+                    )
+                )
+                if overflow:
+                    conversation_context.schedule_fold(conversation, history)
+            except Exception as e:
+                print(f"⚠️ Tour de conversation {conversation['id']} non enregistré: {e}")
+
+    if saved:
+        yield sse_event(
+            "done",
+            {
+                "message": saved,
+                "conversation_id": conversation["id"],
+                "complete": complete,
+            },
+        )
+
+
+@router.post("/{project_id}/message/stream")
+async def send_message_stream(
+    project_id: str,
+    message: MessageCreate,
+    user_id: Optional[str] = None,
+    profile: dict = Depends(get_user_profile),
+):
+    """Send a message and stream the AI response (SSE)"""
+    try:
+        project = assert_project_access(profile, project_id)
+        conversation = conversation_service.get_or_create(project_id)
+        phase = conversation.get("phase") or "exploration"
+        history, overflow = conversation_context.window(conversation, message.content)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return sse_response(
+        _stream_reply(conversation, message.content, phase, history, overflow, project)
+    )
+
+
 @router.put("/{project_id}/phase")
 async def update_phase(
     project_id: str,
@@ -160,7 +234,7 @@ async def clear_conversation(
         assert_project_access(profile, project_id)
         result = (
             supabase.table("conversations")
-            .update({"messages": []})
+            .select("id")
             .eq("project_id", project_id)
             .execute()
         )
@@ -168,6 +242,9 @@ async def clear_conversation(
         if not result.data:
             raise HTTPException(status_code=404, detail="Conversation not found")
 
-        return {"cleared": True}
+        deleted = conversation_service.clear(result.data[0]["id"])
+        return {"cleared": True, "deleted_messages": deleted}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
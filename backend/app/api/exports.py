@@ -2,40 +2,66 @@
 Export routes - PDF/EPUB generation
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from fastapi.responses import FileResponse
 from typing import List, Optional
 import os
-from app.models.schemas import ExportCreate, Export
+from app.models.schemas import ExportCreate, Export, ExportSummary
 from app.utils.supabase import supabase
-from app.services.export_service import ExportService
+from app.services.export_jobs import export_jobs
 from app.utils.admin import (
     get_user_profile,
     assert_project_access,
     assert_export_access,
 )
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    finish_page,
+    keyset_page,
+    select_fields,
+)
 
 router = APIRouter()
-export_service = ExportService()
 
 
-@router.get("/{project_id}", response_model=List[Export])
+def _enqueue_export(project_id: str, export_format: str) -> dict:
+    """Crée le job d'export et renvoie immédiatement son identifiant"""
+    export = export_jobs.enqueue(project_id, export_format)
+    return {
+        "export_id": export["id"],
+        "status": export.get("status", "pending"),
+        "format": export_format,
+    }
+
+
+EXPORT_KEYS = ("created_at", "id")
+
+
+@router.get(
+    "/{project_id}", response_model=List[ExportSummary], response_model_exclude_unset=True
+)
 async def get_project_exports(
     project_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Get all exports for a project"""
+    """Get a page of exports for a project (most recent first)"""
     try:
         assert_project_access(profile, project_id)
-        result = (
+        query = (
             supabase.table("exports")
-            .select("*")
+            .select(select_fields(fields, ExportSummary, EXPORT_KEYS))
             .eq("project_id", project_id)
-            .order("created_at", desc=True)
-            .execute()
         )
-        return result.data
+        query = keyset_page(query, cursor, limit, EXPORT_KEYS, desc=True)
+        return finish_page(query.execute().data, EXPORT_KEYS, limit, response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -46,35 +72,12 @@ async def export_pdf(
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Generate PDF export"""
+    """Queue a PDF export (poll /status/{export_id})"""
     try:
         assert_project_access(profile, project_id)
-        # Create export record
-        export_data = {
-            "project_id": project_id,
-            "format": "pdf_interior",
-            "status": "pending",
-        }
-        export_record = supabase.table("exports").insert(export_data).execute()
-        export_id = export_record.data[0]["id"]
-
-        # Generate PDF (async task in production)
-        try:
-            file_url = await export_service.generate_pdf(project_id)
-
-            # Update export record
-            supabase.table("exports").update(
-                {"status": "completed", "file_url": file_url}
-            ).eq("id", export_id).execute()
-
-            return {"export_id": export_id, "status": "completed", "file_url": file_url}
-        except Exception as gen_error:
-            # Update as failed
-            supabase.table("exports").update(
-                {"status": "failed", "error_message": str(gen_error)}
-            ).eq("id", export_id).execute()
-            raise
-
+        return _enqueue_export(project_id, "pdf_interior")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -85,35 +88,12 @@ async def export_epub(
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Generate EPUB export"""
+    """Queue an EPUB export (poll /status/{export_id})"""
     try:
         assert_project_access(profile, project_id)
-        # Create export record
-        export_data = {
-            "project_id": project_id,
-            "format": "epub",
-            "status": "pending",
-        }
-        export_record = supabase.table("exports").insert(export_data).execute()
-        export_id = export_record.data[0]["id"]
-
-        # Generate EPUB (async task in production)
-        try:
-            file_url = await export_service.generate_epub(project_id)
-
-            # Update export record
-            supabase.table("exports").update(
-                {"status": "completed", "file_url": file_url}
-            ).eq("id", export_id).execute()
-
-            return {"export_id": export_id, "status": "completed", "file_url": file_url}
-        except Exception as gen_error:
-            # Update as failed
-            supabase.table("exports").update(
-                {"status": "failed", "error_message": str(gen_error)}
-            ).eq("id", export_id).execute()
-            raise
-
+        return _enqueue_export(project_id, "epub")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -124,11 +104,9 @@ async def get_export_status(
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Get export status"""
+    """Get export status and progress (pending, processing, completed, failed)"""
     try:
-        export = assert_export_access(profile, export_id)
-        result = supabase.table("exports").select("*").eq("id", export["id"]).execute()
-        return result.data[0]
+        return assert_export_access(profile, export_id)
     except HTTPException:
         raise
     except Exception as e:
@@ -179,39 +157,11 @@ async def export_kdp_package(
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Generate complete KDP package (interior + cover PDFs)"""
+    """Queue a complete KDP package export (interior + cover PDFs)"""
     try:
         assert_project_access(profile, project_id)
-        # Create export record
-        export_data = {
-            "project_id": project_id,
-            "format": "full_kdp",
-            "status": "pending",
-        }
-        export_record = supabase.table("exports").insert(export_data).execute()
-        export_id = export_record.data[0]["id"]
-
-        # Generate KDP package
-        try:
-            result = await export_service.generate_kdp_package(project_id)
-
-            # Update export record
-            supabase.table("exports").update(
-                {"status": "completed", "config": result}
-            ).eq("id", export_id).execute()
-
-            return {
-                "export_id": export_id,
-                "status": "completed",
-                "interior_pdf": result.get("interior_pdf"),
-                "cover_pdf": result.get("cover_pdf"),
-            }
-        except Exception as gen_error:
-            # Update as failed
-            supabase.table("exports").update(
-                {"status": "failed", "error_message": str(gen_error)}
-            ).eq("id", export_id).execute()
-            raise
-
+        return _enqueue_export(project_id, "full_kdp")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
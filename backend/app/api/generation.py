@@ -5,11 +5,18 @@ Endpoints pour la génération de texte, plans et chapitres
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from app.models.schemas import GenerationRequest, GenerationResponse
 from app.services.ai_service import AIService
-from app.utils.admin import get_user_profile, assert_project_access
-from app.utils.supabase import supabase
+from app.services.project_context import book_context
+from app.utils.admin import (
+    get_user_profile,
+    assert_project_access,
+    assert_chapter_access,
+)
+from app.utils.supabase import supabase, supabase_admin
+from app.utils.chapter_digest import format_chapter_digest
+from app.utils.streaming import sse_event, sse_response
 import json
 
 router = APIRouter()
@@ -87,6 +94,49 @@ async def improve_text(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ═══════════════════════════════════════════════════════════════
+# STREAMING (Server-Sent Events)
+# ═══════════════════════════════════════════════════════════════
+
+async def _stream_generation(
+    prompt: str, max_tokens: int, system: Optional[List[str]] = None, **extra
+):
+    """
+    Relaie les tokens Claude en SSE.
+    Événements : `token` {text}, puis `done` {tokens_used, ...extra} ou `error` {detail}.
+    """
+    try:
+        async for chunk in ai_service.stream_text(
+            prompt=prompt, max_tokens=max_tokens, system=system
+        ):
+            if chunk["type"] == "token":
+                yield sse_event("token", {"text": chunk["text"]})
+            else:
+                yield sse_event("done", {"tokens_used": chunk["tokens_used"], **extra})
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+
+
+@router.post("/continue/stream")
+async def continue_writing_stream(
+    request: ContinueRequest,
+    profile: dict = Depends(get_user_profile)
+):
+    """Continue writing from existing text (streaming SSE)"""
+    prompt = ai_service.build_continue_prompt(request.text)
+    return sse_response(_stream_generation(prompt, request.max_tokens))
+
+
+@router.post("/improve/stream")
+async def improve_text_stream(
+    request: ImproveRequest,
+    profile: dict = Depends(get_user_profile),
+):
+    """Improve existing text (streaming SSE)"""
+    prompt = ai_service.build_improve_prompt(request.text, request.instruction)
+    return sse_response(_stream_generation(prompt, 2000))
+
+
 # ═══════════════════════════════════════════════════════════════
 # GÉNÉRATION DE PLAN
 # ═══════════════════════════════════════════════════════════════
@@ -103,33 +153,14 @@ async def generate_plan(
     Returns: Liste des chapitres créés
     """
     try:
-        # Vérifier l'accès au projet
-        assert_project_access(profile, request.project_id)
-
-        # Récupérer le projet pour le contexte
-        project_result = (
-            supabase.table("projects")
-            .select("*")
-            .eq("id", request.project_id)
-            .execute()
-        )
-        if not project_result.data:
-            raise HTTPException(status_code=404, detail="Project not found")
-
-        project = project_result.data[0]
+        # Vérifier l'accès au projet (la ligne sert de contexte)
+        project = assert_project_access(profile, request.project_id)
 
         # Construire le prompt pour générer le plan
         prompt = f"""Tu es un expert en structure narrative et en création de livres. 
 Génère un plan détaillé et captivant pour ce livre :
 
-📖 INFORMATIONS DU LIVRE :
-- Titre : {project.get('title', 'Sans titre')}
-- Pitch : {project.get('pitch', 'Non défini')}
-- Genre : {project.get('genre', 'Non défini')}
-- Style : {project.get('style', 'roman')}
-- Public cible : {project.get('target_audience', 'adult')}
-- Thèmes : {', '.join(project.get('themes', [])) if project.get('themes') else 'Non définis'}
-
+{book_context(project=project)}
 📝 INSTRUCTIONS :
 Génère exactement {request.num_chapters} chapitres avec une progression narrative cohérente.
 Chaque chapitre doit avoir un arc narratif qui contribue à l'histoire globale.
@@ -178,31 +209,20 @@ Pour chaque chapitre, fournis :
                 for i in range(1, request.num_chapters + 1)
             ]
 
-        # Supprimer les anciens chapitres
-        supabase.table("chapters").delete().eq(
-            "project_id", request.project_id
-        ).execute()
-
-        # Créer les nouveaux chapitres
-        created_chapters = []
-        for i, ch in enumerate(chapters_data, 1):
-            chapter_data = {
-                "project_id": request.project_id,
-                "number": i,
-                "title": ch.get("title", f"Chapitre {i}"),
+        # Remplacer le plan en une seule transaction (suppression, insertion
+        # en masse, mise à jour du projet) : un seul aller-retour réseau
+        plan = [
+            {
+                "title": ch.get("title") or f"Chapitre {i}",
                 "summary": ch.get("summary", ""),
-                "content": "",
-                "word_count": 0,
             }
-            result = supabase.table("chapters").insert(chapter_data).execute()
-            if result.data:
-                created_chapters.append(result.data[0])
-
-        # Mettre à jour le projet
-        supabase.table("projects").update({
-            "chapter_count": len(created_chapters),
-            "status": "planning"
-        }).eq("id", request.project_id).execute()
+            for i, ch in enumerate(chapters_data, 1)
+        ]
+        result = supabase_admin.rpc(
+            "replace_project_chapters",
+            {"p_project_id": request.project_id, "p_chapters": plan},
+        ).execute()
+        created_chapters = result.data or []
 
         return created_chapters
 
@@ -229,70 +249,99 @@ async def generate_chapter_content(
     Returns: {generated_text, tokens_used, chapter_id}
     """
     try:
-        # Récupérer le chapitre avec les infos du projet
-        chapter_result = (
-            supabase.table("chapters")
-            .select("*")
-            .eq("id", request.chapter_id)
-            .execute()
+        system, prompt = _build_chapter_prompt(request, profile)
+
+        # Générer le contenu
+        result = await ai_service.generate_text(
+            prompt=prompt, max_tokens=3000, system=system
         )
-        if not chapter_result.data:
-            raise HTTPException(status_code=404, detail="Chapter not found")
-
-        chapter = chapter_result.data[0]
-        project_id = chapter.get("project_id")
-
-        # Récupérer le projet
-        project_result = (
-            supabase.table("projects")
-            .select("*")
-            .eq("id", project_id)
-            .execute()
+
+        return {
+            "generated_text": result.text,
+            "tokens_used": result.tokens_used,
+            "chapter_id": request.chapter_id,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Erreur génération chapitre: {str(e)}"
         )
-        if not project_result.data:
-            raise HTTPException(status_code=404, detail="Project not found")
 
-        project = project_result.data[0]
 
-        # Vérifier l'accès
-        assert_project_access(profile, project_id)
+@router.post("/chapter/stream")
+async def generate_chapter_content_stream(
+    request: ChapterGenerationRequest,
+    profile: dict = Depends(get_user_profile)
+):
+    """
+    Variante streaming (SSE) de /chapter : les tokens sont envoyés au fur et
+    à mesure, puis un événement `done` avec {tokens_used, chapter_id}.
+    """
+    try:
+        system, prompt = _build_chapter_prompt(request, profile)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Erreur génération chapitre: {str(e)}"
+        )
 
-        # Récupérer les chapitres précédents pour le contexte
-        all_chapters = (
-            supabase.table("chapters")
-            .select("number, title, summary, content")
-            .eq("project_id", project_id)
-            .order("number")
-            .execute()
+    return sse_response(
+        _stream_generation(
+            prompt, 3000, system=system, chapter_id=request.chapter_id
         )
+    )
+
+
+def _render_book_context(project: dict) -> str:
+    """Bloc « CONTEXTE DU LIVRE », identique pour tous les chapitres d'un projet"""
+    return (
+        "Tu es un écrivain talentueux qui écrit les chapitres de ce livre.\n\n"
+        + book_context(project=project)
+    )
+
 
-        # Construire le contexte des chapitres précédents
-        chapters_context = ""
-        for ch in all_chapters.data or []:
-            if ch["number"] < chapter["number"]:
-                chapters_context += f"\n--- Chapitre {ch['number']} : {ch['title']} ---\n"
-                if ch.get("content"):
-                    # Résumer le contenu précédent (derniers 300 caractères)
-                    content = ch["content"]
-                    if len(content) > 300:
-                        chapters_context += "..." + content[-300:]
-                    else:
-                        chapters_context += content
-                elif ch.get("summary"):
-                    chapters_context += f"[Résumé: {ch['summary']}]"
-
-        # Déterminer si on continue ou on écrit depuis le début
-        existing_content = (chapter.get("content") or "").strip()
-
-        if existing_content:
-            # CONTINUER le chapitre existant
-            prompt = f"""Tu es un écrivain talentueux. Continue l'écriture de ce chapitre de manière fluide et engageante.
-
-📖 CONTEXTE DU LIVRE :
-- Titre : {project.get('title', 'Sans titre')}
-- Genre : {project.get('genre', 'Non défini')}
-- Style : {project.get('style', 'roman')}
-- Public : {project.get('target_audience', 'adult')}
+def _build_chapter_prompt(
+    request: ChapterGenerationRequest, profile: dict
+) -> Tuple[List[str], str]:
+    """
+    Construit le prompt de génération/continuation d'un chapitre.
+    Retourne (blocs système stables, mis en cache par Anthropic ; demande).
+    """
+    # Récupérer le chapitre et son projet (une seule requête, accès vérifié)
+    chapter = assert_chapter_access(profile, request.chapter_id)
+    project_id = chapter.get("project_id")
+    project = assert_project_access(profile, project_id)
+
+    # Contexte des chapitres précédents : digests précalculés uniquement
+    previous_chapters = (
+        supabase.table("chapters")
+        .select("number, title, summary, digest_opening, ending_excerpt")
+        .eq("project_id", project_id)
+        .lt("number", chapter["number"])
+        .order("number")
+        .execute()
+    )
+    chapters_context = "".join(
+        format_chapter_digest(ch) for ch in previous_chapters.data or []
+    )
+
+    # Préfixe stable : contexte du livre, puis chapitres précédents
+    system = [
+        _render_book_context(project),
+        f"📚 RÉSUMÉ DES CHAPITRES PRÉCÉDENTS :{chapters_context}"
+        if chapters_context
+        else "📚 C'est le PREMIER chapitre de l'histoire.",
+    ]
+
+    # Déterminer si on continue ou on écrit depuis le début
+    existing_content = (chapter.get("content") or "").strip()
+
+    if existing_content:
+        # CONTINUER le chapitre existant
+        prompt = f"""Continue l'écriture de ce chapitre de manière fluide et engageante.
 
 📑 CHAPITRE ACTUEL : {chapter.get('title')}
 Objectif du chapitre : {chapter.get('summary', 'Non défini')}
@@ -306,19 +355,9 @@ Ne répète PAS le texte existant.
 Écris environ 400-600 mots supplémentaires.
 {f"Note de l'auteur : {request.instruction}" if request.instruction else ""}
 """
-        else:
-            # ÉCRIRE un nouveau chapitre
-            prompt = f"""Tu es un écrivain talentueux. Écris ce chapitre de manière immersive et captivante.
-
-📖 CONTEXTE DU LIVRE :
-- Titre : {project.get('title', 'Sans titre')}
-- Pitch : {project.get('pitch', 'Non défini')}
-- Genre : {project.get('genre', 'Non défini')}
-- Style : {project.get('style', 'roman')}
-- Public : {project.get('target_audience', 'adult')}
-- Thèmes : {', '.join(project.get('themes', [])) if project.get('themes') else 'Non définis'}
-
-{f"📚 RÉSUMÉ DES CHAPITRES PRÉCÉDENTS :{chapters_context}" if chapters_context else "📚 C'est le PREMIER chapitre de l'histoire."}
+    else:
+        # ÉCRIRE un nouveau chapitre
+        prompt = f"""Écris ce chapitre de manière immersive et captivante.
 
 📑 CHAPITRE À ÉCRIRE : {chapter.get('title')} (Chapitre {chapter.get('number')})
 Objectif : {chapter.get('summary', 'Développe ce chapitre librement')}
@@ -331,18 +370,4 @@ Commence directement par le récit, sans répéter le titre.
 Utilise un style adapté au genre et au public cible.
 """
 
-        # Générer le contenu
-        result = await ai_service.generate_text(prompt=prompt, max_tokens=3000)
-
-        return {
-            "generated_text": result.text,
-            "tokens_used": result.tokens_used,
-            "chapter_id": request.chapter_id,
-        }
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Erreur génération chapitre: {str(e)}"
-        )
+    return system, prompt
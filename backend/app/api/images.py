@@ -2,15 +2,17 @@
 Image generation routes
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 from app.models.schemas import (
     ImageGenerationRequest,
     ImageGenerationResponse,
     IllustrationCreate,
     Illustration,
+    IllustrationSummary,
     IllustrationUpdate,
 )
+from app.services.illustration_jobs import illustration_jobs
 from app.services.image_service import ImageService
 from app.utils.supabase import supabase
 from app.utils.admin import (
@@ -18,6 +20,13 @@ from app.utils.admin import (
     assert_project_access,
     assert_illustration_access,
 )
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    finish_page,
+    keyset_page,
+    select_fields,
+)
 
 router = APIRouter()
 image_service = ImageService()
@@ -39,23 +48,35 @@ async def generate_image(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{project_id}/illustrations", response_model=List[Illustration])
+ILLUSTRATION_KEYS = ("created_at", "id")
+
+
+@router.get(
+    "/{project_id}/illustrations",
+    response_model=List[IllustrationSummary],
+    response_model_exclude_unset=True,
+)
 async def get_project_illustrations(
     project_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Get all illustrations for a project"""
+    """Get a page of illustrations for a project"""
     try:
         assert_project_access(profile, project_id)
-        result = (
+        query = (
             supabase.table("illustrations")
-            .select("*")
+            .select(select_fields(fields, IllustrationSummary, ILLUSTRATION_KEYS))
             .eq("project_id", project_id)
-            .order("created_at", desc=False)
-            .execute()
         )
-        return result.data
+        query = keyset_page(query, cursor, limit, ILLUSTRATION_KEYS)
+        return finish_page(query.execute().data, ILLUSTRATION_KEYS, limit, response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -67,34 +88,29 @@ async def create_illustration(
     user_id: Optional[str] = None,
     profile: dict = Depends(get_user_profile),
 ):
-    """Create/Generate a new illustration"""
+    """
+    Create a new illustration.
+    Returns immediately with status 'pending'; image_url is filled in
+    once the Replicate prediction finishes (poll GET /illustrations/{id}).
+    """
     try:
         assert_project_access(profile, project_id)
-        # Generate image
-        image_result = await image_service.generate_image(
-            prompt=illustration.prompt,
-            style=illustration.style,
-            negative_prompt=illustration.negative_prompt,
-        )
-
-        # Save to database
-        illustration_data = {
-            "project_id": project_id,
-            "image_url": image_result.image_url,
-            "prompt": illustration.prompt,
-            "negative_prompt": illustration.negative_prompt,
-            "style": illustration.style.value,
-            "position": illustration.position,
-            "chapter_id": illustration.chapter_id,
-        }
-
-        result = supabase.table("illustrations").insert(illustration_data).execute()
-
-        return result.data[0]
+        return illustration_jobs.enqueue(project_id, illustration)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/illustrations/{illustration_id}", response_model=Illustration)
+async def get_illustration(
+    illustration_id: str,
+    profile: dict = Depends(get_user_profile),
+):
+    """Get an illustration (generation status)"""
+    return assert_illustration_access(profile, illustration_id)
+
+
 @router.put("/illustrations/{illustration_id}", response_model=Illustration)
 async def update_illustration(
     illustration_id: str,
@@ -132,7 +148,7 @@ async def delete_illustration(
 ):
     """Delete an illustration"""
     try:
-        assert_illustration_access(profile, illustration_id)
+        illustration = assert_illustration_access(profile, illustration_id)
         result = (
             supabase.table("illustrations").delete().eq("id", illustration_id).execute()
         )
@@ -140,6 +156,11 @@ async def delete_illustration(
         if not result.data:
             raise HTTPException(status_code=404, detail="Illustration not found")
 
+        try:
+            image_service.remove_from_storage(illustration)
+        except Exception as e:
+            print(f"⚠️ Fichiers de l'illustration {illustration_id} non supprimés: {e}")
+
         return {"deleted": True, "id": illustration_id}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -162,24 +183,18 @@ async def set_cover_image(
             )
 
         # Get illustration
-        illustration = (
-            supabase.table("illustrations")
-            .select("image_url,project_id")
-            .eq("id", illustration_id)
-            .execute()
-        )
-
-        if not illustration.data:
-            raise HTTPException(status_code=404, detail="Illustration not found")
+        illustration = assert_illustration_access(profile, illustration_id)
 
-        if illustration.data[0].get("project_id") != project_id:
+        if illustration.get("project_id") != project_id:
             raise HTTPException(status_code=400, detail="Illustration not in project")
+        if not illustration.get("image_url"):
+            raise HTTPException(status_code=409, detail="Illustration not ready")
 
         # Update project
         field_name = f"cover_{position}_url"
         result = (
             supabase.table("projects")
-            .update({field_name: illustration.data[0]["image_url"]})
+            .update({field_name: illustration["image_url"]})
             .eq("id", project_id)
             .execute()
         )
@@ -2,8 +2,21 @@
 API endpoints for manuscript upload and improvement
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Form
-from typing import Optional
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    UploadFile,
+    File,
+    Depends,
+    Form,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.routing import APIRoute
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+import asyncio
+import codecs
 import os
 import uuid
 from datetime import datetime
@@ -11,55 +24,145 @@ import PyPDF2
 import docx
 import io
 
+from app.models.schemas import ManuscriptSummary
 from app.utils.supabase import supabase
-from app.services.ai_service import AIService
+from app.services.manuscript_service import manuscript_service
 from app.utils.admin import get_user_profile
-
-router = APIRouter(prefix="/api/manuscripts", tags=["manuscripts"])
-ai_service = AIService()
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    finish_page,
+    keyset_page,
+    select_fields,
+)
 
 # Configuration
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+MAX_BODY_SIZE = MAX_FILE_SIZE + 64 * 1024  # fichier + champs du formulaire multipart
+UPLOAD_CHUNK_SIZE = 64 * 1024
 ALLOWED_EXTENSIONS = {".txt", ".docx", ".pdf"}
 
+FILE_TOO_LARGE = f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024} MB"
 
-def extract_text_from_txt(file_content: bytes) -> str:
-    """Extract text from TXT file"""
-    try:
-        return file_content.decode("utf-8")
-    except UnicodeDecodeError:
-        # Try with different encodings
-        for encoding in ["latin-1", "cp1252", "iso-8859-1"]:
-            try:
-                return file_content.decode(encoding)
-            except:
-                continue
-        raise HTTPException(status_code=400, detail="Unable to decode text file")
-
-
-def extract_text_from_docx(file_content: bytes) -> str:
-    """Extract text from DOCX file"""
+
+class BodySizeLimitRoute(APIRoute):
+    """
+    Refuse les corps trop volumineux avant que le multipart ne soit lu :
+    d'après Content-Length quand il est annoncé, sinon en comptant les
+    octets reçus (transfert chunked) et en coupant dès MAX_BODY_SIZE.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Response:
+            length = request.headers.get("content-length")
+            if length and length.isdigit() and int(length) > MAX_BODY_SIZE:
+                raise HTTPException(status_code=400, detail=FILE_TOO_LARGE)
+
+            receive = request.receive
+            received = 0
+
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > MAX_BODY_SIZE:
+                        raise HTTPException(status_code=400, detail=FILE_TOO_LARGE)
+                return message
+
+            return await handler(Request(request.scope, limited_receive))
+
+        return limited_handler
+
+
+router = APIRouter(
+    prefix="/api/manuscripts", tags=["manuscripts"], route_class=BodySizeLimitRoute
+)
+
+
+def _upload_size(file: UploadFile) -> int:
+    """Taille du fichier déjà mis en tampon par Starlette (sans le recopier)"""
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+def iter_text_from_txt(fp: BinaryIO) -> Iterator[str]:
+    """Yield the text of a TXT file block by block"""
+
+    def decode_blocks(encoding: str) -> Iterator[str]:
+        fp.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        for block in iter(lambda: fp.read(UPLOAD_CHUNK_SIZE), b""):
+            yield decoder.decode(block)
+        yield decoder.decode(b"", final=True)
+
+    for encoding in ["utf-8", "cp1252", "latin-1"]:
+        # Première passe : vérifier que tout le fichier se décode (sans le garder)
+        try:
+            for _ in decode_blocks(encoding):
+                pass
+        except UnicodeDecodeError:
+            continue
+        yield from decode_blocks(encoding)
+        return
+    raise HTTPException(status_code=400, detail="Unable to decode text file")
+
+
+def iter_text_from_docx(fp: BinaryIO) -> Iterator[str]:
+    """Yield the paragraphs of a DOCX file"""
     try:
-        doc = docx.Document(io.BytesIO(file_content))
-        return "\n\n".join([paragraph.text for paragraph in doc.paragraphs])
+        doc = docx.Document(fp)
     except Exception as e:
         raise HTTPException(
             status_code=400, detail=f"Error reading DOCX file: {str(e)}"
         )
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
 
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file"""
+def iter_text_from_pdf(fp: BinaryIO) -> Iterator[str]:
+    """Yield the text of a PDF file page by page"""
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        text = ""
+        pdf_reader = PyPDF2.PdfReader(fp)
         for page in pdf_reader.pages:
-            text += page.extract_text() + "\n\n"
-        return text
+            yield page.extract_text() or ""
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error reading PDF file: {str(e)}")
 
 
+TEXT_EXTRACTORS = {
+    ".txt": (iter_text_from_txt, ""),
+    ".docx": (iter_text_from_docx, "\n\n"),
+    ".pdf": (iter_text_from_pdf, "\n\n"),
+}
+
+
+def extract_manuscript_text(fp: BinaryIO, file_ext: str) -> Tuple[str, int]:
+    """
+    Assemble the extracted parts in a single buffer (linear, no string
+    concatenation) and count words on the fly. Returns (text, word_count).
+    """
+    extract, separator = TEXT_EXTRACTORS[file_ext]
+    buffer = io.StringIO()
+    word_count = 0
+    last_char = " "
+    for index, part in enumerate(extract(fp)):
+        if index:
+            buffer.write(separator)
+        buffer.write(part)
+        word_count += len(part.split())
+        if not separator and part:
+            # TXT : un mot coupé entre deux blocs est compté deux fois
+            if not last_char.isspace() and not part[0].isspace():
+                word_count -= 1
+            last_char = part[-1]
+    return buffer.getvalue(), word_count
+
+
 @router.post("/upload")
 async def upload_manuscript(
     file: UploadFile = File(...),
@@ -84,30 +187,7 @@ async def upload_manuscript(
             detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
         )
 
-    # Read file content
-    file_content = await file.read()
-
-    # Validate file size
-    if len(file_content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024} MB",
-        )
-
-    # Extract text based on file type
-    if file_ext == ".txt":
-        text = extract_text_from_txt(file_content)
-    elif file_ext == ".docx":
-        text = extract_text_from_docx(file_content)
-    elif file_ext == ".pdf":
-        text = extract_text_from_pdf(file_content)
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported file format")
-
-    if not text.strip():
-        raise HTTPException(status_code=400, detail="File is empty or contains no text")
-
-    # Verify project ownership
+    # Verify project ownership (avant tout traitement du fichier)
     project = (
         supabase.table("projects")
         .select("id, user_id, title")
@@ -119,6 +199,21 @@ async def upload_manuscript(
     if not project.data:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    # Le corps est déjà borné par BodySizeLimitRoute ; le fichier tamponné
+    # par Starlette est lu directement, extraction hors de la boucle
+    # d'événements (PDF/DOCX : CPU-bound)
+    if _upload_size(file) > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail=FILE_TOO_LARGE)
+    try:
+        text, word_count = await asyncio.to_thread(
+            extract_manuscript_text, file.file, file_ext
+        )
+    finally:
+        await file.close()
+
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="File is empty or contains no text")
+
     # Store manuscript in database
     manuscript_id = str(uuid.uuid4())
     manuscript_data = {
@@ -128,7 +223,7 @@ async def upload_manuscript(
         "filename": file.filename,
         "file_type": file_ext[1:],  # Remove dot
         "original_text": text,
-        "word_count": len(text.split()),
+        "word_count": word_count,
         "improvement_type": improvement_type,
         "status": "analyzing",
         "created_at": datetime.utcnow().isoformat(),
@@ -153,6 +248,10 @@ async def upload_manuscript(
 async def analyze_manuscript(manuscript_id: str, user=Depends(get_user_profile)):
     """
     Analyze uploaded manuscript and generate improvement suggestions
+    (background job).
+
+    Returns immediately; follow GET /{manuscript_id}/progress, the report
+    is in GET /{manuscript_id} once the status is 'analyzed'.
     """
 
     # Get manuscript
@@ -168,73 +267,20 @@ async def analyze_manuscript(manuscript_id: str, user=Depends(get_user_profile))
         raise HTTPException(status_code=404, detail="Manuscript not found")
 
     manuscript_data = manuscript.data[0]
-    text = manuscript_data["original_text"]
-    improvement_type = manuscript_data["improvement_type"]
-
-    # Generate AI analysis based on improvement type
-    if improvement_type == "correction":
-        prompt = f"""Tu es un correcteur professionnel. Analyse ce texte et identifie :
-- Fautes d'orthographe
-- Erreurs de grammaire
-- Problèmes de ponctuation
-- Incohérences
-
-Texte à corriger (max 2000 premiers mots):
-{' '.join(text.split()[:2000])}
 
-Fournis un résumé des erreurs trouvées et des suggestions de correction."""
-
-    elif improvement_type == "enhancement":
-        prompt = f"""Tu es un éditeur littéraire. Analyse ce texte et suggère des améliorations pour :
-- Style et fluidité
-- Vocabulaire et expressions
-- Rythme narratif
-- Descriptions et dialogues
-
-Texte (max 2000 premiers mots):
-{' '.join(text.split()[:2000])}
-
-Fournis des suggestions concrètes d'amélioration."""
-
-    else:  # restructure
-        prompt = f"""Tu es un consultant éditorial. Analyse la structure de ce texte :
-- Organisation des chapitres
-- Progression narrative
-- Équilibre des parties
-- Suggestions de découpage
-
-Texte (max 2000 premiers mots):
-{' '.join(text.split()[:2000])}
-
-Propose une meilleure structure avec chapitres suggérés."""
+    if manuscript_service.is_running(manuscript_id):
+        raise HTTPException(status_code=409, detail="Manuscript is being processed")
 
     try:
-        # Call AI service
-        analysis = await ai_service.generate_text(prompt, max_tokens=2000)
-
-        # Update manuscript with analysis
-        update_data = {
-            "analysis": analysis.text,
-            "status": "analyzed",
-            "analyzed_at": datetime.utcnow().isoformat(),
-        }
-
-        supabase.table("manuscripts").update(update_data).eq(
-            "id", manuscript_id
-        ).execute()
-
+        # Analyse de tout le manuscrit, par morceaux (map-reduce), hors requête
+        await manuscript_service.start_analysis(manuscript_data)
         return {
             "manuscript_id": manuscript_id,
-            "status": "analyzed",
-            "analysis": analysis.text,
-            "improvement_type": improvement_type,
+            "status": "analyzing",
+            "improvement_type": manuscript_data["improvement_type"],
         }
 
     except Exception as e:
-        # Update status to error
-        supabase.table("manuscripts").update({"status": "error"}).eq(
-            "id", manuscript_id
-        ).execute()
         raise HTTPException(
             status_code=500, detail=f"Error analyzing manuscript: {str(e)}"
         )
@@ -243,7 +289,11 @@ Propose une meilleure structure avec chapitres suggérés."""
 @router.post("/{manuscript_id}/apply-improvements")
 async def apply_improvements(manuscript_id: str, user=Depends(get_user_profile)):
     """
-    Apply AI improvements to the manuscript text
+    Apply AI improvements to the manuscript text (background job).
+
+    Returns immediately; follow GET /{manuscript_id}/progress. Calling it
+    again after a failure resumes the job: only failed or unfinished chunks
+    are processed again.
     """
 
     # Get manuscript
@@ -260,49 +310,20 @@ async def apply_improvements(manuscript_id: str, user=Depends(get_user_profile))
 
     manuscript_data = manuscript.data[0]
 
-    if manuscript_data["status"] != "analyzed":
-        raise HTTPException(status_code=400, detail="Manuscript must be analyzed first")
-
-    text = manuscript_data["original_text"]
-    improvement_type = manuscript_data["improvement_type"]
-
-    # Generate improved version
-    if improvement_type == "correction":
-        prompt = f"""Corrige toutes les fautes d'orthographe, de grammaire et de ponctuation dans ce texte. Ne change pas le style ni le contenu, juste corrige les erreurs.
-
-Texte original :
-{text[:8000]}  # Limit to avoid token limits
-
-Texte corrigé :"""
-
-    else:  # enhancement
-        prompt = f"""Améliore le style de ce texte en gardant le même contenu et la même structure. Rends-le plus fluide, plus élégant, avec un meilleur vocabulaire.
-
-Texte original :
-{text[:8000]}
+    if manuscript_service.is_running(manuscript_id):
+        raise HTTPException(status_code=409, detail="Manuscript is being processed")
 
-Texte amélioré :"""
+    # 'improve_error' / 'improving' sans job actif (worker redémarré) : reprise.
+    # 'error' signale une analyse en échec : pas d'amélioration sans analyse.
+    if manuscript_data["status"] not in ("analyzed", "improve_error", "improving"):
+        raise HTTPException(status_code=400, detail="Manuscript must be analyzed first")
 
     try:
-        improved = await ai_service.generate_text(prompt, max_tokens=4000)
-
-        # Update manuscript with improved version
-        update_data = {
-            "improved_text": improved.text,
-            "status": "improved",
-            "improved_at": datetime.utcnow().isoformat(),
-        }
-
-        supabase.table("manuscripts").update(update_data).eq(
-            "id", manuscript_id
-        ).execute()
-
+        started = await manuscript_service.start_improvement(manuscript_data)
         return {
             "manuscript_id": manuscript_id,
-            "status": "improved",
-            "improved_text": improved.text,
-            "original_word_count": len(text.split()),
-            "improved_word_count": len(improved.text.split()),
+            "status": "improving",
+            **started,
         }
 
     except Exception as e:
@@ -311,6 +332,28 @@ Texte amélioré :"""
         )
 
 
+@router.get("/{manuscript_id}/progress")
+async def get_manuscript_progress(manuscript_id: str, user=Depends(get_user_profile)):
+    """Progress of the analysis or improvement job (chunks done / total)"""
+
+    manuscript = (
+        supabase.table("manuscripts")
+        .select("id, status, chunks_total, chunks_done, progress")
+        .eq("id", manuscript_id)
+        .eq("user_id", user["id"])
+        .execute()
+    )
+
+    if not manuscript.data:
+        raise HTTPException(status_code=404, detail="Manuscript not found")
+
+    return {
+        "manuscript_id": manuscript_id,
+        "status": manuscript.data[0]["status"],
+        **manuscript_service.progress(manuscript.data[0]),
+    }
+
+
 @router.get("/{manuscript_id}")
 async def get_manuscript(manuscript_id: str, user=Depends(get_user_profile)):
     """Get manuscript details"""
@@ -329,20 +372,33 @@ async def get_manuscript(manuscript_id: str, user=Depends(get_user_profile)):
     return manuscript.data[0]
 
 
-@router.get("/project/{project_id}")
-async def get_project_manuscripts(project_id: str, user=Depends(get_user_profile)):
-    """Get all manuscripts for a project"""
+MANUSCRIPT_KEYS = ("created_at", "id")
+
 
-    manuscripts = (
+@router.get(
+    "/project/{project_id}",
+    response_model=List[ManuscriptSummary],
+    response_model_exclude_unset=True,
+)
+async def get_project_manuscripts(
+    project_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    user=Depends(get_user_profile),
+):
+    """Get a page of manuscripts (without texts) for a project"""
+
+    query = (
         supabase.table("manuscripts")
-        .select("*")
+        .select(select_fields(fields, ManuscriptSummary, MANUSCRIPT_KEYS))
         .eq("project_id", project_id)
         .eq("user_id", user["id"])
-        .order("created_at", desc=True)
-        .execute()
     )
+    query = keyset_page(query, cursor, limit, MANUSCRIPT_KEYS, desc=True)
 
-    return manuscripts.data or []
+    return finish_page(query.execute().data or [], MANUSCRIPT_KEYS, limit, response)
 
 
 @router.delete("/{manuscript_id}")
@@ -6,8 +6,9 @@ Utilise l'authentification JWT via get_user_profile
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from app.models.schemas import UserProfile, UserProfileUpdate
+from app.utils.db import fetch_all
 from app.utils.supabase import supabase
-from app.utils.admin import get_user_profile
+from app.utils.admin import get_user_profile, invalidate_user_profile
 
 router = APIRouter()
 
@@ -38,6 +39,7 @@ async def update_my_profile(
         if not result.data:
             raise HTTPException(status_code=404, detail="Profile not found")
 
+        invalidate_user_profile(profile["id"])
         return result.data[0]
     except HTTPException:
         raise
@@ -51,12 +53,15 @@ async def get_my_stats(profile: dict = Depends(get_user_profile)):
     try:
         user_id = profile["id"]
         
-        # Get projects count
-        projects = (
+        # Projects and illustrations count (independent queries, in parallel)
+        projects, illustrations = await fetch_all(
             supabase.table("projects")
             .select("id, status, word_count, chapter_count")
-            .eq("user_id", user_id)
-            .execute()
+            .eq("user_id", user_id),
+            supabase.table("illustrations")
+            .select("id, projects!inner(user_id)", count="exact")
+            .eq("projects.user_id", user_id)
+            .limit(1),
         )
 
         total_projects = len(projects.data)
@@ -69,18 +74,7 @@ async def get_my_stats(profile: dict = Depends(get_user_profile)):
             status = project.get("status", "draft")
             status_counts[status] = status_counts.get(status, 0) + 1
 
-        # Get illustrations count
-        project_ids = [p["id"] for p in projects.data]
-        illustrations_count = 0
-        
-        if project_ids:
-            illustrations = (
-                supabase.table("illustrations")
-                .select("id", count="exact")
-                .in_("project_id", project_ids)
-                .execute()
-            )
-            illustrations_count = illustrations.count if illustrations.count else 0
+        illustrations_count = illustrations.count or 0
 
         return {
             "total_projects": total_projects,
@@ -111,6 +105,7 @@ async def toggle_child_mode(
         if not result.data:
             raise HTTPException(status_code=404, detail="Profile not found")
 
+        invalidate_user_profile(profile["id"])
         return {"is_child_mode": enabled, "updated": True}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
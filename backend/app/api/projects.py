@@ -2,43 +2,56 @@
 Projects routes
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.models.schemas import Project, ProjectCreate, ProjectUpdate
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Optional
+from app.models.schemas import Project, ProjectCreate, ProjectSummary, ProjectUpdate
 from app.utils.supabase import supabase
 from app.utils.admin import get_user_profile, is_admin_user, check_resource_limit
+from app.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    finish_page,
+    keyset_page,
+    select_fields,
+)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[Project])
-async def get_projects(user_id: str, profile: dict = Depends(get_user_profile)):
-    """Get all projects for a user (admin can see all projects)"""
+PROJECT_KEYS = ("created_at", "id")
+
+
+@router.get(
+    "/", response_model=List[ProjectSummary], response_model_exclude_unset=True
+)
+async def get_projects(
+    user_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    profile: dict = Depends(get_user_profile),
+):
+    """Get a page of projects for a user (admin can see all projects)"""
     try:
+        query = supabase.table("projects").select(
+            select_fields(fields, ProjectSummary, PROJECT_KEYS)
+        )
+
         # Si admin, peut voir tous les projets OU filtrer par user_id
         # Si user normal, voir uniquement ses projets
         if is_admin_user(profile):
-            # Admin: si user_id fourni, filtrer, sinon tout voir
+            # Admin: si user_id fourni, filtrer, sinon tout voir (page par page)
             if user_id and user_id != "all":
-                result = (
-                    supabase.table("projects")
-                    .select("*")
-                    .eq("user_id", user_id)
-                    .execute()
-                )
-            else:
-                # Voir tous les projets de tous les utilisateurs
-                result = supabase.table("projects").select("*").execute()
+                query = query.eq("user_id", user_id)
         else:
             # Utilisateur normal: seulement ses projets
-            result = (
-                supabase.table("projects")
-                .select("*")
-                .eq("user_id", profile["id"])
-                .execute()
-            )
+            query = query.eq("user_id", profile["id"])
 
-        return result.data
+        query = keyset_page(query, cursor, limit, PROJECT_KEYS, desc=True)
+        return finish_page(query.execute().data, PROJECT_KEYS, limit, response)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -31,10 +31,19 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_anon_key: str
     supabase_service_key: str
+    # Secret JWT Supabase (optionnel) : vérifie les tokens localement, sans appel réseau
+    supabase_jwt_secret: Optional[str] = None
 
     # AI Services
     anthropic_api_key: str
     replicate_api_token: str
+    anthropic_timeout_seconds: float = 120.0
+    anthropic_connect_timeout_seconds: float = 10.0
+    anthropic_max_connections: int = 100
+    anthropic_max_keepalive_connections: int = 20
+    anthropic_max_retries: int = 2
+    replicate_poll_interval_seconds: float = 2.0
+    replicate_timeout_seconds: float = 300.0
 
     # Stripe
     stripe_secret_key: Optional[str] = None
@@ -64,11 +73,52 @@ class Settings(BaseSettings):
     session_timeout_minutes: int = 60
     require_email_verification: bool = True
 
+    # Cache d'authentification (utilisateur + profil)
+    auth_cache_ttl_seconds: int = 60
+    auth_cache_max_entries: int = 10000
+
+    # Cache des métriques du tableau de bord admin
+    admin_metrics_cache_ttl_seconds: int = 60
+
+    # Cache des réponses du chatbot public
+    chatbot_cache_ttl_seconds: int = 3600
+    chatbot_cache_max_entries: int = 2000
+
     # Rate limiting
     rate_limit_enabled: bool = True
+    # "memory" (par processus) ou "supabase" (partagé entre instances)
+    rate_limit_backend: str = "memory"
+    rate_limit_max_keys: int = 100000
+    rate_limit_requests_per_minute: int = 100
+    rate_limit_ai_per_minute: int = 10
+    rate_limit_images_per_minute: int = 5
+
+    # Manuscrits : traitement par morceaux
+    manuscript_chunk_chars: int = 8000
+    manuscript_max_concurrency: int = 4
+    # Réservation d'un morceau 'processing' considérée abandonnée au-delà
+    manuscript_chunk_claim_timeout_seconds: int = 600
+
+    # Historique des chapitres : deltas max entre deux snapshots
+    chapter_revision_max_chain: int = 50
+
+    # Conversations : messages chargés à l'ouverture, fenêtre envoyée à Claude
+    conversation_page_messages: int = 50
+    conversation_history_messages: int = 40  # messages lus au plus par tour
+    conversation_history_token_budget: int = 3000
+    # Résumé glissant des messages sortis de la fenêtre
+    conversation_summary_max_tokens: int = 400
+    conversation_summary_fold_tokens: int = 6000
 
     # Storage (optional)
     exports_local_dir: str = "./generated/exports"
+    illustrations_bucket: str = "illustrations"
+
+    # Pool de processus (rendu PDF/EPUB et autres traitements CPU-bound)
+    cpu_pool_workers: int = 2
+
+    # Pool de threads des requêtes Supabase lancées en parallèle (app.utils.db)
+    db_fanout_workers: int = 16
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -24,6 +24,13 @@ from app.api import (
     user_images,
 )
 from app.utils.security import SECURITY_HEADERS, check_rate_limit
+from app.utils.admin import begin_request_scope, end_request_scope
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.services.ai_service import close_anthropic_client
+from app.services.export_jobs import export_jobs
+from app.services.illustration_jobs import illustration_jobs
+from app.utils.cpu_pool import cpu_pool
+from app.utils import db
 import time
 
 # Create FastAPI app
@@ -47,6 +54,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Trusted Host Middleware (protection contre Host Header Injection)
@@ -73,9 +81,13 @@ async def security_middleware(request: Request, call_next):
     # Rate limiting
     await check_rate_limit(request)
 
-    # Process request
+    # Process request (mémo des projets autorisés, propre à la requête)
     start_time = time.time()
-    response = await call_next(request)
+    scope_token = begin_request_scope()
+    try:
+        response = await call_next(request)
+    finally:
+        end_request_scope(scope_token)
     process_time = time.time() - start_time
 
     # Ajouter headers de sécurité
@@ -88,6 +100,21 @@ async def security_middleware(request: Request, call_next):
     return response
 
 
+@app.on_event("startup")
+async def startup():
+    """Reprend ou clôt les jobs d'arrière-plan interrompus par le dernier redémarrage"""
+    await export_jobs.recover()
+    await illustration_jobs.recover()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Libère les ressources partagées (pool HTTP Claude, pools de processus/threads)"""
+    await close_anthropic_client()
+    cpu_pool.shutdown()
+    db.shutdown()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
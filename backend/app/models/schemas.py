@@ -3,7 +3,7 @@ Pydantic schemas for API validation
 """
 
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -106,6 +106,26 @@ class Project(BaseModel):
         from_attributes = True
 
 
+class ProjectSummary(BaseModel):
+    """Ligne de liste : sans personnages, univers ni thèmes"""
+
+    id: str
+    user_id: Optional[str] = None
+    title: Optional[str] = None
+    pitch: Optional[str] = None
+    genre: Optional[str] = None
+    style: Optional[ProjectStyle] = None
+    target_audience: Optional[TargetAudience] = None
+    status: Optional[ProjectStatus] = None
+    progress: Optional[int] = None
+    word_count: Optional[int] = None
+    chapter_count: Optional[int] = None
+    cover_front_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    published_at: Optional[datetime] = None
+
+
 # Chapter Schemas
 class ChapterCreate(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
@@ -126,6 +146,7 @@ class Chapter(BaseModel):
     content: Optional[str] = None
     summary: Optional[str] = None
     word_count: int = 0
+    version: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -133,6 +154,56 @@ class Chapter(BaseModel):
         from_attributes = True
 
 
+class ChapterTextOp(BaseModel):
+    """Remplace content[start:end] par text (positions en caractères Unicode)"""
+
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+
+class ChapterPatch(BaseModel):
+    version: int = Field(..., ge=0)
+    ops: List[ChapterTextOp] = Field(..., min_length=1, max_length=200)
+
+
+class ChapterPatchResult(BaseModel):
+    id: str
+    number: int
+    version: int
+    word_count: int
+    length: int
+
+
+class ChapterRevision(BaseModel):
+    version: int
+    kind: str  # 'snapshot' or 'delta'
+    content_length: int = 0
+    word_count: int = 0
+    payload_size: int = 0
+    created_at: datetime
+
+
+class ChapterRevisionContent(BaseModel):
+    version: int
+    content: str
+    word_count: int = 0
+
+
+class ChapterSummary(BaseModel):
+    """Ligne de liste : sans le contenu (GET /chapters/{number} pour le texte)"""
+
+    id: str
+    project_id: Optional[str] = None
+    number: Optional[int] = None
+    title: Optional[str] = None
+    summary: Optional[str] = None
+    word_count: Optional[int] = None
+    version: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 # Generation Schemas
 class GenerationRequest(BaseModel):
     prompt: str = Field(..., min_length=1)
@@ -211,8 +282,9 @@ class Illustration(BaseModel):
     id: str
     project_id: str
     chapter_id: Optional[str] = None
-    image_url: str
+    image_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
+    variants: Optional[Dict[str, str]] = None
     prompt: str
     negative_prompt: Optional[str] = None
     model: Optional[str] = None
@@ -221,12 +293,31 @@ class Illustration(BaseModel):
     height: Optional[int] = None
     position: Optional[str] = None
     caption: Optional[str] = None
+    status: str = "completed"
+    error_message: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class IllustrationSummary(BaseModel):
+    """Ligne de liste : sans prompts ni variantes"""
+
+    id: str
+    project_id: Optional[str] = None
+    chapter_id: Optional[str] = None
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    style: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    position: Optional[str] = None
+    caption: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
 # Export Schemas
 class ExportCreate(BaseModel):
     format: str = Field(..., pattern="^(pdf_interior|pdf_cover|epub|mobi|full_kdp)$")
@@ -241,9 +332,45 @@ class Export(BaseModel):
     file_size: Optional[int] = None
     config: Optional[dict] = None
     status: str
+    progress: int = 0
     error_message: Optional[str] = None
     created_at: datetime
+    started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class ExportSummary(BaseModel):
+    """Ligne de liste : sans configuration ni message d'erreur"""
+
+    id: str
+    project_id: Optional[str] = None
+    format: Optional[str] = None
+    file_url: Optional[str] = None
+    file_size: Optional[int] = None
+    status: Optional[str] = None
+    progress: Optional[int] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+# Manuscript Schemas
+class ManuscriptSummary(BaseModel):
+    """Ligne de liste : sans texte original, texte amélioré ni analyse"""
+
+    id: str
+    project_id: Optional[str] = None
+    filename: Optional[str] = None
+    file_type: Optional[str] = None
+    file_size: Optional[int] = None
+    word_count: Optional[int] = None
+    improvement_type: Optional[str] = None
+    status: Optional[str] = None
+    progress: Optional[int] = None
+    chunks_total: Optional[int] = None
+    chunks_done: Optional[int] = None
+    created_at: Optional[datetime] = None
+    analyzed_at: Optional[datetime] = None
+    improved_at: Optional[datetime] = None
@@ -2,95 +2,228 @@
 AI Service for text generation using Anthropic Claude
 """
 
-from anthropic import Anthropic
+import httpx
+from anthropic import AsyncAnthropic, NOT_GIVEN
 from app.config import settings
 from app.models.schemas import GenerationResponse
-from app.utils.supabase import supabase
-from typing import List, Optional
+from app.services.project_context import book_context
+from app.utils.tokens import estimate_tokens, fit_history
+from typing import AsyncIterator, List, Optional
+
+# Client partagé par toutes les instances d'AIService (un seul pool HTTP par worker)
+_client: Optional[AsyncAnthropic] = None
+
+# Compteurs du cache de prompt Anthropic (par processus)
+_prompt_cache = {
+    "requests": 0,
+    "hits": 0,
+    "writes": 0,
+    "cache_read_tokens": 0,
+    "cache_creation_tokens": 0,
+    "uncached_input_tokens": 0,
+}
+
+
+def get_anthropic_client() -> AsyncAnthropic:
+    """Return the process-wide async Claude client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            max_retries=settings.anthropic_max_retries,
+            timeout=httpx.Timeout(
+                settings.anthropic_timeout_seconds,
+                connect=settings.anthropic_connect_timeout_seconds,
+            ),
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.anthropic_max_connections,
+                    max_keepalive_connections=settings.anthropic_max_keepalive_connections,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_anthropic_client() -> None:
+    """Close the shared client (called on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _text_blocks(blocks: List[str]) -> list:
+    return [{"type": "text", "text": block} for block in blocks if block]
+
+
+def cached_system(blocks: List[str]) -> list:
+    """
+    Blocs système avec un point de cache (prompt caching Anthropic) sur le
+    dernier : il couvre tout le préfixe. Placer les plus stables en premier.
+    Un préfixe sous le minimum d'Anthropic (1024 tokens) n'est pas mis en cache.
+    """
+    system = _text_blocks(blocks)
+    if system:
+        system[-1]["cache_control"] = {"type": "ephemeral"}
+    return system
+
+
+def _record_usage(usage) -> int:
+    """Met à jour les compteurs du cache de prompt, retourne les tokens consommés"""
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+
+    _prompt_cache["requests"] += 1
+    _prompt_cache["cache_read_tokens"] += cache_read
+    _prompt_cache["cache_creation_tokens"] += cache_creation
+    _prompt_cache["uncached_input_tokens"] += usage.input_tokens
+    if cache_read:
+        _prompt_cache["hits"] += 1
+    elif cache_creation:
+        _prompt_cache["writes"] += 1
+
+    return usage.input_tokens + cache_read + cache_creation + usage.output_tokens
+
+
+def prompt_cache_stats() -> dict:
+    """Métriques du cache de prompt (hit = préfixe relu depuis le cache)"""
+    requests = _prompt_cache["requests"]
+    return {
+        **_prompt_cache,
+        "misses": requests - _prompt_cache["hits"],
+        "hit_rate": round(_prompt_cache["hits"] / requests, 4) if requests else 0.0,
+    }
 
 
 class AIService:
     def __init__(self):
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
         self.model = "claude-sonnet-4-20250514"
 
+    @property
+    def client(self) -> AsyncAnthropic:
+        return get_anthropic_client()
+
     async def generate_text(
-        self, prompt: str, context: str = None, max_tokens: int = 2000
+        self,
+        prompt: str,
+        context: str = None,
+        max_tokens: int = 2000,
+        timeout: Optional[float] = None,
+        system: Optional[List[str]] = None,
     ) -> GenerationResponse:
-        """Generate text using Claude"""
+        """
+        Generate text using Claude.
+        `system`: stable preamble blocks, sent as cacheable system content.
+        """
 
         # Build the full prompt
-        full_prompt = prompt
-        if context:
-            full_prompt = f"Contexte:\n{context}\n\nDemande:\n{prompt}"
+        full_prompt = self._build_prompt(prompt, context)
 
         # Call Claude API
-        message = self.client.messages.create(
+        message = await self.client.messages.create(
             model=self.model,
             max_tokens=max_tokens,
+            system=cached_system(system) if system else NOT_GIVEN,
             messages=[{"role": "user", "content": full_prompt}],
+            timeout=timeout if timeout is not None else NOT_GIVEN,
         )
 
         # Extract response
         text = message.content[0].text
-        tokens_used = message.usage.input_tokens + message.usage.output_tokens
+        tokens_used = _record_usage(message.usage)
 
         return GenerationResponse(text=text, tokens_used=tokens_used)
 
-    async def continue_text(
-        self, text: str, max_tokens: int = 500
-    ) -> GenerationResponse:
-        """Continue writing from existing text"""
-        prompt = f"""Continue cette histoire de manière naturelle et cohérente:
+    async def stream_text(
+        self,
+        prompt: str,
+        context: str = None,
+        max_tokens: int = 2000,
+        timeout: Optional[float] = None,
+        system: Optional[List[str]] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Stream text from Claude as it is generated.
+
+        Yields {"type": "token", "text": ...} for each delta, then a final
+        {"type": "done", "text": <full text>, "tokens_used": ...}.
+        """
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=max_tokens,
+            system=cached_system(system) if system else NOT_GIVEN,
+            messages=[{"role": "user", "content": self._build_prompt(prompt, context)}],
+            timeout=timeout if timeout is not None else NOT_GIVEN,
+        ) as stream:
+            async for text in stream.text_stream:
+                yield {"type": "token", "text": text}
+            message = await stream.get_final_message()
+
+        yield {
+            "type": "done",
+            "text": "".join(
+                block.text for block in message.content if block.type == "text"
+            ),
+            "tokens_used": _record_usage(message.usage),
+        }
+
+    @staticmethod
+    def _build_prompt(prompt: str, context: str = None) -> str:
+        if context:
+            return f"Contexte:\n{context}\n\nDemande:\n{prompt}"
+        return prompt
+
+    @staticmethod
+    def build_continue_prompt(text: str) -> str:
+        """Prompt used to continue writing from existing text"""
+        return f"""Continue cette histoire de manière naturelle et cohérente:
 
 {text}
 
 Continue l'histoire (ne répète pas le texte existant, continue juste là où ça s'arrête):"""
 
-        return await self.generate_text(prompt, max_tokens=max_tokens)
-
-    async def improve_text(self, text: str, instruction: str) -> GenerationResponse:
-        """Improve existing text based on instruction"""
-        prompt = f"""{instruction}
+    @staticmethod
+    def build_improve_prompt(text: str, instruction: str) -> str:
+        """Prompt used to improve existing text based on instruction"""
+        return f"""{instruction}
 
 Texte à améliorer:
 {text}
 
 Texte amélioré:"""
 
-        return await self.generate_text(prompt, max_tokens=2000)
+    async def continue_text(
+        self, text: str, max_tokens: int = 500
+    ) -> GenerationResponse:
+        """Continue writing from existing text"""
+        return await self.generate_text(
+            self.build_continue_prompt(text), max_tokens=max_tokens
+        )
+
+    async def improve_text(self, text: str, instruction: str) -> GenerationResponse:
+        """Improve existing text based on instruction"""
+        return await self.generate_text(
+            self.build_improve_prompt(text, instruction), max_tokens=2000
+        )
 
-    async def chat_response(
+    def _chat_request(
         self,
         user_message: str,
-        phase: str = "exploration",
-        history: List[dict] = None,
-        project_id: Optional[str] = None,
-    ) -> str:
+        phase: str,
+        history: Optional[List[dict]],
+        project_id: Optional[str],
+        project: Optional[dict],
+        summary: Optional[str],
+    ) -> dict:
         """
-        Generate chat response based on phase and context
+        Paramètres Claude d'un tour de conversation (system + messages).
+        Pass `project` when the caller already loaded the row to skip the lookup.
+        `history` is trimmed to the token budget (newest messages first);
+        `summary` condenses the older turns that no longer fit.
         """
-        # Get project context if available
-        project_context = ""
-        if project_id:
-            project = (
-                supabase.table("projects")
-                .select(
-                    "title, pitch, genre, style, target_audience, characters, universe, themes"
-                )
-                .eq("id", project_id)
-                .execute()
-            )
-            if project.data:
-                p = project.data[0]
-                project_context = f"""
-Projet actuel:
-- Titre: {p.get('title', 'Sans titre')}
-- Pitch: {p.get('pitch', 'Aucun')}
-- Genre: {p.get('genre', 'Non défini')}
-- Style: {p.get('style', 'Non défini')}
-- Public: {p.get('target_audience', 'Non défini')}
-"""
+        # Bloc projet rendu depuis la ligne fournie, sinon lu en base
+        project_context = book_context(project=project, project_id=project_id)
 
         # Build system prompt based on phase
         system_prompts = {
@@ -114,27 +247,122 @@ Génère des prompts précis et évocateurs pour les générateurs d'images.""",
 
         system_prompt = system_prompts.get(phase, system_prompts["exploration"])
 
-        # Build messages for Claude
-        messages = []
-        if history:
-            # Add conversation history (limit to last 10 messages)
-            for msg in history[-10:]:
-                if msg.get("role") in ["user", "assistant"]:
-                    messages.append({"role": msg["role"], "content": msg["content"]})
+        # Build messages for Claude: history within the token budget
+        budget = settings.conversation_history_token_budget - estimate_tokens(
+            user_message
+        )
+        messages = [
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in fit_history(history, budget)
+        ]
+
+        # Point de cache sur le dernier message de l'historique : le préfixe
+        # système + historique ne fait que s'allonger d'un tour à l'autre et,
+        # contrairement aux blocs système seuls, dépasse vite le minimum
+        # cacheable. Le tour suivant relit ce préfixe depuis le cache.
+        if messages:
+            last = messages[-1]
+            last["content"] = [
+                {
+                    "type": "text",
+                    "text": last["content"],
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
 
         # Add current message
-        current_content = user_message
-        if project_context:
-            current_content = f"{project_context}\n\n{user_message}"
+        messages.append({"role": "user", "content": user_message})
 
-        messages.append({"role": "user", "content": current_content})
+        summary_block = (
+            f"Résumé de la conversation jusqu'ici :\n{summary}" if summary else ""
+        )
+
+        return {
+            "model": self.model,
+            "max_tokens": 1500,
+            "system": _text_blocks([system_prompt, project_context, summary_block]),
+            "messages": messages,
+        }
+
+    async def chat_response(
+        self,
+        user_message: str,
+        phase: str = "exploration",
+        history: List[dict] = None,
+        project_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        project: Optional[dict] = None,
+        summary: Optional[str] = None,
+    ) -> str:
+        """Generate chat response based on phase and context"""
+        request = self._chat_request(
+            user_message, phase, history, project_id, project, summary
+        )
 
         # Call Claude
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1500,
-            system=system_prompt,
-            messages=messages,
+        response = await self.client.messages.create(
+            **request, timeout=timeout if timeout is not None else NOT_GIVEN
         )
+        _record_usage(response.usage)
 
         return response.content[0].text
+
+    async def stream_chat_response(
+        self,
+        user_message: str,
+        phase: str = "exploration",
+        history: List[dict] = None,
+        project_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        project: Optional[dict] = None,
+        summary: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of chat_response.
+
+        Yields {"type": "token", "text": ...} for each delta, then a final
+        {"type": "done", "text": <full text>, "tokens_used": ...}.
+        """
+        request = self._chat_request(
+            user_message, phase, history, project_id, project, summary
+        )
+        async with self.client.messages.stream(
+            **request, timeout=timeout if timeout is not None else NOT_GIVEN
+        ) as stream:
+            async for text in stream.text_stream:
+                yield {"type": "token", "text": text}
+            message = await stream.get_final_message()
+
+        yield {
+            "type": "done",
+            "text": "".join(
+                block.text for block in message.content if block.type == "text"
+            ),
+            "tokens_used": _record_usage(message.usage),
+        }
+
+    async def summarize_conversation(
+        self, previous_summary: Optional[str], messages: List[dict]
+    ) -> str:
+        """Intègre des messages sortis de la fenêtre au résumé glissant"""
+        transcript = "\n\n".join(
+            f"{'Auteur' if m['role'] == 'user' else 'Assistant'} : {m['content']}"
+            for m in messages
+        )
+        prompt = f"""Résumé actuel de la conversation :
+{previous_summary or "(aucun)"}
+
+Nouveaux échanges à intégrer :
+{transcript}
+
+Réécris le résumé en intégrant ces échanges. Conserve les idées retenues, les décisions prises
+(personnages, intrigue, univers, ton) et les questions encore ouvertes. Sois concis, en prose,
+sans formule d'introduction."""
+
+        response = await self.client.messages.create(
+            model=self.model,
+            max_tokens=settings.conversation_summary_max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        _record_usage(response.usage)
+        return response.content[0].text.strip()
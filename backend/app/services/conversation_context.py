@@ -0,0 +1,134 @@
+"""
+Conversation context - fenêtre d'historique sous budget de tokens
+
+Chaque tour envoie à Claude :
+- le résumé glissant stocké (`conversations.summary`, borné en tokens)
+- les messages récents non résumés, du plus récent au plus ancien, tant
+  qu'ils tiennent dans `conversation_history_token_budget`
+
+Les messages qui sortent de la fenêtre sont intégrés au résumé en
+arrière-plan, par lots bornés (`conversation_summary_fold_tokens`), jusqu'à
+rejoindre la fenêtre : `summary_seq` avance jusqu'au dernier message intégré.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.ai_service import AIService
+from app.services.conversation_service import conversation_service
+from app.utils.tokens import CHARS_PER_TOKEN, estimate_tokens, fit_history
+
+
+class ConversationContext:
+    """Fenêtre d'historique et résumé glissant d'une conversation"""
+
+    def __init__(self):
+        self.ai_service = AIService()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._counts = {"folds": 0, "folded_messages": 0, "failures": 0}
+
+    def window(self, conversation: dict, user_message: str) -> Tuple[List[dict], bool]:
+        """
+        Messages récents non résumés tenant dans le budget, et indicateur
+        indiquant si des messages plus anciens restent à résumer
+        """
+        rows = conversation_service.recent_messages(
+            conversation["id"],
+            settings.conversation_history_messages,
+            after_seq=conversation.get("summary_seq") or 0,
+        )
+        budget = settings.conversation_history_token_budget - estimate_tokens(
+            user_message
+        )
+        kept = fit_history(rows, budget)
+        # Lecture pleine : d'autres messages non résumés précèdent ces lignes
+        overflow = len(kept) < len(rows) or (
+            len(rows) == settings.conversation_history_messages
+        )
+        return kept, overflow
+
+    def schedule_fold(self, conversation: dict, window: List[dict]) -> None:
+        """Résume en arrière-plan les messages antérieurs à la fenêtre"""
+        conversation_id = conversation["id"]
+        if conversation_id in self._tasks:
+            return
+        self._tasks[conversation_id] = asyncio.create_task(
+            self._fold(
+                conversation_id,
+                conversation.get("summary"),
+                conversation.get("summary_seq") or 0,
+                window[0]["seq"] if window else None,
+            )
+        )
+
+    async def _fold(
+        self,
+        conversation_id: str,
+        summary: Optional[str],
+        summary_seq: int,
+        before_seq: Optional[int],
+    ) -> None:
+        try:
+            # Un lot borné par itération, jusqu'à rattraper la fenêtre : des
+            # messages longs ne laissent pas de trou entre résumé et fenêtre
+            while True:
+                batch = await self._next_batch(
+                    conversation_id, summary_seq, before_seq
+                )
+                if not batch:
+                    return
+
+                new_summary = await self.ai_service.summarize_conversation(
+                    summary, batch
+                )
+                saved = await asyncio.to_thread(
+                    conversation_service.save_summary,
+                    conversation_id,
+                    new_summary,
+                    batch[-1]["seq"],
+                    summary_seq,
+                )
+                if not saved:
+                    return  # résumé avancé ailleurs entre-temps
+                self._counts["folds"] += 1
+                self._counts["folded_messages"] += len(batch)
+                summary, summary_seq = new_summary, batch[-1]["seq"]
+        except Exception as e:
+            self._counts["failures"] += 1
+            print(f"⚠️ Résumé de la conversation {conversation_id} non mis à jour: {e}")
+        finally:
+            self._tasks.pop(conversation_id, None)
+
+    async def _next_batch(
+        self, conversation_id: str, summary_seq: int, before_seq: Optional[int]
+    ) -> List[dict]:
+        """Prochain lot à résumer, borné en tokens (message trop long tronqué)"""
+        messages = await asyncio.to_thread(
+            conversation_service.oldest_messages,
+            conversation_id,
+            settings.conversation_history_messages,
+            summary_seq,
+            before_seq,
+        )
+        fold_budget = settings.conversation_summary_fold_tokens
+        batch: List[dict] = []
+        used = 0
+        for message in messages:
+            cost = estimate_tokens(message["content"])
+            if batch and used + cost > fold_budget:
+                break
+            if cost > fold_budget:
+                limit = int(fold_budget * CHARS_PER_TOKEN)
+                message = {**message, "content": message["content"][:limit]}
+            batch.append(message)
+            used += cost
+        return batch
+
+    def stats(self) -> dict:
+        return {"active_folds": len(self._tasks), **self._counts}
+
+
+conversation_context = ConversationContext()
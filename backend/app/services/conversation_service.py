@@ -0,0 +1,145 @@
+"""
+Conversation service - historique append-only des conversations créatives
+
+Les messages vivent dans `conversation_messages` (une ligne par message,
+`seq` croissant) : un tour = un INSERT, l'historique se lit par les N
+derniers messages sans jamais recharger toute la conversation.
+Les plus anciens sont condensés dans `conversations.summary`
+(voir conversation_context).
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+from app.config import settings
+from app.utils.supabase import supabase
+
+MESSAGE_FIELDS = "seq, role, content, created_at"
+
+
+def _as_message(row: dict) -> dict:
+    """Forme historique des messages (role, content, timestamp)"""
+    return {
+        "seq": row["seq"],
+        "role": row["role"],
+        "content": row["content"],
+        "timestamp": row["created_at"],
+    }
+
+
+class ConversationService:
+    """Lecture / écriture des messages d'une conversation"""
+
+    def get_or_create(self, project_id: str) -> dict:
+        """Conversation (id, phase...) du projet, créée au premier accès"""
+        result = (
+            supabase.table("conversations")
+            .select("id, project_id, phase, summary, summary_seq, created_at, updated_at")
+            .eq("project_id", project_id)
+            .execute()
+        )
+        if result.data:
+            return result.data[0]
+        created = (
+            supabase.table("conversations")
+            .insert({"project_id": project_id, "phase": "exploration"})
+            .execute()
+        )
+        return created.data[0]
+
+    def _range(
+        self,
+        conversation_id: str,
+        after_seq: Optional[int],
+        before_seq: Optional[int],
+    ):
+        query = (
+            supabase.table("conversation_messages")
+            .select(MESSAGE_FIELDS)
+            .eq("conversation_id", conversation_id)
+        )
+        if after_seq is not None:
+            query = query.gt("seq", after_seq)
+        if before_seq is not None:
+            query = query.lt("seq", before_seq)
+        return query
+
+    def recent_messages(
+        self,
+        conversation_id: str,
+        limit: Optional[int] = None,
+        before_seq: Optional[int] = None,
+        after_seq: Optional[int] = None,
+    ) -> List[dict]:
+        """Les `limit` derniers messages de la plage, du plus ancien au plus récent"""
+        rows = (
+            self._range(conversation_id, after_seq, before_seq)
+            .order("seq", desc=True)
+            .limit(limit or settings.conversation_history_messages)
+            .execute()
+        ).data
+        return [_as_message(row) for row in reversed(rows)]
+
+    def oldest_messages(
+        self,
+        conversation_id: str,
+        limit: int,
+        after_seq: Optional[int] = None,
+        before_seq: Optional[int] = None,
+    ) -> List[dict]:
+        """Les `limit` premiers messages de la plage, du plus ancien au plus récent"""
+        rows = (
+            self._range(conversation_id, after_seq, before_seq)
+            .order("seq")
+            .limit(limit)
+            .execute()
+        ).data
+        return [_as_message(row) for row in rows]
+
+    def append(self, conversation_id: str, *messages: dict) -> List[dict]:
+        """Ajoute des messages {role, content} dans l'ordre, en un seul INSERT"""
+        rows = (
+            supabase.table("conversation_messages")
+            .insert(
+                [
+                    {
+                        "conversation_id": conversation_id,
+                        "role": message["role"],
+                        "content": message["content"],
+                    }
+                    for message in messages
+                ]
+            )
+            .execute()
+        ).data
+        return [_as_message(row) for row in sorted(rows, key=lambda r: r["seq"])]
+
+    def save_summary(
+        self, conversation_id: str, summary: str, summary_seq: int, previous_seq: int
+    ) -> bool:
+        """Enregistre le résumé si personne ne l'a avancé entre-temps"""
+        result = (
+            supabase.table("conversations")
+            .update({"summary": summary, "summary_seq": summary_seq})
+            .eq("id", conversation_id)
+            .eq("summary_seq", previous_seq)
+            .execute()
+        )
+        return bool(result.data)
+
+    def clear(self, conversation_id: str) -> int:
+        """Supprime les messages et le résumé ; retourne le nombre de messages supprimés"""
+        deleted = (
+            supabase.table("conversation_messages")
+            .delete()
+            .eq("conversation_id", conversation_id)
+            .execute()
+        ).data
+        supabase.table("conversations").update({"summary": None}).eq(
+            "id", conversation_id
+        ).execute()
+        return len(deleted or [])
+
+
+conversation_service = ConversationService()
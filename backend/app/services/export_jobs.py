@@ -0,0 +1,167 @@
+"""
+Export jobs - génération des exports en arrière-plan
+
+L'endpoint insère la ligne `exports` en 'pending' et rend la main.
+Le job fait passer la ligne par 'processing' -> 'completed' | 'failed' ;
+le rendu CPU-bound (reportlab / ebooklib) est délégué au pool de processus
+partagé (app.utils.cpu_pool) par ExportService.
+
+Les jobs vivent dans le processus : au démarrage, les lignes restées
+'pending' / 'processing' d'avant le redémarrage sont passées en 'failed'
+(l'utilisateur relance l'export) pour que le suivi ne tourne pas indéfiniment.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict
+
+from app.services.export_service import ExportService
+from app.utils.supabase import supabase
+
+# Format d'export -> méthode d'ExportService
+EXPORT_GENERATORS = {
+    "pdf_interior": "generate_pdf",
+    "epub": "generate_epub",
+    "full_kdp": "generate_kdp_package",
+}
+
+# Écart minimal (en %) entre deux mises à jour de progression en base
+PROGRESS_STEP = 5
+
+INTERRUPTED_MESSAGE = "Export interrompu par un redémarrage du serveur, relancez-le"
+
+
+def _update_export(export_id: str, data: dict) -> None:
+    supabase.table("exports").update(data).eq("id", export_id).execute()
+
+
+class _ProgressReporter:
+    """
+    Persiste la progression d'un export, en limitant le nombre d'écritures.
+    Picklable : il est transmis au processus de rendu qui l'appelle directement.
+    """
+
+    def __init__(self, export_id: str):
+        self.export_id = export_id
+        self.last = 0
+
+    def __call__(self, percent: int) -> None:
+        percent = max(0, min(percent, 99))
+        if percent - self.last < PROGRESS_STEP:
+            return
+        self.last = percent
+        try:
+            _update_export(self.export_id, {"progress": percent})
+        except Exception as e:
+            # La progression est indicative : ne jamais faire échouer l'export
+            print(f"⚠️ Progression export {self.export_id} non enregistrée: {e}")
+
+
+class ExportJobQueue:
+    """File d'attente des exports (tâches asyncio, rendu dans le pool CPU)"""
+
+    def __init__(self):
+        self.export_service = ExportService()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._booted_at = datetime.now(timezone.utc)
+        self._orphans_failed = 0
+
+    def enqueue(self, project_id: str, export_format: str) -> dict:
+        """Crée la ligne d'export en 'pending' et planifie sa génération"""
+        if export_format not in EXPORT_GENERATORS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        export_record = (
+            supabase.table("exports")
+            .insert(
+                {
+                    "project_id": project_id,
+                    "format": export_format,
+                    "status": "pending",
+                    "progress": 0,
+                }
+            )
+            .execute()
+        )
+        export = export_record.data[0]
+
+        task = asyncio.create_task(
+            self._run(export["id"], project_id, export_format)
+        )
+        self._tasks[export["id"]] = task
+        return export
+
+    async def _run(self, export_id: str, project_id: str, export_format: str) -> None:
+        try:
+            await asyncio.to_thread(
+                _update_export,
+                export_id,
+                {"status": "processing", "started_at": datetime.utcnow().isoformat()},
+            )
+            generator = getattr(self.export_service, EXPORT_GENERATORS[export_format])
+            result = await generator(
+                project_id, on_progress=_ProgressReporter(export_id)
+            )
+
+            completed = {
+                "status": "completed",
+                "progress": 100,
+                "completed_at": datetime.utcnow().isoformat(),
+            }
+            if isinstance(result, dict):
+                completed["config"] = result
+                completed["file_url"] = result.get("interior_pdf")
+            else:
+                completed["file_url"] = result
+            await asyncio.to_thread(_update_export, export_id, completed)
+
+        except Exception as e:
+            try:
+                await asyncio.to_thread(
+                    _update_export,
+                    export_id,
+                    {
+                        "status": "failed",
+                        "error_message": str(e),
+                        "completed_at": datetime.utcnow().isoformat(),
+                    },
+                )
+            except Exception as update_error:
+                print(f"❌ Export {export_id} en échec non enregistré: {update_error}")
+        finally:
+            self._tasks.pop(export_id, None)
+
+    def _fail_orphans(self) -> int:
+        """Clôt les exports en cours créés avant le démarrage de ce processus"""
+        result = (
+            supabase.table("exports")
+            .update(
+                {
+                    "status": "failed",
+                    "error_message": INTERRUPTED_MESSAGE,
+                    "completed_at": datetime.utcnow().isoformat(),
+                }
+            )
+            .in_("status", ["pending", "processing"])
+            .lt("created_at", self._booted_at.isoformat())
+            .execute()
+        )
+        return len(result.data or [])
+
+    async def recover(self) -> None:
+        """Au démarrage : aucun job d'avant le redémarrage ne reste en cours"""
+        try:
+            failed = await asyncio.to_thread(self._fail_orphans)
+            self._orphans_failed += failed
+            if failed:
+                print(f"⚠️ {failed} export(s) interrompu(s) par le redémarrage")
+        except Exception as e:
+            print(f"⚠️ Exports interrompus non clôturés: {e}")
+
+    def stats(self) -> dict:
+        return {"active_jobs": len(self._tasks), "orphans_failed": self._orphans_failed}
+
+
+export_jobs = ExportJobQueue()
@@ -4,12 +4,15 @@ Export service - PDF/EPUB generation
 
 from __future__ import annotations
 
+import asyncio
 import os
 import re
 import html
 from datetime import datetime
+from typing import Callable, Optional
 
 from app.config import settings
+from app.utils.cpu_pool import cpu_pool
 from app.utils.supabase import supabase
 
 from reportlab.lib.pagesizes import A4
@@ -47,131 +50,181 @@ class ExportService:
 
         return project.data[0], chapters.data or []
 
-    async def generate_pdf(self, project_id: str) -> str:
-        """
-        Generate PDF for a project
-        Returns: URL to generated file
-        """
-        project, chapters = self._get_project_data(project_id)
-
+    def _export_path(self, project: dict, extension: str) -> str:
         base_dir = settings.exports_local_dir
         self._ensure_dir(base_dir)
 
         title = project.get("title") or "Sans titre"
         stamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self._safe_filename(title)}_{stamp}.pdf"
-        file_path = os.path.join(base_dir, filename)
-
-        styles = getSampleStyleSheet()
-        story = []
-        story.append(Paragraph(title, styles["Title"]))
-        pitch = project.get("pitch")
-        if pitch:
-            story.append(Spacer(1, 0.5 * cm))
-            story.append(Paragraph(pitch, styles["BodyText"]))
-        story.append(PageBreak())
+        filename = f"{self._safe_filename(title)}_{stamp}.{extension}"
+        return os.path.join(base_dir, filename)
 
-        for ch in chapters:
-            ch_title = ch.get("title") or f"Chapitre {ch.get('number', '')}".strip()
-            story.append(Paragraph(ch_title, styles["Heading1"]))
-            content = (ch.get("content") or "").strip()
-            if not content:
-                content = "(Chapitre vide)"
-            for para in content.split("\n\n"):
-                story.append(Paragraph(para.replace("\n", "<br/>"), styles["BodyText"]))
-                story.append(Spacer(1, 0.4 * cm))
-            story.append(PageBreak())
-
-        doc = SimpleDocTemplate(
-            file_path,
-            pagesize=A4,
-            leftMargin=2 * cm,
-            rightMargin=2 * cm,
-            topMargin=2 * cm,
-            bottomMargin=2 * cm,
-        )
-        doc.build(story)
+    async def generate_pdf(
+        self, project_id: str, on_progress: Optional[Callable[[int], None]] = None
+    ) -> str:
+        """
+        Generate PDF for a project
+        Returns: URL to generated file
+        """
+        project, chapters = await asyncio.to_thread(self._get_project_data, project_id)
+        file_path = self._export_path(project, "pdf")
 
-        return file_path
+        # doc.build() est CPU-bound : exécuté dans le pool de processus
+        return await cpu_pool.run(render_pdf, project, chapters, file_path, on_progress)
 
-    async def generate_epub(self, project_id: str) -> str:
+    async def generate_epub(
+        self, project_id: str, on_progress: Optional[Callable[[int], None]] = None
+    ) -> str:
         """
         Generate EPUB for a project
         Returns: URL to generated file
         """
-        project, chapters = self._get_project_data(project_id)
+        project, chapters = await asyncio.to_thread(self._get_project_data, project_id)
+        file_path = self._export_path(project, "epub")
 
-        base_dir = settings.exports_local_dir
-        self._ensure_dir(base_dir)
-
-        title = project.get("title") or "Sans titre"
-        stamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self._safe_filename(title)}_{stamp}.epub"
-        file_path = os.path.join(base_dir, filename)
-
-        book = epub.EpubBook()
-        book.set_identifier(project_id)
-        book.set_title(title)
-        author = project.get("author") or project.get("author_name") or "Hakawa"
-        book.add_author(author)
-
-        # Basic style
-        style = "body{font-family: serif;} h1{margin-top:1em;}"
-        nav_css = epub.EpubItem(
-            uid="style_nav",
-            file_name="style/nav.css",
-            media_type="text/css",
-            content=style,
+        return await cpu_pool.run(
+            render_epub, project_id, project, chapters, file_path, on_progress
         )
-        book.add_item(nav_css)
-
-        spine = ["nav"]
-        toc = []
-
-        if project.get("pitch"):
-            intro = epub.EpubHtml(
-                title="Introduction", file_name="intro.xhtml", lang="fr"
-            )
-            intro.content = f"<h1>{title}</h1><p>{project.get('pitch')}</p>"
-            book.add_item(intro)
-            toc.append(intro)
-            spine.append(intro)
-
-        for ch in chapters:
-            number = ch.get("number")
-            ch_title = (
-                ch.get("title") or f"Chapitre {number}"
-                if number is not None
-                else "Chapitre"
-            )
-            file_name = f"chap_{number or 'x'}.xhtml"
-            chapter = epub.EpubHtml(title=ch_title, file_name=file_name, lang="fr")
-            content = (ch.get("content") or "").strip()
-            content_html = "".join(
-                "<p>" + html.escape(p).replace("\n", "<br/>") + "</p>"
-                for p in content.split("\n\n")
-                if p.strip()
-            )
-            if not content_html:
-                content_html = "<p>(Chapitre vide)</p>"
-            chapter.content = f"<h1>{ch_title}</h1>{content_html}"
-            book.add_item(chapter)
-            toc.append(chapter)
-            spine.append(chapter)
-
-        book.toc = tuple(toc)
-        book.add_item(epub.EpubNcx())
-        book.add_item(epub.EpubNav())
-        book.spine = spine
-
-        epub.write_epub(file_path, book, {})
-        return file_path
-
-    async def generate_kdp_package(self, project_id: str) -> dict:
+
+    async def generate_kdp_package(
+        self, project_id: str, on_progress: Optional[Callable[[int], None]] = None
+    ) -> dict:
         """
         Generate complete KDP package
         Returns: dict with interior_pdf and cover_pdf URLs
         """
         # Minimal implementation: generate interior PDF and return it.
-        interior_pdf = await self.generate_pdf(project_id)
+        interior_pdf = await self.generate_pdf(project_id, on_progress=on_progress)
         return {"interior_pdf": interior_pdf, "cover_pdf": None}
+
+
+# ═══════════════════════════════════════════════════════════════
+# RENDU (exécuté dans le pool de processus, arguments picklables)
+# ═══════════════════════════════════════════════════════════════
+
+def _pdf_progress_callback(on_progress: Callable[[int], None]):
+    """Adapt reportlab's build callback (SIZE_EST / PROGRESS) to a percentage"""
+    state = {"total": 1}
+
+    def callback(kind: str, value: int) -> None:
+        if kind == "SIZE_EST":
+            state["total"] = max(value or 1, 1)
+        elif kind == "PROGRESS":
+            on_progress(min(int(value * 100 / state["total"]), 100))
+
+    return callback
+
+
+def render_pdf(
+    project: dict,
+    chapters: list[dict],
+    file_path: str,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> str:
+    """Build the PDF file with reportlab and return its path"""
+    title = project.get("title") or "Sans titre"
+
+    styles = getSampleStyleSheet()
+    story = []
+    story.append(Paragraph(title, styles["Title"]))
+    pitch = project.get("pitch")
+    if pitch:
+        story.append(Spacer(1, 0.5 * cm))
+        story.append(Paragraph(pitch, styles["BodyText"]))
+    story.append(PageBreak())
+
+    for ch in chapters:
+        ch_title = ch.get("title") or f"Chapitre {ch.get('number', '')}".strip()
+        story.append(Paragraph(ch_title, styles["Heading1"]))
+        content = (ch.get("content") or "").strip()
+        if not content:
+            content = "(Chapitre vide)"
+        for para in content.split("\n\n"):
+            story.append(Paragraph(para.replace("\n", "<br/>"), styles["BodyText"]))
+            story.append(Spacer(1, 0.4 * cm))
+        story.append(PageBreak())
+
+    doc = SimpleDocTemplate(
+        file_path,
+        pagesize=A4,
+        leftMargin=2 * cm,
+        rightMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+    )
+    if on_progress:
+        doc.setProgressCallBack(_pdf_progress_callback(on_progress))
+    doc.build(story)
+
+    return file_path
+
+
+def render_epub(
+    project_id: str,
+    project: dict,
+    chapters: list[dict],
+    file_path: str,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> str:
+    """Build the EPUB file with ebooklib and return its path"""
+    title = project.get("title") or "Sans titre"
+
+    book = epub.EpubBook()
+    book.set_identifier(project_id)
+    book.set_title(title)
+    author = project.get("author") or project.get("author_name") or "Hakawa"
+    book.add_author(author)
+
+    # Basic style
+    style = "body{font-family: serif;} h1{margin-top:1em;}"
+    nav_css = epub.EpubItem(
+        uid="style_nav",
+        file_name="style/nav.css",
+        media_type="text/css",
+        content=style,
+    )
+    book.add_item(nav_css)
+
+    spine = ["nav"]
+    toc = []
+
+    if project.get("pitch"):
+        intro = epub.EpubHtml(title="Introduction", file_name="intro.xhtml", lang="fr")
+        intro.content = f"<h1>{title}</h1><p>{project.get('pitch')}</p>"
+        book.add_item(intro)
+        toc.append(intro)
+        spine.append(intro)
+
+    for index, ch in enumerate(chapters, 1):
+        number = ch.get("number")
+        ch_title = (
+            ch.get("title") or f"Chapitre {number}"
+            if number is not None
+            else "Chapitre"
+        )
+        file_name = f"chap_{number or 'x'}.xhtml"
+        chapter = epub.EpubHtml(title=ch_title, file_name=file_name, lang="fr")
+        content = (ch.get("content") or "").strip()
+        content_html = "".join(
+            "<p>" + html.escape(p).replace("\n", "<br/>") + "</p>"
+            for p in content.split("\n\n")
+            if p.strip()
+        )
+        if not content_html:
+            content_html = "<p>(Chapitre vide)</p>"
+        chapter.content = f"<h1>{ch_title}</h1>{content_html}"
+        book.add_item(chapter)
+        toc.append(chapter)
+        spine.append(chapter)
+        if on_progress:
+            on_progress(int(index * 90 / len(chapters)))
+
+    book.toc = tuple(toc)
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = spine
+
+    epub.write_epub(file_path, book, {})
+    if on_progress:
+        on_progress(100)
+    return file_path
@@ -0,0 +1,167 @@
+"""
+Illustration jobs - génération des images en arrière-plan
+
+L'endpoint insère la ligne `illustrations` en 'pending' et rend la main.
+Le job crée la prédiction Replicate ('processing', prediction_id enregistré),
+la suit par polling asynchrone, copie l'image en variantes WebP dans
+Supabase Storage, puis renseigne image_url / thumbnail_url ('completed')
+ou error_message ('failed').
+
+Au démarrage, les lignes d'avant le redémarrage encore en cours reprennent
+le suivi de leur prédiction (prediction_id) ; sans prédiction enregistrée,
+elles sont passées en 'failed' (relancer la génération).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict
+
+from app.models.schemas import IllustrationCreate
+from app.services.image_service import ImageService
+from app.utils.supabase import supabase
+
+
+INTERRUPTED_MESSAGE = "Génération interrompue par un redémarrage du serveur, relancez-la"
+
+
+def _update_illustration(illustration_id: str, data: dict) -> None:
+    supabase.table("illustrations").update(data).eq("id", illustration_id).execute()
+
+
+class IllustrationJobQueue:
+    """Suivi des prédictions Replicate en cours (tâches asyncio)"""
+
+    def __init__(self):
+        self.image_service = ImageService()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._booted_at = datetime.now(timezone.utc)
+        self._recovered = {"resumed": 0, "failed": 0}
+
+    def enqueue(self, project_id: str, illustration: IllustrationCreate) -> dict:
+        """Crée l'illustration en 'pending' et planifie sa génération"""
+        result = (
+            supabase.table("illustrations")
+            .insert(
+                {
+                    "project_id": project_id,
+                    "prompt": illustration.prompt,
+                    "negative_prompt": illustration.negative_prompt,
+                    "style": illustration.style.value,
+                    "position": illustration.position,
+                    "chapter_id": illustration.chapter_id,
+                    "status": "pending",
+                }
+            )
+            .execute()
+        )
+        row = result.data[0]
+
+        task = asyncio.create_task(self._run(row["id"], project_id, illustration))
+        self._tasks[row["id"]] = task
+        return row
+
+    async def _run(
+        self, illustration_id: str, project_id: str, illustration: IllustrationCreate
+    ) -> None:
+        try:
+            prediction = await self.image_service.start_prediction(
+                prompt=illustration.prompt,
+                style=illustration.style,
+                negative_prompt=illustration.negative_prompt,
+            )
+            await asyncio.to_thread(
+                _update_illustration,
+                illustration_id,
+                {"status": "processing", "prediction_id": prediction.id},
+            )
+            await self._complete(illustration_id, project_id, prediction.id)
+        except Exception as e:
+            await self._fail(illustration_id, str(e))
+        finally:
+            self._tasks.pop(illustration_id, None)
+
+    async def _resume(
+        self, illustration_id: str, project_id: str, prediction_id: str
+    ) -> None:
+        """Reprend le suivi d'une prédiction lancée avant un redémarrage"""
+        try:
+            await self._complete(illustration_id, project_id, prediction_id)
+        except Exception as e:
+            await self._fail(illustration_id, str(e))
+        finally:
+            self._tasks.pop(illustration_id, None)
+
+    async def _complete(
+        self, illustration_id: str, project_id: str, prediction_id: str
+    ) -> None:
+        image_url = await self.image_service.wait_for_image(prediction_id)
+
+        completed = {"status": "completed", "image_url": image_url}
+        try:
+            # Copie durable + miniatures WebP dans Supabase Storage
+            completed.update(
+                await self.image_service.mirror_to_storage(
+                    image_url, project_id, illustration_id
+                )
+            )
+        except Exception as e:
+            # L'URL Replicate reste utilisable à court terme
+            print(f"⚠️ Illustration {illustration_id} non copiée dans le storage: {e}")
+
+        completed["completed_at"] = datetime.utcnow().isoformat()
+        await asyncio.to_thread(_update_illustration, illustration_id, completed)
+
+    async def _fail(self, illustration_id: str, error_message: str) -> None:
+        try:
+            await asyncio.to_thread(
+                _update_illustration,
+                illustration_id,
+                {
+                    "status": "failed",
+                    "error_message": error_message,
+                    "completed_at": datetime.utcnow().isoformat(),
+                },
+            )
+        except Exception as update_error:
+            print(
+                f"❌ Illustration {illustration_id} en échec non enregistrée: {update_error}"
+            )
+
+    async def recover(self) -> None:
+        """
+        Au démarrage : reprend le suivi des prédictions en cours créées avant
+        ce processus, et clôt celles qui n'ont pas de prédiction enregistrée
+        (elle a pu être créée sans être tracée : ne pas la payer deux fois)
+        """
+        try:
+            rows = await asyncio.to_thread(
+                lambda: supabase.table("illustrations")
+                .select("id, project_id, prediction_id")
+                .in_("status", ["pending", "processing"])
+                .lt("created_at", self._booted_at.isoformat())
+                .execute()
+                .data
+            )
+        except Exception as e:
+            print(f"⚠️ Illustrations interrompues non reprises: {e}")
+            return
+
+        for row in rows or []:
+            if row["id"] in self._tasks:
+                continue
+            if row.get("prediction_id"):
+                self._tasks[row["id"]] = asyncio.create_task(
+                    self._resume(row["id"], row["project_id"], row["prediction_id"])
+                )
+                self._recovered["resumed"] += 1
+            else:
+                await self._fail(row["id"], INTERRUPTED_MESSAGE)
+                self._recovered["failed"] += 1
+
+    def stats(self) -> dict:
+        return {"active_jobs": len(self._tasks), **self._recovered}
+
+
+illustration_jobs = IllustrationJobQueue()
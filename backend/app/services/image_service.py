@@ -2,9 +2,21 @@
 Image generation service using Replicate
 """
 
+import asyncio
+import io
+
+import httpx
 import replicate
+from PIL import Image
+from replicate.prediction import Prediction
 from app.config import settings
 from app.models.schemas import ImageStyle, ImageGenerationResponse
+from app.utils.cpu_pool import cpu_pool
+from app.utils.supabase import supabase_admin
+
+# Variantes WebP générées pour chaque illustration (nom -> côté max en pixels)
+IMAGE_VARIANTS = {"thumb": 256, "medium": 640, "full": 1024}
+WEBP_QUALITY = 80
 
 
 class ImageService:
@@ -26,7 +38,21 @@ class ImageService:
         style: ImageStyle = ImageStyle.REALISTIC,
         negative_prompt: str = None,
     ) -> ImageGenerationResponse:
-        """Generate an image using Replicate"""
+        """Generate an image using Replicate (waits for the prediction)"""
+        try:
+            prediction = await self.start_prediction(prompt, style, negative_prompt)
+            image_url = await self.wait_for_image(prediction.id)
+            return ImageGenerationResponse(image_url=image_url, style=style)
+        except Exception as e:
+            raise Exception(f"Image generation failed: {str(e)}")
+
+    async def start_prediction(
+        self,
+        prompt: str,
+        style: ImageStyle = ImageStyle.REALISTIC,
+        negative_prompt: str = None,
+    ) -> Prediction:
+        """Create a Replicate prediction and return immediately"""
 
         # Get the model for this style
         model = self.models.get(style, self.models[ImageStyle.REALISTIC])
@@ -38,28 +64,103 @@ class ImageService:
         if not negative_prompt:
             negative_prompt = "ugly, blurry, low quality, distorted, deformed"
 
-        # Generate image
-        try:
-            output = self.client.run(
-                model,
-                input={
-                    "prompt": enhanced_prompt,
-                    "negative_prompt": negative_prompt,
-                    "width": 1024,
-                    "height": 1024,
-                    "num_outputs": 1,
+        model_input = {
+            "prompt": enhanced_prompt,
+            "negative_prompt": negative_prompt,
+            "width": 1024,
+            "height": 1024,
+            "num_outputs": 1,
+        }
+
+        # "owner/name:version" -> version précise, sinon dernière version du modèle
+        name, _, version = model.partition(":")
+        if version:
+            return await self.client.predictions.async_create(
+                version=version, input=model_input
+            )
+        owner, _, model_name = name.partition("/")
+        return await self.client.models.predictions.async_create(
+            model=(owner, model_name), input=model_input
+        )
+
+    async def wait_for_image(self, prediction_id: str) -> str:
+        """
+        Poll a prediction until it finishes (without blocking the event loop).
+        Returns the image URL.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.replicate_timeout_seconds
+
+        while True:
+            prediction = await self.client.predictions.async_get(prediction_id)
+            if prediction.status == "succeeded":
+                return self._image_url(prediction.output)
+            if prediction.status in ("failed", "canceled"):
+                raise Exception(prediction.error or f"Prediction {prediction.status}")
+            if loop.time() >= deadline:
+                await self.client.predictions.async_cancel(prediction_id)
+                raise Exception("Prediction timed out")
+            await asyncio.sleep(settings.replicate_poll_interval_seconds)
+
+    async def mirror_to_storage(
+        self, source_url: str, project_id: str, illustration_id: str
+    ) -> dict:
+        """
+        Download a generated image once, re-encode it to WebP variants and
+        upload them to Supabase Storage (Replicate URLs expire).
+        Returns the columns to store on the illustration.
+        """
+        async with httpx.AsyncClient(timeout=60.0) as http:
+            response = await http.get(source_url)
+            response.raise_for_status()
+
+        # Décodage / redimensionnement / encodage : CPU-bound
+        variants, width, height = await cpu_pool.run(
+            render_image_variants, response.content
+        )
+
+        bucket = supabase_admin.storage.from_(settings.illustrations_bucket)
+        prefix = f"{project_id}/{illustration_id}"
+        urls = {}
+        for name, data in variants.items():
+            path = f"{prefix}/{name}.webp"
+            await asyncio.to_thread(
+                bucket.upload,
+                path,
+                data,
+                {
+                    "content-type": "image/webp",
+                    "cache-control": "31536000",
+                    "x-upsert": "true",
                 },
             )
+            urls[name] = bucket.get_public_url(path)
 
-            # Get image URL (output format varies by model)
-            if isinstance(output, list):
-                image_url = output[0]
-            else:
-                image_url = str(output)
+        return {
+            "image_url": urls["full"],
+            "thumbnail_url": urls["thumb"],
+            "variants": urls,
+            "storage_path": prefix,
+            "width": width,
+            "height": height,
+        }
 
-            return ImageGenerationResponse(image_url=image_url, style=style)
-        except Exception as e:
-            raise Exception(f"Image generation failed: {str(e)}")
+    def remove_from_storage(self, illustration: dict) -> None:
+        """Delete the mirrored variants of an illustration, if any"""
+        prefix = illustration.get("storage_path")
+        if not prefix:
+            return
+        names = (illustration.get("variants") or IMAGE_VARIANTS).keys()
+        supabase_admin.storage.from_(settings.illustrations_bucket).remove(
+            [f"{prefix}/{name}.webp" for name in names]
+        )
+
+    @staticmethod
+    def _image_url(output) -> str:
+        # Get image URL (output format varies by model)
+        if isinstance(output, list):
+            return output[0]
+        return str(output)
 
     def _enhance_prompt(self, prompt: str, style: ImageStyle) -> str:
         """Enhance prompt based on style"""
@@ -73,3 +174,23 @@ class ImageService:
 
         prefix = style_prefixes.get(style, "")
         return f"{prefix}{prompt}"
+
+
+def render_image_variants(data: bytes) -> tuple:
+    """
+    Re-encode an image to WebP at each IMAGE_VARIANTS size
+    (executed in the process pool). Returns (variants, width, height).
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        width, height = image.size
+
+        variants = {}
+        for name, max_side in IMAGE_VARIANTS.items():
+            variant = image.copy()
+            variant.thumbnail((max_side, max_side), Image.LANCZOS)
+            buffer = io.BytesIO()
+            variant.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+            variants[name] = buffer.getvalue()
+
+    return variants, width, height
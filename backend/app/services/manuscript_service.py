@@ -0,0 +1,493 @@
+"""
+Manuscript service - analyse et amélioration de manuscrits complets
+
+Le texte est découpé en morceaux (frontières de chapitres puis de paragraphes),
+traités en parallèle sous un plafond de concurrence :
+- analyse : job en arrière-plan, map (notes par morceau) puis reduce
+  (rapport de synthèse), progression dans `manuscripts`
+- amélioration : job en arrière-plan, chaque morceau est réservé
+  ('processing') avant l'appel à Claude puis enregistré dans
+  `manuscript_chunks` (reprise possible), puis recousu dans l'ordre
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.ai_service import AIService
+from app.utils.db import or_filter
+from app.utils.supabase import supabase_admin
+
+# Ligne de titre de chapitre / partie (début de morceau obligatoire)
+_CHAPTER_HEADING = re.compile(
+    r"^\s*(chapitre|chapter|partie|part|prologue|épilogue|epilogue)\b",
+    re.IGNORECASE,
+)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+ANALYSIS_INSTRUCTIONS = {
+    "correction": """Tu es un correcteur professionnel. Analyse ce texte et identifie :
+- Fautes d'orthographe
+- Erreurs de grammaire
+- Problèmes de ponctuation
+- Incohérences""",
+    "enhancement": """Tu es un éditeur littéraire. Analyse ce texte et suggère des améliorations pour :
+- Style et fluidité
+- Vocabulaire et expressions
+- Rythme narratif
+- Descriptions et dialogues""",
+    "restructure": """Tu es un consultant éditorial. Analyse la structure de ce texte :
+- Organisation des chapitres
+- Progression narrative
+- Équilibre des parties
+- Suggestions de découpage""",
+}
+
+REDUCE_INSTRUCTIONS = {
+    "correction": "Fournis un résumé des erreurs trouvées et des suggestions de correction.",
+    "enhancement": "Fournis des suggestions concrètes d'amélioration.",
+    "restructure": "Propose une meilleure structure avec chapitres suggérés.",
+}
+
+# Statuts dont la progression est celle de l'analyse
+ANALYSIS_STATUSES = ("pending", "analyzing", "analyzed", "error")
+
+IMPROVEMENT_INSTRUCTIONS = {
+    "correction": "Corrige toutes les fautes d'orthographe, de grammaire et de ponctuation dans ce texte. Ne change pas le style ni le contenu, juste corrige les erreurs.",
+    "enhancement": "Améliore le style de ce texte en gardant le même contenu et la même structure. Rends-le plus fluide, plus élégant, avec un meilleur vocabulaire.",
+}
+
+
+def _split_long_paragraph(paragraph: str, max_chars: int) -> List[str]:
+    """Découpe un paragraphe trop long sur les fins de phrases"""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > max_chars:
+            # Phrase démesurée : coupure franche
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Découpe un manuscrit en morceaux d'au plus `max_chars` caractères.
+    Un titre de chapitre commence toujours un nouveau morceau ; les morceaux
+    sont remplis paragraphe par paragraphe (recousus par une ligne vide).
+    """
+    max_chars = max_chars or settings.manuscript_chunk_chars
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append("\n\n".join(current))
+        current, size = [], 0
+
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if _CHAPTER_HEADING.match(paragraph):
+            flush()
+        for piece in (
+            _split_long_paragraph(paragraph, max_chars)
+            if len(paragraph) > max_chars
+            else [paragraph]
+        ):
+            if size and size + 2 + len(piece) > max_chars:
+                flush()
+            current.append(piece)
+            size += len(piece) + (2 if size else 0)
+    flush()
+    return chunks
+
+
+def _update_manuscript(manuscript_id: str, data: dict) -> None:
+    # Écrit par les jobs, hors requête : client service (l'API vérifie la propriété)
+    supabase_admin.table("manuscripts").update(data).eq("id", manuscript_id).execute()
+
+
+class ManuscriptService:
+    """Traitement par morceaux (concurrence bornée) des manuscrits"""
+
+    def __init__(self):
+        self.ai_service = AIService()
+        self._tasks: Dict[str, Optional[asyncio.Task]] = {}
+
+    async def _map_chunks(
+        self,
+        manuscript_id: str,
+        chunks: List[str],
+        process: Callable[[int, str], Awaitable[str]],
+    ) -> List[str]:
+        """
+        Applique `process` à chaque morceau, au plus
+        settings.manuscript_max_concurrency à la fois, en persistant la
+        progression après chaque morceau. Les résultats sont dans l'ordre.
+        """
+        slots = asyncio.Semaphore(settings.manuscript_max_concurrency)
+        done = 0
+
+        async def run(index: int, chunk: str) -> str:
+            nonlocal done
+            async with slots:
+                result = await process(index, chunk)
+            done += 1
+            try:
+                await asyncio.to_thread(
+                    _update_manuscript,
+                    manuscript_id,
+                    {
+                        "chunks_done": done,
+                        "progress": int(done * 100 / len(chunks)),
+                    },
+                )
+            except Exception as e:
+                # La progression est indicative : ne jamais faire échouer le traitement
+                print(f"⚠️ Progression manuscrit {manuscript_id} non enregistrée: {e}")
+            return result
+
+        await asyncio.to_thread(
+            _update_manuscript,
+            manuscript_id,
+            {"chunks_total": len(chunks), "chunks_done": 0, "progress": 0},
+        )
+        return list(
+            await asyncio.gather(*(run(i, c) for i, c in enumerate(chunks)))
+        )
+
+    async def analyze(self, manuscript: dict) -> str:
+        """Analyse complète : notes par morceau (map) puis synthèse (reduce)"""
+        improvement_type = manuscript["improvement_type"]
+        instructions = ANALYSIS_INSTRUCTIONS.get(
+            improvement_type, ANALYSIS_INSTRUCTIONS["restructure"]
+        )
+        reduce_instruction = REDUCE_INSTRUCTIONS.get(
+            improvement_type, REDUCE_INSTRUCTIONS["restructure"]
+        )
+        chunks = split_into_chunks(manuscript["original_text"])
+
+        async def analyze_chunk(index: int, chunk: str) -> str:
+            prompt = f"""{instructions}
+
+Extrait {index + 1}/{len(chunks)} du manuscrit :
+{chunk}
+
+{reduce_instruction if len(chunks) == 1 else "Liste de façon concise les points relevés dans cet extrait."}"""
+            result = await self.ai_service.generate_text(prompt, max_tokens=1000)
+            return result.text
+
+        notes = await self._map_chunks(manuscript["id"], chunks, analyze_chunk)
+        if len(notes) == 1:
+            return notes[0]
+
+        notes_text = "\n\n".join(
+            f"--- Extrait {i} ---\n{note}" for i, note in enumerate(notes, 1)
+        )
+        prompt = f"""{instructions}
+
+Le manuscrit complet a été analysé extrait par extrait. Voici les notes :
+{notes_text}
+
+Synthétise ces notes en une analyse globale du manuscrit, sans répétitions.
+{reduce_instruction}"""
+        result = await self.ai_service.generate_text(prompt, max_tokens=2000)
+        return result.text
+
+    async def start_analysis(self, manuscript: dict) -> None:
+        """Lance l'analyse en arrière-plan (suivi : chunks_done / progress)"""
+        manuscript_id = manuscript["id"]
+        # Réservé avant tout await : deux requêtes simultanées ne lancent qu'un job
+        self._tasks[manuscript_id] = None
+        try:
+            await asyncio.to_thread(
+                _update_manuscript,
+                manuscript_id,
+                {
+                    "status": "analyzing",
+                    "chunks_total": 0,
+                    "chunks_done": 0,
+                    "progress": 0,
+                },
+            )
+        except Exception:
+            self._tasks.pop(manuscript_id, None)
+            raise
+
+        self._tasks[manuscript_id] = asyncio.create_task(
+            self._run_analysis(manuscript)
+        )
+
+    async def _run_analysis(self, manuscript: dict) -> None:
+        manuscript_id = manuscript["id"]
+        try:
+            analysis = await self.analyze(manuscript)
+            await asyncio.to_thread(
+                _update_manuscript,
+                manuscript_id,
+                {
+                    "analysis": analysis,
+                    "status": "analyzed",
+                    "progress": 100,
+                    "analyzed_at": datetime.utcnow().isoformat(),
+                },
+            )
+        except Exception as e:
+            print(f"❌ Analyse du manuscrit {manuscript_id} interrompue: {e}")
+            try:
+                await asyncio.to_thread(
+                    _update_manuscript, manuscript_id, {"status": "error"}
+                )
+            except Exception:
+                pass
+        finally:
+            self._tasks.pop(manuscript_id, None)
+
+    # ───────────────────────────────────────────────────────────
+    # Amélioration : job reprenable, un point de reprise par morceau
+    # Les morceaux sont lus et écrits avec le client service : le job tourne
+    # hors requête (pas de session utilisateur) et l'API a déjà vérifié que
+    # le manuscrit appartient à l'utilisateur.
+    # ───────────────────────────────────────────────────────────
+
+    def _load_chunks(self, manuscript_id: str, columns: str) -> List[dict]:
+        result = (
+            supabase_admin.table("manuscript_chunks")
+            .select(columns)
+            .eq("manuscript_id", manuscript_id)
+            .order("chunk_index")
+            .execute()
+        )
+        return result.data or []
+
+    def _ensure_chunks(self, manuscript: dict) -> List[dict]:
+        """Découpe le manuscrit en morceaux persistés (une seule fois)"""
+        chunks = self._load_chunks(manuscript["id"], "id, chunk_index, status")
+        if chunks:
+            return chunks
+
+        rows = [
+            {
+                "manuscript_id": manuscript["id"],
+                "chunk_index": index,
+                "original_text": text,
+                "status": "pending",
+            }
+            for index, text in enumerate(split_into_chunks(manuscript["original_text"]))
+        ]
+        result = supabase_admin.table("manuscript_chunks").insert(rows).execute()
+        return [
+            {"id": row["id"], "chunk_index": row["chunk_index"], "status": row["status"]}
+            for row in result.data or []
+        ]
+
+    def _claim_chunk(self, chunk_id: str) -> bool:
+        """
+        Réserve un morceau à traiter : en attente, en échec, ou réservé
+        depuis plus de manuscript_chunk_claim_timeout_seconds (instance
+        redémarrée). UPDATE conditionnel : un seul job obtient le morceau.
+        """
+        stale = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.manuscript_chunk_claim_timeout_seconds
+        )
+        query = (
+            supabase_admin.table("manuscript_chunks")
+            .update({"status": "processing"})
+            .eq("id", chunk_id)
+        )
+        result = or_filter(
+            query,
+            "status.in.(pending,failed),"
+            f'and(status.eq.processing,updated_at.lt."{stale.isoformat()}")',
+        ).execute()
+        return bool(result.data)
+
+    def is_running(self, manuscript_id: str) -> bool:
+        """Analyse ou amélioration en cours pour ce manuscrit"""
+        return manuscript_id in self._tasks
+
+    def progress(self, manuscript: dict) -> dict:
+        """
+        Morceaux terminés / en échec / total du traitement en cours :
+        compteurs du manuscrit pendant l'analyse, `manuscript_chunks`
+        pour l'amélioration
+        """
+        if manuscript["status"] in ANALYSIS_STATUSES:
+            return {
+                "chunks_total": manuscript.get("chunks_total") or 0,
+                "chunks_done": manuscript.get("chunks_done") or 0,
+                "chunks_failed": 0,
+                "progress": manuscript.get("progress") or 0,
+                "errors": [],
+            }
+        manuscript_id = manuscript["id"]
+        chunks = self._load_chunks(manuscript_id, "chunk_index, status, error_message")
+        done = sum(1 for c in chunks if c["status"] == "completed")
+        failed = [c for c in chunks if c["status"] == "failed"]
+        return {
+            "chunks_total": len(chunks),
+            "chunks_done": done,
+            "chunks_failed": len(failed),
+            "progress": int(done * 100 / len(chunks)) if chunks else 0,
+            "errors": [
+                {"chunk_index": c["chunk_index"], "error": c["error_message"]}
+                for c in failed
+            ],
+        }
+
+    async def start_improvement(self, manuscript: dict) -> dict:
+        """
+        Lance (ou reprend) l'amélioration en arrière-plan.
+        Seuls les morceaux non terminés sont (re)traités.
+        """
+        manuscript_id = manuscript["id"]
+        # Réservé avant tout await : deux requêtes simultanées ne lancent qu'un job
+        self._tasks[manuscript_id] = None
+        try:
+            chunks = await asyncio.to_thread(self._ensure_chunks, manuscript)
+            done = sum(1 for c in chunks if c["status"] == "completed")
+            await asyncio.to_thread(
+                _update_manuscript,
+                manuscript_id,
+                {
+                    "status": "improving",
+                    "chunks_total": len(chunks),
+                    "chunks_done": done,
+                    "progress": int(done * 100 / len(chunks)) if chunks else 0,
+                },
+            )
+        except Exception:
+            self._tasks.pop(manuscript_id, None)
+            raise
+
+        self._tasks[manuscript_id] = asyncio.create_task(
+            self._run_improvement(manuscript)
+        )
+        return {"chunks_total": len(chunks), "chunks_done": done}
+
+    async def _run_improvement(self, manuscript: dict) -> None:
+        manuscript_id = manuscript["id"]
+        instruction = IMPROVEMENT_INSTRUCTIONS.get(
+            manuscript["improvement_type"], IMPROVEMENT_INSTRUCTIONS["enhancement"]
+        )
+        try:
+            chunks = await asyncio.to_thread(
+                self._load_chunks,
+                manuscript_id,
+                "id, chunk_index, status, original_text, attempts",
+            )
+            total = len(chunks)
+            done = sum(1 for c in chunks if c["status"] == "completed")
+            slots = asyncio.Semaphore(settings.manuscript_max_concurrency)
+
+            async def improve_chunk(chunk: dict) -> None:
+                nonlocal done
+                async with slots:
+                    # Déjà réservé par un autre job (autre instance, ou job
+                    # précédent toujours en cours) : ne pas le payer deux fois
+                    if not await asyncio.to_thread(self._claim_chunk, chunk["id"]):
+                        return
+                    try:
+                        prompt = f"""{instruction}
+Réponds uniquement avec le texte, sans commentaire.
+
+Texte original :
+{chunk["original_text"]}
+
+Texte amélioré :"""
+                        result = await self.ai_service.generate_text(
+                            prompt, max_tokens=4000
+                        )
+                        update = {
+                            "improved_text": result.text.strip(),
+                            "status": "completed",
+                            "error_message": None,
+                        }
+                    except Exception as e:
+                        update = {"status": "failed", "error_message": str(e)}
+                    update["attempts"] = (chunk.get("attempts") or 0) + 1
+
+                # Point de reprise : le morceau est enregistré dès qu'il est traité
+                await asyncio.to_thread(
+                    lambda: supabase_admin.table("manuscript_chunks")
+                    .update(update)
+                    .eq("id", chunk["id"])
+                    .execute()
+                )
+                if update["status"] == "completed":
+                    done += 1
+                    await asyncio.to_thread(
+                        _update_manuscript,
+                        manuscript_id,
+                        {"chunks_done": done, "progress": int(done * 100 / total)},
+                    )
+
+            await asyncio.gather(
+                *(improve_chunk(c) for c in chunks if c["status"] != "completed")
+            )
+
+            # État réel en base : d'autres jobs ont pu traiter certains morceaux
+            statuses = [
+                c["status"]
+                for c in await asyncio.to_thread(
+                    self._load_chunks, manuscript_id, "status"
+                )
+            ]
+            if "processing" in statuses:
+                # Un autre job détient encore des morceaux : il terminera
+                return
+            if any(status != "completed" for status in statuses):
+                await asyncio.to_thread(
+                    _update_manuscript, manuscript_id, {"status": "improve_error"}
+                )
+                return
+
+            # Tous les morceaux sont terminés : recoudre dans l'ordre
+            improved = await asyncio.to_thread(
+                self._load_chunks, manuscript_id, "improved_text"
+            )
+            await asyncio.to_thread(
+                _update_manuscript,
+                manuscript_id,
+                {
+                    "improved_text": "\n\n".join(c["improved_text"] for c in improved),
+                    "status": "improved",
+                    "progress": 100,
+                    "improved_at": datetime.utcnow().isoformat(),
+                },
+            )
+
+        except Exception as e:
+            print(f"❌ Amélioration du manuscrit {manuscript_id} interrompue: {e}")
+            try:
+                await asyncio.to_thread(
+                    _update_manuscript, manuscript_id, {"status": "improve_error"}
+                )
+            except Exception:
+                pass
+        finally:
+            self._tasks.pop(manuscript_id, None)
+
+    def stats(self) -> dict:
+        return {"active_jobs": len(self._tasks)}
+
+
+manuscript_service = ManuscriptService()
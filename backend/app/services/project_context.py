@@ -0,0 +1,48 @@
+"""
+Project context - bloc « CONTEXTE DU LIVRE » des prompts
+
+Le même bloc de métadonnées (titre, pitch, genre, style, public, thèmes)
+sert au chat créatif, au plan et à l'écriture des chapitres, avec un seul
+rendu. Les appelants ont déjà chargé la ligne projet (contrôle d'accès) et
+rendent le bloc depuis celle-ci ; la lecture par project_id seul ne charge
+que les colonnes utiles.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from app.utils.supabase import supabase
+
+BOOK_FIELDS = "id, title, pitch, genre, style, target_audience, themes"
+
+
+def render_book_context(project: dict) -> str:
+    """Bloc de métadonnées du livre (sans consigne de rôle)"""
+    themes = project.get("themes")
+    return f"""📖 CONTEXTE DU LIVRE :
+- Titre : {project.get('title') or 'Sans titre'}
+- Pitch : {project.get('pitch') or 'Non défini'}
+- Genre : {project.get('genre') or 'Non défini'}
+- Style : {project.get('style') or 'roman'}
+- Public : {project.get('target_audience') or 'adult'}
+- Thèmes : {', '.join(themes) if themes else 'Non définis'}
+"""
+
+
+def book_context(
+    project: Optional[dict] = None, project_id: Optional[str] = None
+) -> str:
+    """
+    Bloc du projet : rendu depuis `project` quand la ligne vient d'être
+    chargée, sinon lu en base (colonnes utiles uniquement)
+    """
+    if project is not None:
+        return render_book_context(project)
+    if not project_id:
+        return ""
+
+    result = (
+        supabase.table("projects").select(BOOK_FIELDS).eq("id", project_id).execute()
+    )
+    return render_book_context(result.data[0]) if result.data else ""
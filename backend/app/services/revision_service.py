@@ -0,0 +1,237 @@
+"""
+Revision service - historique compressé du contenu des chapitres
+
+Chaque écriture du contenu ajoute une révision `chapter_revisions` pour la
+nouvelle version du chapitre :
+- delta : opérations de plage depuis la version précédente (taille ≈ édition)
+- snapshot : texte complet, quand la chaîne de deltas depuis le dernier
+  snapshot pèse autant que le texte ou atteint `chapter_revision_max_chain`
+
+Reconstruire une version = dernier snapshot <= version + au plus
+`chapter_revision_max_chain` deltas.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.utils.supabase import supabase
+from app.utils.text_patch import apply_text_ops, diff_text
+
+
+def _pack(data: str) -> str:
+    return base64.b64encode(zlib.compress(data.encode("utf-8"), 9)).decode("ascii")
+
+
+def _unpack(payload: str) -> str:
+    return zlib.decompress(base64.b64decode(payload)).decode("utf-8")
+
+
+class RevisionService:
+    """Enregistrement et reconstruction des révisions de chapitres"""
+
+    def __init__(self):
+        self.max_chain = settings.chapter_revision_max_chain
+        self._counts = {"snapshots": 0, "deltas": 0, "failures": 0}
+
+    def _row(
+        self,
+        chapter_id: str,
+        version: int,
+        kind: str,
+        payload: str,
+        content_length: int,
+        word_count: int,
+    ) -> dict:
+        return {
+            "chapter_id": chapter_id,
+            "version": version,
+            "kind": kind,
+            "payload": payload,
+            "payload_size": len(payload),
+            "content_length": content_length,
+            "word_count": word_count,
+        }
+
+    def _content_at(self, chapter_id: str, version: int) -> Optional[str]:
+        """Contenu du chapitre s'il est encore à `version` (snapshot après un PATCH)"""
+        result = (
+            supabase.table("chapters")
+            .select("content")
+            .eq("id", chapter_id)
+            .eq("version", version)
+            .execute()
+        )
+        return (result.data[0]["content"] or "") if result.data else None
+
+    def _plan(
+        self,
+        chapter_id: str,
+        version: int,
+        before: Optional[str],
+        after: Optional[str],
+        word_count: int,
+        ops: Optional[Sequence[Tuple[int, int, str]]] = None,
+        content_length: Optional[int] = None,
+    ) -> List[dict]:
+        """Révision(s) à insérer pour passer de version - 1 à version"""
+        recent = (
+            supabase.table("chapter_revisions")
+            .select("version, kind, payload_size")
+            .eq("chapter_id", chapter_id)
+            .lte("version", version)
+            .order("version", desc=True)
+            .limit(self.max_chain)
+            .execute()
+        ).data
+
+        def snapshot() -> List[dict]:
+            # Contenu relu en base s'il n'est pas fourni (PATCH) ; si le
+            # chapitre a déjà changé, l'écriture suivante repartira d'un snapshot
+            content = after
+            if content is None:
+                content = self._content_at(chapter_id, version)
+            if content is None:
+                return []
+            return [
+                self._row(
+                    chapter_id,
+                    version,
+                    "snapshot",
+                    _pack(content),
+                    len(content),
+                    word_count,
+                )
+            ]
+
+        known_base = ops is not None or before is not None
+        if not known_base or not recent or recent[0]["version"] != version - 1:
+            # Pas de base connue : on repart d'un snapshot, précédé de
+            # l'ancienne version si elle n'est pas encore historisée
+            if before is None or version == 0 or (
+                recent and recent[0]["version"] >= version - 1
+            ):
+                return snapshot()
+            previous = self._row(
+                chapter_id,
+                version - 1,
+                "snapshot",
+                _pack(before),
+                len(before),
+                len(before.split()),
+            )
+            return [previous, *snapshot()]
+
+        # Opérations du patch quand elles sont connues, sinon une seule plage
+        delta_ops = list(ops) if ops is not None else diff_text(before, after)
+        delta = _pack(json.dumps(delta_ops, ensure_ascii=False))
+        chain_size = len(delta)
+        for row in recent:
+            if row["kind"] == "snapshot":
+                if chain_size < row["payload_size"]:
+                    return [
+                        self._row(
+                            chapter_id,
+                            version,
+                            "delta",
+                            delta,
+                            content_length if after is None else len(after),
+                            word_count,
+                        )
+                    ]
+                break
+            chain_size += row["payload_size"]
+        # Chaîne trop longue ou plus lourde que le texte
+        return snapshot()
+
+    def record(
+        self,
+        chapter_id: str,
+        version: int,
+        before: Optional[str],
+        after: Optional[str],
+        word_count: int,
+        ops: Optional[Sequence[Tuple[int, int, str]]] = None,
+        content_length: Optional[int] = None,
+    ) -> None:
+        """
+        Historise la version `version` (contenu `after`) d'un chapitre
+
+        `before` est le contenu de la version précédente, ou None s'il est
+        inconnu (écriture concurrente) : un snapshot est alors enregistré.
+        `ops` (start, end, text), si fourni, transforme la version précédente
+        en `version` et sert de delta sans diff ; `after` peut alors être
+        None (PATCH appliqué en base, `content_length` requis) : le contenu
+        n'est relu que si un snapshot est nécessaire.
+        Un échec n'interrompt jamais la sauvegarde du chapitre.
+        """
+        try:
+            rows = self._plan(
+                chapter_id,
+                version,
+                before,
+                after,
+                word_count,
+                ops,
+                content_length,
+            )
+            if not rows:
+                return
+            supabase.table("chapter_revisions").upsert(
+                rows, on_conflict="chapter_id,version", ignore_duplicates=True
+            ).execute()
+            for row in rows:
+                self._counts["snapshots" if row["kind"] == "snapshot" else "deltas"] += 1
+        except Exception as e:
+            self._counts["failures"] += 1
+            print(f"⚠️ Révision {version} du chapitre {chapter_id} non enregistrée: {e}")
+
+    def rebuild(self, chapter_id: str, version: int) -> Optional[Tuple[str, int]]:
+        """Contenu et nombre de mots d'une version, ou None si elle n'existe plus"""
+        base = (
+            supabase.table("chapter_revisions")
+            .select("version")
+            .eq("chapter_id", chapter_id)
+            .eq("kind", "snapshot")
+            .lte("version", version)
+            .order("version", desc=True)
+            .limit(1)
+            .execute()
+        ).data
+        if not base:
+            return None
+
+        rows = (
+            supabase.table("chapter_revisions")
+            .select("version, kind, payload, word_count")
+            .eq("chapter_id", chapter_id)
+            .gte("version", base[0]["version"])
+            .lte("version", version)
+            .order("version")
+            .execute()
+        ).data
+        if not rows or rows[-1]["version"] != version:
+            return None
+
+        content = ""
+        expected = rows[0]["version"]
+        for row in rows:
+            if row["version"] != expected:
+                return None  # chaîne incomplète
+            expected += 1
+            if row["kind"] == "snapshot":
+                content = _unpack(row["payload"])
+            else:
+                ops = json.loads(_unpack(row["payload"]))
+                content, _ = apply_text_ops(content, 0, ops)
+        return content, rows[-1]["word_count"]
+
+    def stats(self) -> dict:
+        return {"max_chain": self.max_chain, **self._counts}
+
+
+revision_service = RevisionService()
@@ -6,6 +6,7 @@ from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from app.config import settings
 from app.utils.supabase import supabase
+from app.utils.admin import invalidate_user_profile
 
 # Configuration Stripe
 stripe.api_key = settings.stripe_secret_key
@@ -289,6 +290,7 @@ class StripeService:
                     "updated_at": datetime.now().isoformat(),
                 }
             ).eq("id", user_id).execute()
+            invalidate_user_profile(user_id)
 
             # Log de l'événement
             print(f"✅ Abonnement activé pour {user_id}: {tier}")
@@ -339,6 +341,7 @@ class StripeService:
                     "updated_at": datetime.now().isoformat(),
                 }
             ).eq("id", user_id).execute()
+            invalidate_user_profile(user_id)
 
             print(f"✅ Abonnement mis à jour pour {user_id}: {tier}")
 
@@ -384,6 +387,7 @@ class StripeService:
                     "updated_at": datetime.now().isoformat(),
                 }
             ).eq("id", user_id).execute()
+            invalidate_user_profile(user_id)
 
             print(f"✅ Abonnement annulé pour {user_id}, retour au plan gratuit")
 
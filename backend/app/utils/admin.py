@@ -4,8 +4,97 @@ Middleware et utilitaires pour la gestion des administrateurs
 
 from fastapi import HTTPException, Header, Depends
 from typing import Optional
+from types import SimpleNamespace
+from contextvars import ContextVar, Token
+import hashlib
+import time
+from jose import jwt
+from app.config import settings
+from app.utils.cache import TTLCache
 from app.utils.supabase import supabase, supabase_admin
 
+# Cache token (hash SHA-256) -> utilisateur, et user_id -> profil
+_user_cache = TTLCache(
+    maxsize=settings.auth_cache_max_entries, ttl=settings.auth_cache_ttl_seconds
+)
+_profile_cache = TTLCache(
+    maxsize=settings.auth_cache_max_entries, ttl=settings.auth_cache_ttl_seconds
+)
+
+
+# Projets déjà chargés et autorisés pendant la requête courante (project_id -> row)
+_request_projects: ContextVar[Optional[dict]] = ContextVar(
+    "request_projects", default=None
+)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _token_cache_ttl(token: str) -> float:
+    """TTL du cache, sans jamais dépasser l'expiration du JWT"""
+    ttl = settings.auth_cache_ttl_seconds
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+        if exp:
+            ttl = min(ttl, exp - time.time())
+    except Exception:
+        pass
+    return ttl
+
+
+def _verify_token_locally(token: str):
+    """Vérifie la signature du JWT avec le secret Supabase (sans appel réseau)"""
+    claims = jwt.decode(
+        token,
+        settings.supabase_jwt_secret,
+        algorithms=["HS256"],
+        audience="authenticated",
+    )
+    return SimpleNamespace(
+        id=claims["sub"],
+        email=claims.get("email"),
+        role=claims.get("role"),
+        app_metadata=claims.get("app_metadata", {}),
+        user_metadata=claims.get("user_metadata", {}),
+    )
+
+
+def invalidate_user_profile(user_id: str) -> None:
+    """
+    Invalide le profil mis en cache d'un utilisateur.
+    À appeler après toute écriture sur sa ligne `profiles`.
+    """
+    if user_id:
+        _profile_cache.delete(user_id)
+
+
+def peek_authenticated_user_id(authorization: Optional[str]) -> Optional[str]:
+    """
+    Identifiant de l'utilisateur d'un header Authorization, sans appel réseau :
+    token déjà vérifié (cache) ou signature vérifiée localement.
+    Retourne None si l'utilisateur ne peut pas être établi de façon sûre.
+    """
+    if not authorization:
+        return None
+    token = authorization.replace("Bearer ", "")
+
+    user = _user_cache.get(_token_key(token))
+    if user is not None:
+        return user.id
+
+    if settings.supabase_jwt_secret:
+        try:
+            return _verify_token_locally(token).id
+        except Exception:
+            return None
+    return None
+
+
+def auth_cache_stats() -> dict:
+    return {"users": _user_cache.stats(), "profiles": _profile_cache.stats()}
+
 
 async def get_current_user(authorization: Optional[str] = Header(None)):
     """
@@ -14,28 +103,48 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     if not authorization:
         raise HTTPException(status_code=401, detail="Token d'authentification manquant")
 
-    try:
-        # Extraire le token du header "Bearer {token}"
-        token = authorization.replace("Bearer ", "")
+    # Extraire le token du header "Bearer {token}"
+    token = authorization.replace("Bearer ", "")
+    cache_key = _token_key(token)
+
+    user = _user_cache.get(cache_key)
+    if user is not None:
+        return user
 
-        # Vérifier le token avec Supabase (utiliser admin client pour valider JWT)
-        user_response = supabase_admin.auth.get_user(token)
+    try:
+        if settings.supabase_jwt_secret:
+            user = _verify_token_locally(token)
+        else:
+            # Vérifier le token avec Supabase (utiliser admin client pour valider JWT)
+            user_response = supabase_admin.auth.get_user(token)
 
-        if not user_response or not user_response.user:
-            raise HTTPException(status_code=401, detail="Token invalide")
+            if not user_response or not user_response.user:
+                raise HTTPException(status_code=401, detail="Token invalide")
 
-        return user_response.user
+            user = user_response.user
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=401, detail=f"Authentification échouée: {str(e)}"
         )
 
+    ttl = _token_cache_ttl(token)
+    if ttl > 0:
+        _user_cache.set(cache_key, user, ttl=ttl)
+    return user
+
 
 async def get_user_profile(user=Depends(get_current_user)):
     """
     Récupère le profil complet de l'utilisateur depuis la table profiles
     """
+    cached = _profile_cache.get(user.id)
+    if cached is not None:
+        # Copie : un handler qui modifie le dict ne doit pas altérer le cache
+        return dict(cached)
+
     try:
         profile_response = (
             supabase.table("profiles").select("*").eq("id", user.id).execute()
@@ -46,7 +155,9 @@ async def get_user_profile(user=Depends(get_current_user)):
                 status_code=404, detail="Profil utilisateur introuvable"
             )
 
-        return profile_response.data[0]
+        profile = profile_response.data[0]
+        _profile_cache.set(user.id, profile)
+        return dict(profile)
 
     except HTTPException:
         raise
@@ -88,62 +199,89 @@ def is_admin_user(profile: dict) -> bool:
     return profile.get("is_admin", False) == True
 
 
-def assert_project_access(profile: dict, project_id: str) -> None:
-    """Ensure the authenticated user can access a project."""
-    try:
-        query = supabase.table("projects").select("id,user_id").eq("id", project_id)
-        if not is_admin_user(profile):
-            query = query.eq("user_id", profile.get("id"))
+def begin_request_scope() -> Token:
+    """Ouvre le mémo des projets chargés pendant la requête courante"""
+    return _request_projects.set({})
+
 
-        result = query.execute()
+def end_request_scope(token: Token) -> None:
+    _request_projects.reset(token)
+
+
+def _remember_project(project: dict) -> dict:
+    memo = _request_projects.get()
+    if memo is not None:
+        memo[project["id"]] = project
+    return project
+
+
+def _owned(query, profile: dict, column: str = "user_id"):
+    """Restreint une requête aux projets de l'utilisateur (sauf admin)"""
+    if not is_admin_user(profile):
+        query = query.eq(column, profile.get("id"))
+    return query
+
+
+def assert_project_access(profile: dict, project_id: str) -> dict:
+    """
+    Ensure the authenticated user can access a project and return its row.
+    The row is loaded at most once per request.
+    """
+    memo = _request_projects.get()
+    if memo is not None and project_id in memo:
+        return memo[project_id]
+
+    try:
+        query = supabase.table("projects").select("*").eq("id", project_id)
+        result = _owned(query, profile).execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Project not found")
+        return _remember_project(result.data[0])
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Project access check failed: {e}")
 
 
-def assert_illustration_access(profile: dict, illustration_id: str) -> dict:
-    """Ensure the user can access an illustration and return it."""
+def _assert_child_access(profile: dict, table: str, row_id: str, label: str) -> dict:
+    """
+    Load a row of a project-owned table joined with its project (one query),
+    authorize it and return it; the project row is remembered for the request.
+    """
     try:
-        illustration = (
-            supabase.table("illustrations")
-            .select("id,project_id")
-            .eq("id", illustration_id)
-            .execute()
+        query = (
+            supabase.table(table)
+            .select("*, projects!inner(*)")
+            .eq("id", row_id)
         )
-        if not illustration.data:
-            raise HTTPException(status_code=404, detail="Illustration not found")
+        result = _owned(query, profile, column="projects.user_id").execute()
+        if not result.data:
+            raise HTTPException(status_code=404, detail=f"{label} not found")
 
-        project_id = illustration.data[0]["project_id"]
-        assert_project_access(profile, project_id)
-        return illustration.data[0]
+        row = result.data[0]
+        _remember_project(row.pop("projects"))
+        return row
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Illustration access check failed: {e}"
+            status_code=500, detail=f"{label} access check failed: {e}"
         )
 
 
+def assert_illustration_access(profile: dict, illustration_id: str) -> dict:
+    """Ensure the user can access an illustration and return it."""
+    return _assert_child_access(profile, "illustrations", illustration_id, "Illustration")
+
+
 def assert_export_access(profile: dict, export_id: str) -> dict:
     """Ensure the user can access an export and return it."""
-    try:
-        export = (
-            supabase.table("exports")
-            .select("id,project_id,status,file_url,format")
-            .eq("id", export_id)
-            .execute()
-        )
-        if not export.data:
-            raise HTTPException(status_code=404, detail="Export not found")
-        assert_project_access(profile, export.data[0]["project_id"])
-        return export.data[0]
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export access check failed: {e}")
+    return _assert_child_access(profile, "exports", export_id, "Export")
+
+
+def assert_chapter_access(profile: dict, chapter_id: str) -> dict:
+    """Ensure the user can access a chapter (by id) and return it."""
+    return _assert_child_access(profile, "chapters", chapter_id, "Chapter")
 
 
 def has_unlimited_access(profile: dict) -> bool:
@@ -0,0 +1,64 @@
+"""
+Digest de chapitre : condensé extractif utilisé comme contexte de génération
+
+Recalculé à chaque écriture du contenu d'un chapitre (colonnes
+`digest_opening` et `ending_excerpt`), pour que la génération ne lise
+jamais le contenu complet des chapitres précédents.
+"""
+
+import re
+
+# Tailles maximales (caractères) des deux extraits
+DIGEST_OPENING_CHARS = 200
+ENDING_EXCERPT_CHARS = 300
+
+_SENTENCE_END = re.compile(r"[.!?…»](?=\s)")
+
+
+def _opening(content: str) -> str:
+    """Premières phrases complètes, dans la limite de DIGEST_OPENING_CHARS"""
+    head = " ".join(content[: DIGEST_OPENING_CHARS * 2].split())
+    if len(head) <= DIGEST_OPENING_CHARS:
+        return head
+    head = head[:DIGEST_OPENING_CHARS]
+    ends = [m.end() for m in _SENTENCE_END.finditer(head)]
+    return head[: ends[-1]] if ends else head + "..."
+
+
+def build_chapter_digest(content: str) -> dict:
+    """Colonnes digest à écrire avec le contenu d'un chapitre"""
+    content = (content or "").strip()
+    if not content:
+        return {"digest_opening": None, "ending_excerpt": None}
+    if len(content) <= ENDING_EXCERPT_CHARS:
+        # Chapitre court : l'extrait de fin contient déjà tout le texte
+        return {"digest_opening": None, "ending_excerpt": content}
+    return {
+        "digest_opening": _opening(content),
+        "ending_excerpt": content[-ENDING_EXCERPT_CHARS:],
+    }
+
+
+def build_chapter_digest_from_edges(head: str, tail: str) -> dict:
+    """
+    Digest d'un long chapitre à partir de ses seules extrémités (début et
+    fin de quelques milliers de caractères), sans relire le contenu complet
+    """
+    return {
+        "digest_opening": _opening(head.lstrip()),
+        "ending_excerpt": tail.rstrip()[-ENDING_EXCERPT_CHARS:],
+    }
+
+
+def format_chapter_digest(chapter: dict) -> str:
+    """Bloc de contexte d'un chapitre précédent (digest, sinon résumé du plan)"""
+    block = f"\n--- Chapitre {chapter['number']} : {chapter['title']} ---\n"
+    if chapter.get("summary"):
+        block += f"[Résumé: {chapter['summary']}]\n"
+    ending = chapter.get("ending_excerpt")
+    if chapter.get("digest_opening"):
+        block += f"Début : {chapter['digest_opening']}\n"
+        block += f"Fin : ...{ending}"
+    elif ending:
+        block += ending
+    return block
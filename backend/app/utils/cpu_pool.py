@@ -0,0 +1,82 @@
+"""
+Pool de processus borné pour les traitements CPU-bound
+(rendu PDF/EPUB, traitement d'images, extraction de texte...)
+
+Les coroutines appellent `await cpu_pool.run(fn, *args)` : la boucle d'événements
+reste libre pendant le calcul, et plusieurs rendus utilisent plusieurs cœurs.
+`fn` et ses arguments doivent être picklables (fonctions de niveau module).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import settings
+
+
+class CPUPool:
+    """ProcessPoolExecutor borné, avec métriques de file d'attente"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # 'spawn' : les processus ne partagent pas les sockets HTTP du parent
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Exécute fn(*args) dans un processus du pool et attend son résultat"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Métriques du pool (queue_depth = tâches en attente d'un processus)"""
+        return {
+            "max_workers": self.max_workers,
+            "running": self._running,
+            "queue_depth": self._queued,
+            "completed": self._completed,
+            "failed": self._failed,
+        }
+
+    def shutdown(self) -> None:
+        """Arrête le pool (appelé à l'arrêt de l'application)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+cpu_pool = CPUPool(max_workers=settings.cpu_pool_workers)
@@ -0,0 +1,54 @@
+"""
+Exécution concurrente des requêtes Supabase
+
+Le client supabase-py est synchrone : chaque `.execute()` bloque le thread
+appelant. `fetch` l'exécute dans un pool de threads dédié, et `fetch_all`
+lance plusieurs requêtes indépendantes en parallèle :
+
+    projects, exports = await fetch_all(
+        supabase.table("projects").select("*").eq("user_id", user_id),
+        supabase.table("exports").select("id", count="exact").limit(1),
+    )
+
+La latence d'un handler devient celle de la requête la plus lente,
+et non plus la somme de toutes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from app.config import settings
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.db_fanout_workers, thread_name_prefix="supabase"
+)
+
+
+def or_filter(query, conditions: str):
+    """
+    Ajoute un filtre `or=(...)` à un builder PostgREST
+
+    postgrest 0.13 n'expose pas `.or_()` : le paramètre est posé directement
+    sur la query string (plusieurs `or` se combinent en ET).
+    """
+    query.params = query.params.add("or", f"({conditions})")
+    return query
+
+
+async def fetch(query) -> Any:
+    """Exécute une requête (builder PostgREST) sans bloquer la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, query.execute)
+
+
+async def fetch_all(*queries) -> List[Any]:
+    """Exécute des requêtes indépendantes en parallèle, résultats dans l'ordre"""
+    return list(await asyncio.gather(*(fetch(query) for query in queries)))
+
+
+def shutdown() -> None:
+    """Arrête le pool (appelé à l'arrêt de l'application)"""
+    _executor.shutdown(wait=False, cancel_futures=True)
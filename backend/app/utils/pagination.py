@@ -0,0 +1,122 @@
+"""
+Pagination par curseur (keyset) et projection des colonnes des listes
+
+Les routes de liste renvoient au plus `limit` lignes, triées sur une clé
+stable (ex. `created_at, id`). Quand il reste des lignes, l'en-tête
+`X-Next-Cursor` contient un curseur opaque à repasser en `?cursor=` pour
+obtenir la page suivante : le corps de la réponse reste une simple liste.
+
+    query = supabase.table("exports").select(select_fields(fields, ExportSummary))
+    query = keyset_page(query, cursor, limit, EXPORT_KEYS, desc=True)
+    return finish_page(query.execute().data, EXPORT_KEYS, limit, response)
+
+Contrairement à `range(offset, ...)`, le coût d'une page ne dépend pas de
+sa position : la base reprend directement après la dernière clé vue.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+from app.utils.db import or_filter
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode les valeurs de clé de la dernière ligne en curseur opaque"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Décode un curseur ; 400 s'il est invalide"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+    return values
+
+
+def select_fields(
+    fields: Optional[str], model: Type[BaseModel], keys: Sequence[str] = ()
+) -> str:
+    """
+    Construit la clause select à partir de `?fields=a,b,c`
+
+    Seules les colonnes du modèle de résumé sont autorisées ; `id` et les
+    colonnes de la clé de pagination sont toujours incluses.
+    """
+    allowed = list(model.model_fields)
+    if not fields:
+        return ",".join(allowed)
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Champs inconnus: {', '.join(unknown)}. Autorisés: {', '.join(allowed)}",
+        )
+
+    columns = ["id", *keys, *requested]
+    return ",".join(dict.fromkeys(columns))
+
+
+def _quote(value: Any) -> str:
+    """Valeur d'un filtre PostgREST `or=(...)` (dates et textes entre guillemets)"""
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_page(
+    query, cursor: Optional[str], limit: int, keys: Sequence[str], desc: bool = False
+):
+    """
+    Applique tri, reprise après le curseur et limite (+1 ligne pour savoir
+    s'il existe une page suivante) à un builder PostgREST
+    """
+    op = "lt" if desc else "gt"
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        if len(keys) == 1:
+            query = query.filter(keys[0], op, values[0])
+        else:
+            # (k1, k2) > (v1, v2)  <=>  k1 > v1 OR (k1 = v1 AND k2 > v2)
+            clauses = []
+            for i, key in enumerate(keys):
+                equal = [f"{k}.eq.{_quote(v)}" for k, v in zip(keys[:i], values[:i])]
+                bound = f"{key}.{op}.{_quote(values[i])}"
+                clauses.append(f"and({','.join(equal + [bound])})" if equal else bound)
+            query = or_filter(query, ",".join(clauses))
+
+    # Un seul paramètre `order=k1.desc,k2.desc` : `.order()` répété ajouterait
+    # plusieurs paramètres `order` au lieu d'un tri composé
+    direction = "desc" if desc else "asc"
+    query.params = query.params.add(
+        "order", ",".join(f"{key}.{direction}" for key in keys)
+    )
+    return query.limit(limit + 1)
+
+
+def finish_page(
+    rows: List[dict], keys: Sequence[str], limit: int, response: Response
+) -> List[dict]:
+    """Tronque la page et expose le curseur suivant dans l'en-tête"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [rows[-1][key] for key in keys]
+        )
+    return rows
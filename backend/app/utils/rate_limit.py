@@ -0,0 +1,128 @@
+"""
+Rate limiting - compteur à fenêtre glissante (sliding window counter)
+
+Chaque clé ne garde que deux compteurs (fenêtre courante et précédente) :
+coût O(1) par requête, mémoire O(1) par clé, quel que soit le trafic.
+Estimation = précédente * (1 - part écoulée de la fenêtre) + courante.
+
+Deux backends interchangeables (settings.rate_limit_backend) :
+- "memory"   : compteurs locaux au processus, bornés en nombre de clés (LRU)
+- "supabase" : compteurs partagés entre workers/instances (fonction SQL
+  hit_rate_limits, toutes les clés d'une requête en un seul aller-retour)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.utils.supabase import supabase_admin
+
+
+class MemoryRateLimiter:
+    """Compteurs en mémoire, avec éviction des clés inactives puis LRU"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max(1, max_keys)
+        # clé -> [window_index, count courant, count précédent, window_seconds]
+        self._counters: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _evict(self, now: float) -> None:
+        # Les clés les moins récemment vues sont en tête : on purge les expirées
+        while self._counters:
+            key, (window_index, _, _, window) = next(iter(self._counters.items()))
+            if (window_index + 2) * window > now and len(self._counters) <= self.max_keys:
+                break
+            self._counters.popitem(last=False)
+            self.evictions += 1
+
+    async def hit(self, key: str, limit: int, window: int) -> bool:
+        """Enregistre une requête ; False si la limite est dépassée"""
+        now = time.time()
+        window_index = int(now // window)
+        elapsed = (now - window_index * window) / window
+
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                entry = [window_index, 0, 0, window]
+                self._counters[key] = entry
+            elif entry[0] != window_index:
+                # Fenêtre suivante : la courante devient la précédente
+                entry[2] = entry[1] if entry[0] == window_index - 1 else 0
+                entry[0], entry[1] = window_index, 0
+            self._counters.move_to_end(key)
+
+            allowed = entry[2] * (1 - elapsed) + entry[1] < limit
+            if allowed:
+                entry[1] += 1
+            self._evict(now)
+            return allowed
+
+    async def hit_many(
+        self, checks: List[Tuple[str, int]], window: int
+    ) -> Optional[str]:
+        """Compte les clés dans l'ordre ; renvoie la première refusée, sinon None"""
+        for key, limit in checks:
+            if not await self.hit(key, limit, window):
+                return key
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "keys": len(self._counters),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+        }
+
+
+class SupabaseRateLimiter:
+    """Compteurs partagés dans la table rate_limit_counters"""
+
+    def __init__(self):
+        self.errors = 0
+
+    async def hit_many(
+        self, checks: List[Tuple[str, int]], window: int
+    ) -> Optional[str]:
+        """Toutes les clés en un seul appel RPC ; renvoie la première refusée"""
+        keys = [key for key, _ in checks]
+        try:
+            result = await asyncio.to_thread(
+                lambda: supabase_admin.rpc(
+                    "hit_rate_limits",
+                    {
+                        "p_keys": keys,
+                        "p_max_counts": [limit for _, limit in checks],
+                        "p_window_seconds": window,
+                    },
+                ).execute()
+            )
+            return result.data or None
+        except Exception as e:
+            # Fail open : une panne du backend ne doit pas bloquer l'API
+            self.errors += 1
+            print(f"⚠️ Rate limiting indisponible ({', '.join(keys)}): {e}")
+            return None
+
+    async def hit(self, key: str, limit: int, window: int) -> bool:
+        return await self.hit_many([(key, limit)], window) is None
+
+    def stats(self) -> dict:
+        return {"backend": "supabase", "errors": self.errors}
+
+
+def _create_limiter():
+    if settings.rate_limit_backend == "supabase":
+        return SupabaseRateLimiter()
+    return MemoryRateLimiter(max_keys=settings.rate_limit_max_keys)
+
+
+rate_limiter = _create_limiter()
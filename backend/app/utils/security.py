@@ -5,18 +5,16 @@ Middleware de sécurité pour Hakawa API
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
-import time
-from collections import defaultdict
 from datetime import datetime, timedelta
+from app.config import settings
+from app.utils.admin import peek_authenticated_user_id
+from app.utils.rate_limit import rate_limiter
 from app.utils.supabase import supabase_admin
 import hashlib
 import secrets
 
 security = HTTPBearer()
 
-# Rate limiting en mémoire (à remplacer par Redis en production)
-rate_limit_store = defaultdict(list)
-
 # Stockage des sessions actives
 active_sessions = {}
 
@@ -60,39 +58,6 @@ class SecurityMiddleware:
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide"
             )
 
-    @staticmethod
-    def rate_limit(
-        identifier: str, max_requests: int = 100, window_seconds: int = 60
-    ) -> bool:
-        """
-        Rate limiting simple
-
-        Args:
-            identifier: IP ou user_id
-            max_requests: Nombre max de requêtes
-            window_seconds: Fenêtre de temps en secondes
-
-        Returns:
-            True si autorisé, False si limite dépassée
-        """
-        now = time.time()
-        window_start = now - window_seconds
-
-        # Nettoyer les anciennes requêtes
-        rate_limit_store[identifier] = [
-            req_time
-            for req_time in rate_limit_store[identifier]
-            if req_time > window_start
-        ]
-
-        # Vérifier la limite
-        if len(rate_limit_store[identifier]) >= max_requests:
-            return False
-
-        # Ajouter la requête actuelle
-        rate_limit_store[identifier].append(now)
-        return True
-
     @staticmethod
     def sanitize_input(data: str) -> str:
         """Nettoie les entrées utilisateur pour prévenir les injections"""
@@ -138,22 +103,34 @@ async def require_admin(credentials: HTTPAuthorizationCredentials = security):
 
 
 async def check_rate_limit(request: Request):
-    """Middleware de rate limiting"""
-    # Utiliser l'IP comme identifiant
-    client_ip = request.client.host
-
-    # Limites différentes selon l'endpoint
-    if "/api/generation" in str(request.url):
-        max_requests = 10  # 10 générations par minute
-        window = 60
-    elif "/api/images" in str(request.url):
-        max_requests = 5  # 5 images par minute
-        window = 60
-    else:
-        max_requests = 100  # 100 requêtes par minute
-        window = 60
-
-    if not SecurityMiddleware.rate_limit(client_ip, max_requests, window):
+    """
+    Middleware de rate limiting, par IP et par utilisateur authentifié.
+    Chaque requête compte dans la limite globale, et les routes coûteuses
+    (génération, images) ont en plus leur propre limite.
+    """
+    if not settings.rate_limit_enabled:
+        return
+
+    identities = [f"ip:{request.client.host}"]
+    user_id = peek_authenticated_user_id(request.headers.get("authorization"))
+    if user_id:
+        identities.append(f"user:{user_id}")
+
+    # Limites par minute selon l'endpoint
+    scopes = [("default", settings.rate_limit_requests_per_minute)]
+    path = request.url.path
+    if path.startswith("/api/generation"):
+        scopes.append(("generation", settings.rate_limit_ai_per_minute))
+    elif path.startswith("/api/images"):
+        scopes.append(("images", settings.rate_limit_images_per_minute))
+
+    # Toutes les clés vérifiées d'un coup (un seul aller-retour en backend supabase)
+    checks = [
+        (f"{scope}:{identity}", max_requests)
+        for identity in identities
+        for scope, max_requests in scopes
+    ]
+    if await rate_limiter.hit_many(checks, 60):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Trop de requêtes. Veuillez réessayer plus tard.",
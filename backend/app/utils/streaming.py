@@ -0,0 +1,27 @@
+"""
+Utilitaires Server-Sent Events (SSE) pour le streaming des réponses IA
+"""
+
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Désactive le buffering des proxies (nginx, Render)
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Formate un événement SSE (data encodée en JSON)"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Construit une StreamingResponse text/event-stream"""
+    return StreamingResponse(
+        events, media_type="text/event-stream", headers=SSE_HEADERS
+    )
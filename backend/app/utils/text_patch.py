@@ -0,0 +1,92 @@
+"""
+Patchs de texte : remplacements de plages appliqués côté serveur
+
+Une opération remplace `content[start:end]` par `text` (insertion si
+start == end, suppression si text est vide). Les opérations d'un patch
+s'appliquent dans l'ordre, chacune sur le résultat de la précédente.
+
+Le nombre de mots est mis à jour à partir de la seule zone modifiée,
+élargie jusqu'aux espaces voisins : les mots situés hors de cette zone
+ne peuvent pas changer, le résultat est identique à `len(content.split())`.
+"""
+
+from typing import Iterable, List, Tuple
+
+# Taille des blocs comparés d'un coup (comparaison de tranches, en C)
+SCAN_BLOCK = 4096
+
+
+class PatchError(ValueError):
+    """Opération hors limites pour le contenu courant"""
+
+
+def _word_window(content: str, start: int, end: int) -> Tuple[int, int]:
+    """Élargit [start, end) jusqu'aux espaces (ou bords du texte) voisins"""
+    while start > 0 and not content[start - 1].isspace():
+        start -= 1
+    while end < len(content) and not content[end].isspace():
+        end += 1
+    return start, end
+
+
+def apply_text_op(
+    content: str, word_count: int, start: int, end: int, text: str
+) -> Tuple[str, int]:
+    """Applique un remplacement de plage, renvoie (contenu, nombre de mots)"""
+    if not 0 <= start <= end <= len(content):
+        raise PatchError(
+            f"Plage [{start}, {end}) invalide pour un contenu de {len(content)} caractères"
+        )
+
+    left, right = _word_window(content, start, end)
+    words_before = len(content[left:right].split())
+    words_after = len((content[left:start] + text + content[end:right]).split())
+
+    return content[:start] + text + content[end:], word_count + words_after - words_before
+
+
+def apply_text_ops(
+    content: str, word_count: int, ops: Iterable[Tuple[int, int, str]]
+) -> Tuple[str, int]:
+    """Applique une suite d'opérations (start, end, text) dans l'ordre"""
+    for start, end, text in ops:
+        content, word_count = apply_text_op(content, word_count, start, end, text)
+    return content, word_count
+
+
+def _common_prefix(a: str, b: str, limit: int) -> int:
+    """Longueur du préfixe commun, bloc par bloc puis caractère par caractère"""
+    i = 0
+    while i + SCAN_BLOCK <= limit and a[i : i + SCAN_BLOCK] == b[i : i + SCAN_BLOCK]:
+        i += SCAN_BLOCK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    """Longueur du suffixe commun (au plus `limit`), même principe"""
+    len_a, len_b = len(a), len(b)
+    n = 0
+    while (
+        n + SCAN_BLOCK <= limit
+        and a[len_a - n - SCAN_BLOCK : len_a - n] == b[len_b - n - SCAN_BLOCK : len_b - n]
+    ):
+        n += SCAN_BLOCK
+    while n < limit and a[len_a - 1 - n] == b[len_b - 1 - n]:
+        n += 1
+    return n
+
+
+def diff_text(before: str, after: str) -> List[Tuple[int, int, str]]:
+    """
+    Opérations transformant `before` en `after` : une seule plage, entre le
+    plus long préfixe et le plus long suffixe communs. Les parties communes
+    sont comparées par blocs : seul le bloc divergent est parcouru en Python.
+    """
+    if before == after:
+        return []
+    limit = min(len(before), len(after))
+    prefix = _common_prefix(before, after, limit)
+    suffix = _common_suffix(before, after, limit - prefix)
+    return [(prefix, len(before) - suffix, after[prefix : len(after) - suffix])]
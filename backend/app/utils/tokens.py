@@ -0,0 +1,41 @@
+"""
+Estimation du nombre de tokens et fenêtre d'historique sous budget
+
+L'estimation est volontairement prudente (≈ 3,5 caractères par token pour
+du français, plus un surcoût fixe par message) : elle sert à borner la
+taille des requêtes sans appel réseau supplémentaire.
+"""
+
+import math
+from typing import List
+
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens estimés d'un message (contenu + rôle / séparateurs)"""
+    return MESSAGE_OVERHEAD_TOKENS + math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def fit_history(history: List[dict], budget: int) -> List[dict]:
+    """
+    Plus longue suite de messages récents tenant dans `budget` tokens,
+    remplie du plus récent au plus ancien, renvoyée dans l'ordre chronologique.
+    La fenêtre commence toujours par un message utilisateur.
+    """
+    kept: List[dict] = []
+    used = 0
+    for message in reversed(history or []):
+        if message.get("role") not in ("user", "assistant"):
+            continue
+        cost = estimate_tokens(message.get("content", ""))
+        if used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    return kept
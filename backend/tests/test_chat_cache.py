@@ -0,0 +1,37 @@
+"""
+Point de cache des requêtes de conversation
+"""
+
+from app.services.ai_service import AIService
+
+PROJECT = {"id": "p1", "title": "Le Livre", "genre": "conte"}
+
+
+def _request(history):
+    return AIService()._chat_request(
+        "Et ensuite ?", "writing", history, None, PROJECT, "Résumé"
+    )
+
+
+def test_breakpoint_on_last_history_message():
+    history = [
+        {"role": "user", "content": "Bonjour"},
+        {"role": "assistant", "content": "Bonjour !"},
+    ]
+
+    request = _request(history)
+
+    assert all("cache_control" not in block for block in request["system"])
+    messages = request["messages"]
+    assert messages[0]["content"] == "Bonjour"
+    assert messages[1]["content"] == [
+        {"type": "text", "text": "Bonjour !", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert messages[2] == {"role": "user", "content": "Et ensuite ?"}
+
+
+def test_no_breakpoint_without_history():
+    request = _request([])
+
+    assert request["messages"] == [{"role": "user", "content": "Et ensuite ?"}]
+    assert all("cache_control" not in block for block in request["system"])
@@ -0,0 +1,98 @@
+"""
+Requêtes de comptage (account/me, profiles/me/stats, admin/users/{id})
+
+postgrest 0.13.2 n'accepte pas `head=True` : les comptages passent par
+`count="exact"` + `.limit(1)` et lisent `.count`.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import account, admin, profiles
+
+
+def _capture(monkeypatch, module, results):
+    """Remplace `fetch_all` du module et retourne la liste des requêtes reçues"""
+    captured = []
+
+    async def fake_fetch_all(*queries):
+        captured.extend(queries)
+        return results[: len(queries)]
+
+    monkeypatch.setattr(module, "fetch_all", fake_fetch_all)
+    return captured
+
+
+def _assert_count_query(query):
+    assert "count=exact" in query.headers.get("Prefer", "")
+    assert query.params.get("limit") == "1"
+
+
+def _response(data=None, count=None):
+    return SimpleNamespace(data=data or [], count=count)
+
+
+def test_account_me_counts(monkeypatch):
+    captured = _capture(
+        monkeypatch,
+        account,
+        [_response(count=3), _response(count=5), _response(count=2)],
+    )
+    profile = {"id": "user-1", "subscription_tier": "free"}
+
+    result = asyncio.run(account.get_my_account(profile=profile))
+
+    assert len(captured) == 3
+    for query in captured:
+        _assert_count_query(query)
+    assert captured[0].params.get("user_id") == "eq.user-1"
+    assert captured[1].params.get("projects.user_id") == "eq.user-1"
+    assert result["stats"]["projects_count"] == 3
+    assert result["stats"]["illustrations_count"] == 5
+    assert result["stats"]["exports_count"] == 2
+
+
+def test_profile_stats_illustration_count(monkeypatch):
+    captured = _capture(
+        monkeypatch,
+        profiles,
+        [
+            _response(data=[{"id": "p1", "status": "draft", "word_count": 10}]),
+            _response(count=4),
+        ],
+    )
+
+    asyncio.run(profiles.get_my_stats(profile={"id": "user-1"}))
+
+    assert len(captured) == 2
+    _assert_count_query(captured[1])
+    assert "limit" not in captured[0].params
+
+
+def test_admin_user_details_counts(monkeypatch):
+    captured = _capture(
+        monkeypatch,
+        admin,
+        [
+            _response(data=[{"id": "user-1"}]),
+            _response(data=[]),
+            _response(count=7),
+            _response(count=1),
+        ],
+    )
+
+    result = asyncio.run(admin.get_user_details("user-1"))
+
+    for query in captured[2:]:
+        _assert_count_query(query)
+    assert result["stats"]["illustrations_count"] == 7
+    assert result["stats"]["exports_count"] == 1
+
+
+@pytest.mark.parametrize("module", [account, profiles, admin])
+def test_no_head_keyword(module):
+    import inspect
+
+    assert "head=True" not in inspect.getsource(module)
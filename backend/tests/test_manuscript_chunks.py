@@ -0,0 +1,77 @@
+"""
+Traitement des manuscrits : réservation des morceaux, analyse en arrière-plan
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.services import manuscript_service as module
+from app.utils.supabase import supabase, supabase_admin
+
+
+def test_claim_chunk_filters_on_claimable_status(monkeypatch):
+    captured = []
+
+    def fake_execute(self):
+        captured.append(self)
+        return SimpleNamespace(data=[{"id": "chunk-1"}])
+
+    builder = type(supabase_admin.table("manuscript_chunks").update({}).eq("id", "x"))
+    monkeypatch.setattr(builder, "execute", fake_execute)
+
+    assert module.manuscript_service._claim_chunk("chunk-1") is True
+
+    (query,) = captured
+    assert query.params["id"] == "eq.chunk-1"
+    condition = query.params["or"]
+    assert condition.startswith("(status.in.(pending,failed),and(status.eq.processing,")
+    assert "updated_at.lt." in condition
+    # Client service : le job n'a pas de session utilisateur (RLS en lecture seule)
+    assert query.session.headers["apikey"] == supabase_admin.supabase_key
+    assert supabase_admin.supabase_key != supabase.supabase_key
+
+
+def test_analysis_runs_in_background(monkeypatch):
+    updates = []
+    release = asyncio.Event()
+
+    async def fake_analyze(manuscript):
+        await release.wait()
+        return "rapport"
+
+    service = module.ManuscriptService()
+    monkeypatch.setattr(
+        module, "_update_manuscript", lambda _id, data: updates.append(data)
+    )
+    monkeypatch.setattr(service, "analyze", fake_analyze)
+
+    async def scenario():
+        await service.start_analysis({"id": "m1"})
+        # La requête rend la main avant la fin de l'analyse
+        assert service.is_running("m1")
+        assert updates[-1]["status"] == "analyzing"
+        task = service._tasks["m1"]
+        release.set()
+        await task
+
+    asyncio.run(scenario())
+
+    assert not service.is_running("m1")
+    assert updates[-1]["status"] == "analyzed"
+    assert updates[-1]["analysis"] == "rapport"
+
+
+def test_analysis_progress_from_manuscript_counters():
+    manuscript = {
+        "id": "m1",
+        "status": "analyzing",
+        "chunks_total": 4,
+        "chunks_done": 1,
+        "progress": 25,
+    }
+
+    progress = module.manuscript_service.progress(manuscript)
+
+    assert progress["chunks_total"] == 4
+    assert progress["chunks_done"] == 1
+    assert progress["progress"] == 25
@@ -0,0 +1,70 @@
+"""
+Pagination keyset : curseurs et filtre de reprise
+"""
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    finish_page,
+    keyset_page,
+)
+from app.utils.supabase import supabase
+
+KEYS = ("created_at", "id")
+
+
+def _query():
+    return supabase.table("exports").select("id,created_at")
+
+
+def test_cursor_round_trip():
+    values = ["2026-10-18T10:00:00+00:00", "abc"]
+    assert decode_cursor(encode_cursor(values), 2) == values
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(["only-one"])])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, 2)
+    assert exc.value.status_code == 400
+
+
+def test_first_page_has_no_filter():
+    query = keyset_page(_query(), None, 10, KEYS, desc=True)
+
+    assert "or" not in query.params
+    assert query.params["limit"] == "11"
+    assert query.params.get_list("order") == ["created_at.desc,id.desc"]
+
+
+def test_keyset_page_from_cursor():
+    cursor = encode_cursor(["2026-10-18T10:00:00+00:00", "abc"])
+
+    query = keyset_page(_query(), cursor, 10, KEYS, desc=True)
+
+    assert query.params["or"] == (
+        '(created_at.lt."2026-10-18T10:00:00+00:00",'
+        'and(created_at.eq."2026-10-18T10:00:00+00:00",id.lt."abc"))'
+    )
+    assert query.params["limit"] == "11"
+
+
+def test_single_key_cursor():
+    query = keyset_page(_query(), encode_cursor([42]), 5, ("position",))
+
+    assert query.params["position"] == "gt.42"
+    assert "or" not in query.params
+
+
+def test_finish_page_sets_next_cursor():
+    rows = [{"created_at": f"t{i}", "id": str(i)} for i in range(3)]
+    response = Response()
+
+    page = finish_page(rows, KEYS, 2, response)
+
+    assert len(page) == 2
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER], 2) == ["t1", "1"]
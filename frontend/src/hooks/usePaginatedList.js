@@ -0,0 +1,52 @@
+import { useState } from "react";
+
+// Keyset-paginated list: the first page is loaded upfront, further pages
+// only when the user asks for them (`X-Next-Cursor`), so large accounts do
+// not turn into a burst of sequential requests.
+// `fetchPage(cursor)` must resolve to `{ items, nextCursor }` (see getPage).
+export function usePaginatedList(fetchPage) {
+  const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const loadFirst = async () => {
+    const page = await fetchPage(null);
+    setItems(page.items || []);
+    setNextCursor(page.nextCursor);
+    return page.items || [];
+  };
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      const fetched = page.items || [];
+      // Items added locally meanwhile come back in their real position
+      const ids = new Set(fetched.map((item) => item.id));
+      setItems((prev) => [
+        ...prev.filter((item) => !ids.has(item.id)),
+        ...fetched,
+      ]);
+      setNextCursor(page.nextCursor);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Replace the list with a complete one (e.g. a regenerated plan)
+  const reset = (allItems) => {
+    setItems(allItems || []);
+    setNextCursor(null);
+  };
+
+  return {
+    items,
+    setItems,
+    reset,
+    hasMore: nextCursor !== null,
+    loadingMore,
+    loadFirst,
+    loadMore,
+  };
+}
@@ -5,6 +5,7 @@ import { useTranslation } from "react-i18next";
 import { Layout } from "../components/layout/Layout";
 import { ProjectList } from "../components/project/ProjectList";
 import { projectsService } from "../services/projects";
+import { usePaginatedList } from "../hooks/usePaginatedList";
 import { Loader } from "../components/ui/Loader";
 import { Button } from "../components/ui/Button";
 import { Plus } from "lucide-react";
@@ -14,7 +15,14 @@ export default function Dashboard() {
   const { t } = useTranslation();
   const { user, profile } = useAuth();
   const navigate = useNavigate();
-  const [projects, setProjects] = useState([]);
+  const {
+    items: projects,
+    setItems: setProjects,
+    hasMore,
+    loadingMore,
+    loadFirst,
+    loadMore,
+  } = usePaginatedList((cursor) => projectsService.getPage(user.id, cursor));
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -24,8 +32,7 @@ export default function Dashboard() {
   const loadProjects = async () => {
     try {
       if (user) {
-        const data = await projectsService.getAll(user.id);
-        setProjects(data || []);
+        await loadFirst();
       }
     } catch (error) {
       console.error("Error loading projects:", error);
@@ -36,6 +43,15 @@ export default function Dashboard() {
     }
   };
 
+  const handleLoadMore = async () => {
+    try {
+      await loadMore();
+    } catch (error) {
+      console.error("Error loading projects:", error);
+      toast.error(t("dashboard.load_error"));
+    }
+  };
+
   const handleDeleteProject = async (projectId) => {
     if (window.confirm(t("dashboard.delete_confirm"))) {
       try {
@@ -81,6 +97,17 @@ export default function Dashboard() {
           {t("dashboard.my_stories")}
         </h2>
         <ProjectList projects={projects} onDelete={handleDeleteProject} />
+        {hasMore && (
+          <div className="mt-8 flex justify-center">
+            <Button
+              variant="outline"
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+            >
+              {t("common.load_more")}
+            </Button>
+          </div>
+        )}
       </div>
     </Layout>
   );
@@ -27,6 +27,7 @@ export default function Export() {
   const [project, setProject] = useState(null);
   const [loading, setLoading] = useState(true);
   const [exporting, setExporting] = useState(false);
+  const [exportProgress, setExportProgress] = useState(null);
 
   useEffect(() => {
     if (user && projectId) {
@@ -47,6 +48,7 @@ export default function Export() {
   };
 
   const handleExport = async (format) => {
+    if (exporting) return;
     setExporting(true);
     try {
       // Trigger export generation
@@ -59,8 +61,15 @@ export default function Export() {
         return;
       }
 
-      // Cas 2: Le serveur retourne un export_id pour télécharger
+      // Cas 2: Le serveur retourne un export_id : l'export est généré en
+      // arrière-plan, on attend qu'il soit terminé avant de télécharger
       if (result?.export_id) {
+        setExportProgress(0);
+        await exportsService.waitUntilReady(
+          result.export_id,
+          user.id,
+          setExportProgress
+        );
         const response = await exportsService.download(result.export_id);
 
         // Cas 2a: La réponse est un Blob (fichier binaire)
@@ -102,9 +111,19 @@ export default function Export() {
       toast.error(t("project.export_error"));
     } finally {
       setExporting(false);
+      setExportProgress(null);
     }
   };
 
+  const exportingLabel = (
+    <>
+      <Loader size="sm" />
+      {exportProgress !== null && (
+        <span className="mx-2">{exportProgress}%</span>
+      )}
+    </>
+  );
+
   if (loading) return <Layout>{t("project.loading")}</Layout>;
 
   return (
@@ -147,7 +166,7 @@ export default function Export() {
               </p>
               <Button className="w-full" disabled={exporting}>
                 {exporting ? (
-                  <Loader size="sm" />
+                  exportingLabel
                 ) : (
                   <Download className="w-4 h-4 mr-2" />
                 )}
@@ -172,7 +191,7 @@ export default function Export() {
               </p>
               <Button className="w-full" variant="outline" disabled={exporting}>
                 {exporting ? (
-                  <Loader size="sm" />
+                  exportingLabel
                 ) : (
                   <Download className="w-4 h-4 mr-2" />
                 )}
@@ -4,6 +4,7 @@ import { useAuth } from "../../contexts/AuthContext";
 import { Layout } from "../../components/layout/Layout";
 import { projectsService } from "../../services/projects";
 import { chaptersService } from "../../services/chapters";
+import { usePaginatedList } from "../../hooks/usePaginatedList";
 import { generationService } from "../../services/generation";
 import { Button } from "../../components/ui/Button";
 import { Card } from "../../components/ui/Card";
@@ -29,7 +30,17 @@ export default function Plan() {
   const navigate = useNavigate();
 
   const [project, setProject] = useState(null);
-  const [chapters, setChapters] = useState([]);
+  const {
+    items: chapters,
+    setItems: setChapters,
+    reset: resetChapters,
+    hasMore,
+    loadingMore,
+    loadFirst,
+    loadMore,
+  } = usePaginatedList((cursor) =>
+    chaptersService.getPage(projectId, user.id, cursor)
+  );
   const [loading, setLoading] = useState(true);
   const [generating, setGenerating] = useState(false);
 
@@ -45,12 +56,11 @@ export default function Plan() {
 
   const loadData = async () => {
     try {
-      const [projectData, chaptersData] = await Promise.all([
+      const [projectData] = await Promise.all([
         projectsService.getOne(projectId, user.id),
-        chaptersService.getAll(projectId, user.id),
+        loadFirst(),
       ]);
       setProject(projectData);
-      setChapters(chaptersData.sort((a, b) => a.number - b.number));
     } catch (error) {
       console.error(error);
       toast.error(t("project.load_error"));
@@ -66,7 +76,7 @@ export default function Plan() {
         projectId,
         user.id
       );
-      setChapters(newChapters);
+      resetChapters(newChapters);
       toast.success(t("project.plan_success"));
     } catch (error) {
       console.error(error);
@@ -76,6 +86,15 @@ export default function Plan() {
     }
   };
 
+  const handleLoadMore = async () => {
+    try {
+      await loadMore();
+    } catch (error) {
+      console.error(error);
+      toast.error(t("project.load_error"));
+    }
+  };
+
   const handleAddChapter = async () => {
     try {
       const newChapter = await chaptersService.create(
@@ -231,6 +250,18 @@ export default function Plan() {
             ))}
           </AnimatePresence>
 
+          {hasMore && (
+            <div className="flex justify-center">
+              <Button
+                variant="outline"
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+              >
+                {t("common.load_more")}
+              </Button>
+            </div>
+          )}
+
           <motion.button
             whileHover={{ scale: 1.01 }}
             whileTap={{ scale: 0.99 }}
@@ -3,8 +3,9 @@ import { useParams, useNavigate } from "react-router-dom";
 import { useAuth } from "../../contexts/AuthContext";
 import { Layout } from "../../components/layout/Layout";
 import { projectsService } from "../../services/projects";
-import { chaptersService } from "../../services/chapters";
+import { chaptersService, diffToOps } from "../../services/chapters";
 import { generationService } from "../../services/generation";
+import { usePaginatedList } from "../../hooks/usePaginatedList";
 import { Button } from "../../components/ui/Button";
 import { Loader } from "../../components/ui/Loader";
 import {
@@ -27,7 +28,16 @@ export default function Write() {
   const navigate = useNavigate();
 
   const [project, setProject] = useState(null);
-  const [chapters, setChapters] = useState([]);
+  const {
+    items: chapters,
+    setItems: setChapters,
+    hasMore,
+    loadingMore,
+    loadFirst,
+    loadMore,
+  } = usePaginatedList((cursor) =>
+    chaptersService.getPage(projectId, user.id, cursor)
+  );
   const [currentChapter, setCurrentChapter] = useState(null);
   const [content, setContent] = useState("");
   const [loading, setLoading] = useState(true);
@@ -44,18 +54,15 @@ export default function Write() {
 
   const loadData = async () => {
     try {
-      const [projectData, chaptersData] = await Promise.all([
+      // Chapters come sorted by number; further pages load on demand
+      const [projectData, firstChapters] = await Promise.all([
         projectsService.getOne(projectId, user.id),
-        chaptersService.getAll(projectId, user.id),
+        loadFirst(),
       ]);
       setProject(projectData);
-      const sortedChapters = chaptersData.sort(
-        (a, b) => a.number - b.number
-      );
-      setChapters(sortedChapters);
 
-      if (sortedChapters.length > 0) {
-        selectChapter(sortedChapters[0]);
+      if (firstChapters.length > 0) {
+        selectChapter(firstChapters[0]);
       }
     } catch (error) {
       console.error(error);
@@ -65,31 +72,94 @@ export default function Write() {
     }
   };
 
-  const selectChapter = (chapter) => {
+  const handleLoadMore = async () => {
+    try {
+      await loadMore();
+    } catch (error) {
+      console.error(error);
+      toast.error(t("project.load_error"));
+    }
+  };
+
+  const selectChapter = async (chapter) => {
     // Save current before switching? Maybe auto-save later.
     setCurrentChapter(chapter);
-    setContent(chapter.content || "");
+    if (chapter.content !== undefined) {
+      setContent(chapter.content || "");
+      return;
+    }
+    // The chapter list omits content: load the full chapter on demand
+    setContent("");
+    try {
+      const full = await chaptersService.getOne(
+        projectId,
+        chapter.number,
+        user.id
+      );
+      setCurrentChapter(full);
+      setContent(full.content || "");
+      setChapters((prev) => prev.map((c) => (c.id === full.id ? full : c)));
+    } catch (error) {
+      console.error(error);
+      toast.error(t("project.load_error"));
+    }
   };
 
   const handleSave = async () => {
     if (!currentChapter) return;
     setSaving(true);
     try {
-      await chaptersService.update(
-        projectId,
-        currentChapter.number,
-        { content },
-        user.id
-      );
+      let updated;
+      if (currentChapter.version !== undefined) {
+        // Only send the edited range
+        const ops = diffToOps(currentChapter.content || "", content);
+        updated = { ...currentChapter, content };
+        if (ops.length > 0) {
+          const result = await chaptersService.patch(
+            projectId,
+            currentChapter.number,
+            currentChapter.version,
+            ops,
+            user.id
+          );
+          updated.version = result.version;
+          updated.word_count = result.word_count;
+        }
+      } else {
+        updated = await chaptersService.update(
+          projectId,
+          currentChapter.number,
+          { content },
+          user.id
+        );
+      }
       // Update local state
+      setCurrentChapter(updated);
       setChapters(
-        chapters.map((c) =>
-          c.id === currentChapter.id ? { ...c, content } : c
-        )
+        chapters.map((c) => (c.id === currentChapter.id ? updated : c))
       );
       toast.success(t("project.write_saved"));
     } catch (error) {
-      toast.error(t("project.write_save_error"));
+      if (error.response?.status === 409) {
+        // Edited elsewhere: rebase on the server version but keep the local
+        // text in the editor, so the next save applies it on top
+        toast.error(t("project.write_conflict"));
+        try {
+          const fresh = await chaptersService.getOne(
+            projectId,
+            currentChapter.number,
+            user.id
+          );
+          setCurrentChapter(fresh);
+          setChapters((prev) =>
+            prev.map((c) => (c.id === fresh.id ? fresh : c))
+          );
+        } catch (reloadError) {
+          console.error(reloadError);
+        }
+      } else {
+        toast.error(t("project.write_save_error"));
+      }
     } finally {
       setSaving(false);
     }
@@ -155,6 +225,17 @@ export default function Write() {
                 {chapter.title}
               </button>
             ))}
+            {hasMore && (
+              <Button
+                variant="ghost"
+                size="sm"
+                className="w-full"
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+              >
+                {t("common.load_more")}
+              </Button>
+            )}
           </div>
         </motion.div>
 
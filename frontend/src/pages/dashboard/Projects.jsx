@@ -6,13 +6,21 @@ import { Button } from "../../components/ui/Button";
 import { Loader } from "../../components/ui/Loader";
 import { ProjectList } from "../../components/project/ProjectList";
 import { projectsService } from "../../services/projects";
+import { usePaginatedList } from "../../hooks/usePaginatedList";
 import { Plus, BookOpen, Calendar, Star } from "lucide-react";
 import toast from "react-hot-toast";
 
 export default function Projects() {
   const navigate = useNavigate();
   const { user } = useAuth();
-  const [projects, setProjects] = useState([]);
+  const {
+    items: projects,
+    setItems: setProjects,
+    hasMore,
+    loadingMore,
+    loadFirst,
+    loadMore,
+  } = usePaginatedList((cursor) => projectsService.getPage(user.id, cursor));
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -22,8 +30,7 @@ export default function Projects() {
   const loadProjects = async () => {
     try {
       if (user) {
-        const data = await projectsService.getAll(user.id);
-        setProjects(data || []);
+        await loadFirst();
       }
     } catch (error) {
       console.error("Error loading projects:", error);
@@ -32,6 +39,15 @@ export default function Projects() {
     }
   };
 
+  const handleLoadMore = async () => {
+    try {
+      await loadMore();
+    } catch (error) {
+      console.error("Error loading projects:", error);
+      toast.error("Erreur lors du chargement des projets");
+    }
+  };
+
   const handleDeleteProject = async (projectId) => {
     if (window.confirm("Êtes-vous sûr de vouloir supprimer ce projet ?")) {
       try {
@@ -74,7 +90,20 @@ export default function Projects() {
       </div>
 
       {projects.length > 0 ? (
-        <ProjectList projects={projects} onDelete={handleDeleteProject} />
+        <>
+          <ProjectList projects={projects} onDelete={handleDeleteProject} />
+          {hasMore && (
+            <div className="mt-8 flex justify-center">
+              <Button
+                variant="outline"
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+              >
+                Charger plus
+              </Button>
+            </div>
+          )}
+        </>
       ) : (
         /* Empty State */
         <div className="flex flex-col items-center justify-center py-20 px-4">
@@ -32,4 +32,16 @@ api.interceptors.request.use(async (config) => {
   return config;
 });
 
+// Paginated list routes return the next page cursor in `X-Next-Cursor`.
+// Fetch one page; further pages are requested on demand (usePaginatedList).
+export const getPage = async (url, params = {}, cursor = null) => {
+  const response = await api.get(url, {
+    params: cursor ? { ...params, cursor } : params,
+  });
+  return {
+    items: response.data,
+    nextCursor: response.headers["x-next-cursor"] || null,
+  };
+};
+
 export default api;
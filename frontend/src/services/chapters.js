@@ -1,12 +1,35 @@
-import api from "./api";
+import api, { getPage } from "./api";
+
+// Single range replacement turning `before` into `after`.
+// Offsets are in code points, matching the server's string indexing.
+export const diffToOps = (before, after) => {
+  if (before === after) return [];
+  const a = Array.from(before);
+  const b = Array.from(after);
+  let prefix = 0;
+  while (prefix < a.length && prefix < b.length && a[prefix] === b[prefix]) {
+    prefix++;
+  }
+  let suffix = 0;
+  while (
+    suffix < a.length - prefix &&
+    suffix < b.length - prefix &&
+    a[a.length - 1 - suffix] === b[b.length - 1 - suffix]
+  ) {
+    suffix++;
+  }
+  return [
+    {
+      start: prefix,
+      end: a.length - suffix,
+      text: b.slice(prefix, b.length - suffix).join(""),
+    },
+  ];
+};
 
 export const chaptersService = {
-  getAll: async (projectId, userId) => {
-    const response = await api.get(
-      `/projects/${projectId}/chapters?user_id=${userId}`
-    );
-    return response.data;
-  },
+  getPage: async (projectId, userId, cursor = null) =>
+    getPage(`/projects/${projectId}/chapters`, { user_id: userId }, cursor),
 
   getOne: async (projectId, chapterNumber, userId) => {
     const response = await api.get(
@@ -31,6 +54,15 @@ export const chaptersService = {
     return response.data;
   },
 
+  // Apply text operations against a known version (409 if it changed)
+  patch: async (projectId, chapterNumber, version, ops, userId) => {
+    const response = await api.patch(
+      `/projects/${projectId}/chapters/${chapterNumber}?user_id=${userId}`,
+      { version, ops }
+    );
+    return response.data;
+  },
+
   delete: async (projectId, chapterNumber, userId) => {
     const response = await api.delete(
       `/projects/${projectId}/chapters/${chapterNumber}?user_id=${userId}`
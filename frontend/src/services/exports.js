@@ -1,4 +1,4 @@
-import api from "./api";
+import api, { getPage } from "./api";
 
 export const exportsService = {
   create: async (projectId, format) => {
@@ -30,10 +30,8 @@ export const exportsService = {
     return response;
   },
 
-  getAll: async (projectId, userId) => {
-    const response = await api.get(`/exports/${projectId}?user_id=${userId}`);
-    return response.data;
-  },
+  getPage: async (projectId, userId, cursor = null) =>
+    getPage(`/exports/${projectId}`, { user_id: userId }, cursor),
 
   generatePdf: async (projectId, userId) => {
     const response = await api.post(
@@ -63,6 +61,27 @@ export const exportsService = {
     return response.data;
   },
 
+  // Exports are generated in the background: poll /status until the job
+  // is completed (resolves) or failed (throws). `onProgress` gets 0-100.
+  waitUntilReady: async (
+    exportId,
+    userId,
+    onProgress,
+    { interval = 2000, timeout = 10 * 60 * 1000 } = {}
+  ) => {
+    const deadline = Date.now() + timeout;
+    for (;;) {
+      const status = await exportsService.getStatus(exportId, userId);
+      onProgress?.(status.progress || 0);
+      if (status.status === "completed") return status;
+      if (status.status === "failed") {
+        throw new Error(status.error_message || "Export failed");
+      }
+      if (Date.now() > deadline) throw new Error("Export timed out");
+      await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+  },
+
   getDownloadUrl: async (exportId, userId) => {
     const response = await api.get(
       `/exports/download/${exportId}?user_id=${userId}`
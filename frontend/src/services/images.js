@@ -1,12 +1,8 @@
-import api from "./api";
+import api, { getPage } from "./api";
 
 export const imagesService = {
-  getAll: async (projectId, userId) => {
-    const response = await api.get(
-      `/images/${projectId}/illustrations?user_id=${userId}`
-    );
-    return response.data;
-  },
+  getPage: async (projectId, userId, cursor = null) =>
+    getPage(`/images/${projectId}/illustrations`, { user_id: userId }, cursor),
 
   generate: async (projectId, prompt, style, userId) => {
     const response = await api.post(
@@ -1,10 +1,8 @@
-import api from "./api";
+import api, { getPage } from "./api";
 
 export const projectsService = {
-  getAll: async (userId) => {
-    const response = await api.get(`/projects?user_id=${userId}`);
-    return response.data;
-  },
+  getPage: async (userId, cursor = null) =>
+    getPage("/projects", { user_id: userId }, cursor),
 
   getOne: async (projectId, userId) => {
     const response = await api.get(`/projects/${projectId}?user_id=${userId}`);
@@ -0,0 +1,106 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - MÉTRIQUES ADMIN EN UN SEUL APPEL
+-- ════════════════════════════════════════════════════
+-- Remplace la trentaine de requêtes count="exact" du tableau de bord
+-- admin : un passage agrégé (COUNT ... FILTER + GROUP BY) par table,
+-- renvoyé en un seul JSON. Le résultat est mis en cache côté API (TTL court).
+-- ════════════════════════════════════════════════════
+
+-- Index utilisés par les filtres "nouveaux sur la période"
+CREATE INDEX IF NOT EXISTS idx_profiles_created_at ON public.profiles(created_at);
+CREATE INDEX IF NOT EXISTS idx_projects_created_at ON public.projects(created_at);
+CREATE INDEX IF NOT EXISTS idx_illustrations_created_at ON public.illustrations(created_at);
+CREATE INDEX IF NOT EXISTS idx_exports_created_at ON public.exports(created_at);
+
+-- ────────────────────────────────────────────────────
+-- FONCTION : Toutes les métriques du tableau de bord admin
+-- ────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION get_admin_dashboard_metrics(p_days INT DEFAULT 30)
+RETURNS JSON
+LANGUAGE SQL
+STABLE
+AS $$
+    WITH bounds AS (
+        SELECT
+            NOW() - INTERVAL '1 day' * p_days AS period_start,
+            NOW() - INTERVAL '1 day' AS day_start
+    )
+    SELECT json_build_object(
+        'users', (
+            SELECT json_build_object(
+                'total', COUNT(*),
+                'new', COUNT(*) FILTER (WHERE created_at >= b.period_start),
+                'new_24h', COUNT(*) FILTER (WHERE created_at >= b.day_start),
+                'by_tier', (
+                    SELECT COALESCE(json_object_agg(subscription_tier, count), '{}'::json)
+                    FROM (
+                        SELECT subscription_tier, COUNT(*) AS count
+                        FROM public.profiles
+                        WHERE subscription_tier IS NOT NULL
+                        GROUP BY subscription_tier
+                    ) tier_counts
+                )
+            )
+            FROM public.profiles, bounds b
+        ),
+        'projects', (
+            SELECT json_build_object(
+                'total', COUNT(*),
+                'new', COUNT(*) FILTER (WHERE created_at >= b.period_start),
+                'new_24h', COUNT(*) FILTER (WHERE created_at >= b.day_start),
+                'by_status', (
+                    SELECT COALESCE(json_object_agg(status, count), '{}'::json)
+                    FROM (
+                        SELECT status, COUNT(*) AS count
+                        FROM public.projects
+                        WHERE status IS NOT NULL
+                        GROUP BY status
+                    ) status_counts
+                )
+            )
+            FROM public.projects, bounds b
+        ),
+        'illustrations', (
+            SELECT json_build_object(
+                'total', COUNT(*),
+                'new', COUNT(*) FILTER (WHERE created_at >= b.period_start),
+                'new_24h', COUNT(*) FILTER (WHERE created_at >= b.day_start),
+                'by_style', (
+                    SELECT COALESCE(json_object_agg(style, count), '{}'::json)
+                    FROM (
+                        SELECT style, COUNT(*) AS count
+                        FROM public.illustrations
+                        WHERE style IS NOT NULL
+                        GROUP BY style
+                    ) style_counts
+                )
+            )
+            FROM public.illustrations, bounds b
+        ),
+        'exports', (
+            SELECT json_build_object(
+                'total', COUNT(*),
+                'new', COUNT(*) FILTER (WHERE created_at >= b.period_start),
+                'new_24h', COUNT(*) FILTER (WHERE created_at >= b.day_start),
+                'by_format', (
+                    SELECT COALESCE(json_object_agg(format, count), '{}'::json)
+                    FROM (
+                        SELECT format, COUNT(*) AS count
+                        FROM public.exports
+                        WHERE format IS NOT NULL
+                        GROUP BY format
+                    ) format_counts
+                )
+            )
+            FROM public.exports, bounds b
+        ),
+        'top_users', (
+            SELECT COALESCE(json_agg(top), '[]'::json)
+            FROM get_top_users_by_projects(10) top
+        )
+    );
+$$;
+
+REVOKE ALL ON FUNCTION get_admin_dashboard_metrics FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION get_admin_dashboard_metrics FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_admin_dashboard_metrics TO service_role;
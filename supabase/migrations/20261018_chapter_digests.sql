@@ -0,0 +1,19 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - DIGESTS DE CHAPITRES (contexte de génération)
+-- ════════════════════════════════════════════════════
+-- Condensé précalculé de chaque chapitre, mis à jour par l'API à chaque
+-- écriture du contenu : la génération d'un chapitre lit uniquement ces
+-- digests au lieu du contenu complet des chapitres précédents.
+-- ════════════════════════════════════════════════════
+
+ALTER TABLE public.chapters
+    ADD COLUMN IF NOT EXISTS digest_opening TEXT,   -- premières phrases du chapitre
+    ADD COLUMN IF NOT EXISTS ending_excerpt TEXT;   -- derniers caractères du chapitre
+
+-- ────────────────────────────────────────────────────
+-- Initialisation des chapitres existants
+-- ────────────────────────────────────────────────────
+UPDATE public.chapters
+SET digest_opening = CASE WHEN LENGTH(content) > 300 THEN LEFT(content, 200) END,
+    ending_excerpt = RIGHT(content, 300)
+WHERE content IS NOT NULL AND content <> '' AND ending_excerpt IS NULL;
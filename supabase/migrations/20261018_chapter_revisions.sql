@@ -0,0 +1,107 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - HISTORIQUE DES CHAPITRES (snapshots + deltas)
+-- ════════════════════════════════════════════════════
+-- Une révision par version du contenu (chapters.version) :
+-- - snapshot : texte complet compressé (zlib, base64)
+-- - delta    : opérations de plage depuis la version précédente (zlib, base64)
+-- Un snapshot est réécrit quand la chaîne de deltas devient aussi lourde
+-- que le texte, ou trop longue : la reconstruction d'une version applique
+-- au plus `chapter_revision_max_chain` deltas.
+-- ════════════════════════════════════════════════════
+
+CREATE TABLE IF NOT EXISTS public.chapter_revisions (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    chapter_id UUID REFERENCES public.chapters(id) ON DELETE CASCADE NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('snapshot', 'delta')),
+    payload TEXT NOT NULL,
+    payload_size INTEGER NOT NULL,
+    content_length INTEGER NOT NULL DEFAULT 0,
+    word_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (chapter_id, version)
+);
+
+CREATE INDEX IF NOT EXISTS idx_chapter_revisions_snapshots
+    ON public.chapter_revisions(chapter_id, version DESC)
+    WHERE kind = 'snapshot';
+
+ALTER TABLE public.chapter_revisions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own chapter revisions"
+    ON public.chapter_revisions
+    FOR SELECT
+    USING (EXISTS (
+        SELECT 1 FROM public.chapters
+        JOIN public.projects ON projects.id = chapters.project_id
+        WHERE chapters.id = chapter_revisions.chapter_id
+          AND projects.user_id = auth.uid()
+    ));
+
+-- Le backend enregistre les révisions avec le même client que le chapitre
+-- (upsert ON CONFLICT DO NOTHING) : insertion seule, les révisions ne sont
+-- jamais modifiées, la purge passe par prune_chapter_revisions
+CREATE POLICY "Users can insert their own chapter revisions"
+    ON public.chapter_revisions
+    FOR INSERT
+    WITH CHECK (EXISTS (
+        SELECT 1 FROM public.chapters
+        JOIN public.projects ON projects.id = chapters.project_id
+        WHERE chapters.id = chapter_revisions.chapter_id
+          AND projects.user_id = auth.uid()
+    ));
+
+-- ────────────────────────────────────────────────────
+-- FONCTION : Purge des anciennes révisions
+-- Par chapitre, supprime tout ce qui précède le snapshot le plus récent
+-- plus ancien que p_keep_days, en gardant au moins p_keep_min versions :
+-- les révisions conservées restent toutes reconstructibles.
+-- ────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION prune_chapter_revisions(
+    p_keep_days INTEGER DEFAULT 30,
+    p_keep_min INTEGER DEFAULT 20
+)
+RETURNS INTEGER AS $$
+DECLARE
+    v_deleted INTEGER;
+BEGIN
+    WITH latest AS (
+        SELECT chapter_id, MAX(version) AS version
+        FROM public.chapter_revisions
+        GROUP BY chapter_id
+    ),
+    cutoffs AS (
+        SELECT r.chapter_id, MAX(r.version) AS version
+        FROM public.chapter_revisions r
+        JOIN latest l ON l.chapter_id = r.chapter_id
+        WHERE r.kind = 'snapshot'
+          AND r.created_at < NOW() - (p_keep_days || ' days')::INTERVAL
+          AND r.version <= l.version - p_keep_min
+        GROUP BY r.chapter_id
+    )
+    DELETE FROM public.chapter_revisions r
+    USING cutoffs c
+    WHERE r.chapter_id = c.chapter_id AND r.version < c.version;
+
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    RETURN v_deleted;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Supabase accorde EXECUTE à anon / authenticated par défaut : à retirer
+-- explicitement (seuls service_role et pg_cron purgent l'historique)
+REVOKE ALL ON FUNCTION prune_chapter_revisions FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION prune_chapter_revisions FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION prune_chapter_revisions TO service_role;
+
+-- Purge quotidienne si pg_cron est activé (sinon : POST /api/admin/chapter-revisions/prune)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'prune-chapter-revisions',
+            '30 3 * * *',
+            'SELECT public.prune_chapter_revisions()'
+        );
+    END IF;
+END $$;
@@ -0,0 +1,143 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - VERSION DU CONTENU DES CHAPITRES
+-- ════════════════════════════════════════════════════
+-- Numéro de version incrémenté à chaque modification du contenu, quel
+-- que soit l'écrivain (API, génération) : les patchs de texte
+-- (PATCH /chapters/{number}) sont appliqués contre une version connue
+-- et refusés si le chapitre a changé entre-temps (concurrence optimiste).
+-- ════════════════════════════════════════════════════
+
+ALTER TABLE public.chapters
+    ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_chapter_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.content IS DISTINCT FROM OLD.content THEN
+        NEW.version = OLD.version + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS chapters_bump_version ON public.chapters;
+CREATE TRIGGER chapters_bump_version BEFORE UPDATE ON public.chapters
+    FOR EACH ROW EXECUTE FUNCTION bump_chapter_version();
+
+-- ────────────────────────────────────────────────────
+-- FONCTION : Appliquer des opérations de plage au contenu (PATCH)
+-- p_ops : [{"start": 0, "end": 4, "text": "..."}, ...], positions en
+-- caractères, appliquées dans l'ordre avec overlay() : seules les
+-- opérations et les extrémités du texte transitent entre l'API et Postgres.
+--
+-- Le nombre de mots est ajusté sur la zone modifiée élargie d'un caractère
+-- de chaque côté (s'il n'est pas un espace) : les mots à cheval sur la
+-- frontière sont comptés de la même façon avant et après l'opération.
+--
+-- Renvoie NULL si le chapitre n'existe pas, {"conflict", "version"} si la
+-- version ne correspond plus, {"error"} pour une plage invalide, sinon
+-- {id, number, version, word_count, length} et de quoi recalculer le digest
+-- (content si le texte est court, sinon head / tail).
+-- ────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION patch_chapter_content(
+    p_project_id UUID,
+    p_number INTEGER,
+    p_version INTEGER,
+    p_ops JSONB
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_id UUID;
+    v_version INTEGER;
+    v_content TEXT;
+    v_words INTEGER;
+    v_length INTEGER;
+    v_op JSONB;
+    v_start INTEGER;
+    v_end INTEGER;
+    v_text TEXT;
+    v_left INTEGER;
+    v_right INTEGER;
+    v_before INTEGER;
+    v_after INTEGER;
+    v_result JSONB;
+BEGIN
+    SELECT id, version, COALESCE(content, ''), COALESCE(word_count, 0)
+    INTO v_id, v_version, v_content, v_words
+    FROM public.chapters
+    WHERE project_id = p_project_id AND number = p_number
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    IF v_version <> p_version THEN
+        RETURN jsonb_build_object('conflict', TRUE, 'version', v_version);
+    END IF;
+
+    v_length := char_length(v_content);
+
+    FOR v_op IN SELECT value FROM jsonb_array_elements(p_ops) LOOP
+        v_start := (v_op->>'start')::INTEGER;
+        v_end := (v_op->>'end')::INTEGER;
+        v_text := COALESCE(v_op->>'text', '');
+
+        IF v_start < 0 OR v_start > v_end OR v_end > v_length THEN
+            RETURN jsonb_build_object(
+                'error',
+                format('Plage [%s, %s) invalide pour un contenu de %s caractères',
+                       v_start, v_end, v_length)
+            );
+        END IF;
+
+        -- Zone [v_left, v_right) : la plage + un caractère non blanc voisin
+        v_left := CASE
+            WHEN v_start > 0 AND substr(v_content, v_start, 1) ~ '\S' THEN v_start - 1
+            ELSE v_start
+        END;
+        v_right := CASE
+            WHEN v_end < v_length AND substr(v_content, v_end + 1, 1) ~ '\S' THEN v_end + 1
+            ELSE v_end
+        END;
+
+        SELECT COUNT(*) INTO v_before
+        FROM regexp_matches(substr(v_content, v_left + 1, v_right - v_left), '\S+', 'g');
+        SELECT COUNT(*) INTO v_after
+        FROM regexp_matches(
+            substr(v_content, v_left + 1, v_start - v_left)
+                || v_text
+                || substr(v_content, v_end + 1, v_right - v_end),
+            '\S+', 'g'
+        );
+
+        v_content := overlay(v_content PLACING v_text FROM v_start + 1 FOR v_end - v_start);
+        v_words := v_words + v_after - v_before;
+        v_length := v_length - (v_end - v_start) + char_length(v_text);
+    END LOOP;
+
+    -- La version est incrémentée par chapters_bump_version si le contenu change
+    UPDATE public.chapters
+    SET content = v_content, word_count = v_words
+    WHERE id = v_id
+    RETURNING version INTO v_version;
+
+    v_result := jsonb_build_object(
+        'id', v_id,
+        'number', p_number,
+        'version', v_version,
+        'word_count', v_words,
+        'length', v_length
+    );
+    IF v_length <= 4096 THEN
+        RETURN v_result || jsonb_build_object('content', v_content);
+    END IF;
+    RETURN v_result || jsonb_build_object(
+        'head', left(v_content, 2048),
+        'tail', right(v_content, 2048)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+REVOKE ALL ON FUNCTION patch_chapter_content FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION patch_chapter_content FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION patch_chapter_content TO service_role;
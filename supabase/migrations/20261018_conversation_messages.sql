@@ -0,0 +1,51 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - MESSAGES DE CONVERSATION (append-only)
+-- ════════════════════════════════════════════════════
+-- Un message par ligne au lieu du tableau JSON conversations.messages :
+-- un tour de conversation = un seul INSERT (message utilisateur + réponse),
+-- l'historique se lit par les N derniers `seq` via l'index.
+-- `seq` est une identité globale : croissante dans chaque conversation,
+-- sans conflit entre tours concurrents.
+-- ════════════════════════════════════════════════════
+
+CREATE TABLE IF NOT EXISTS public.conversation_messages (
+    seq BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    conversation_id UUID REFERENCES public.conversations(id) ON DELETE CASCADE NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('user', 'assistant')),
+    content TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_messages_conversation_seq
+    ON public.conversation_messages(conversation_id, seq DESC);
+
+ALTER TABLE public.conversation_messages ENABLE ROW LEVEL SECURITY;
+
+-- Même règle que "Users can CRUD own conversations" : le backend insère
+-- et supprime les messages avec le même client que la conversation
+CREATE POLICY "Users can CRUD own conversation messages"
+    ON public.conversation_messages
+    FOR ALL
+    USING (EXISTS (
+        SELECT 1 FROM public.conversations
+        JOIN public.projects ON projects.id = conversations.project_id
+        WHERE conversations.id = conversation_messages.conversation_id
+          AND projects.user_id = auth.uid()
+    ));
+
+-- ────────────────────────────────────────────────────
+-- Reprise des historiques existants, puis vidage du tableau JSON
+-- ────────────────────────────────────────────────────
+INSERT INTO public.conversation_messages (conversation_id, role, content)
+SELECT c.id, m.value->>'role', m.value->>'content'
+FROM public.conversations c
+CROSS JOIN LATERAL jsonb_array_elements(COALESCE(c.messages, '[]'::jsonb))
+    WITH ORDINALITY AS m(value, position)
+WHERE m.value->>'role' IN ('user', 'assistant')
+  AND m.value->>'content' IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM public.conversation_messages cm WHERE cm.conversation_id = c.id
+  )
+ORDER BY c.id, m.position;
+
+UPDATE public.conversations SET messages = '[]'::jsonb WHERE messages <> '[]'::jsonb;
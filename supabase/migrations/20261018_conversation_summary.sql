@@ -0,0 +1,11 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - RÉSUMÉ GLISSANT DES CONVERSATIONS
+-- ════════════════════════════════════════════════════
+-- Les messages sortis de la fenêtre de tokens envoyée à Claude sont
+-- condensés dans `summary`, mis à jour incrémentalement : summary_seq est
+-- le dernier message (conversation_messages.seq) déjà intégré au résumé.
+-- ════════════════════════════════════════════════════
+
+ALTER TABLE public.conversations
+    ADD COLUMN IF NOT EXISTS summary TEXT,
+    ADD COLUMN IF NOT EXISTS summary_seq BIGINT NOT NULL DEFAULT 0;
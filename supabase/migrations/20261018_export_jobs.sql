@@ -0,0 +1,34 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - EXPORT JOBS
+-- ════════════════════════════════════════════════════
+-- Les exports sont générés en arrière-plan : la ligne est créée
+-- en 'pending' puis passe par 'processing' -> 'completed' | 'failed'.
+-- ════════════════════════════════════════════════════
+
+ALTER TABLE public.exports
+ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'pending',
+ADD COLUMN IF NOT EXISTS progress INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS config JSONB,
+ADD COLUMN IF NOT EXISTS error_message TEXT,
+ADD COLUMN IF NOT EXISTS started_at TIMESTAMPTZ,
+ADD COLUMN IF NOT EXISTS completed_at TIMESTAMPTZ;
+
+-- Le fichier n'existe pas encore tant que le job n'est pas terminé
+ALTER TABLE public.exports ALTER COLUMN file_url DROP NOT NULL;
+
+-- Formats utilisés par l'API (pdf_interior, epub, full_kdp, ...)
+ALTER TABLE public.exports DROP CONSTRAINT IF EXISTS exports_format_check;
+ALTER TABLE public.exports ADD CONSTRAINT exports_format_check
+    CHECK (format IN ('pdf', 'epub', 'kdp_interior', 'kdp_cover', 'pdf_interior', 'pdf_cover', 'mobi', 'full_kdp'));
+
+ALTER TABLE public.exports DROP CONSTRAINT IF EXISTS exports_status_check;
+ALTER TABLE public.exports ADD CONSTRAINT exports_status_check
+    CHECK (status IN ('pending', 'processing', 'completed', 'failed'));
+
+ALTER TABLE public.exports DROP CONSTRAINT IF EXISTS exports_progress_check;
+ALTER TABLE public.exports ADD CONSTRAINT exports_progress_check
+    CHECK (progress >= 0 AND progress <= 100);
+
+-- Index pour retrouver les jobs en cours
+CREATE INDEX IF NOT EXISTS idx_exports_status ON public.exports(status)
+    WHERE status IN ('pending', 'processing');
@@ -0,0 +1,27 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - ILLUSTRATION JOBS
+-- ════════════════════════════════════════════════════
+-- Les illustrations sont générées en arrière-plan : la ligne est créée
+-- en 'pending', passe en 'processing' une fois la prédiction Replicate
+-- créée, puis 'completed' (image_url renseignée) | 'failed'.
+-- ════════════════════════════════════════════════════
+
+-- Les illustrations existantes sont déjà générées
+ALTER TABLE public.illustrations
+ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'completed',
+ADD COLUMN IF NOT EXISTS prediction_id TEXT,
+ADD COLUMN IF NOT EXISTS error_message TEXT,
+ADD COLUMN IF NOT EXISTS completed_at TIMESTAMPTZ;
+
+ALTER TABLE public.illustrations ALTER COLUMN status SET DEFAULT 'pending';
+
+-- L'image n'existe pas encore tant que la prédiction n'est pas terminée
+ALTER TABLE public.illustrations ALTER COLUMN image_url DROP NOT NULL;
+
+ALTER TABLE public.illustrations DROP CONSTRAINT IF EXISTS illustrations_status_check;
+ALTER TABLE public.illustrations ADD CONSTRAINT illustrations_status_check
+    CHECK (status IN ('pending', 'processing', 'completed', 'failed'));
+
+-- Index pour retrouver les générations en cours
+CREATE INDEX IF NOT EXISTS idx_illustrations_status ON public.illustrations(status)
+    WHERE status IN ('pending', 'processing');
@@ -0,0 +1,20 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - ILLUSTRATIONS DANS SUPABASE STORAGE
+-- ════════════════════════════════════════════════════
+-- Les images générées sont copiées (les URLs Replicate expirent) et
+-- réencodées en WebP à plusieurs tailles : {project_id}/{illustration_id}/{variante}.webp
+-- ════════════════════════════════════════════════════
+
+ALTER TABLE public.illustrations
+ADD COLUMN IF NOT EXISTS thumbnail_url TEXT,
+ADD COLUMN IF NOT EXISTS variants JSONB,        -- {"thumb": url, "medium": url, "full": url}
+ADD COLUMN IF NOT EXISTS storage_path TEXT,     -- préfixe des fichiers dans le bucket
+ADD COLUMN IF NOT EXISTS width INTEGER,
+ADD COLUMN IF NOT EXISTS height INTEGER;
+
+-- ────────────────────────────────────────────────────
+-- STORAGE BUCKET public (écriture réservée au service role)
+-- ────────────────────────────────────────────────────
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('illustrations', 'illustrations', true)
+ON CONFLICT (id) DO NOTHING;
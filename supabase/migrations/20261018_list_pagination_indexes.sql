@@ -0,0 +1,34 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - INDEX DE PAGINATION DES LISTES
+-- ════════════════════════════════════════════════════
+-- Les routes de liste paginent par curseur (keyset) sur (created_at, id)
+-- à l'intérieur d'un projet ou d'un utilisateur : chaque page est une
+-- lecture d'index bornée, quelle que soit sa position.
+-- Les chapitres utilisent déjà UNIQUE(project_id, number).
+-- ════════════════════════════════════════════════════
+
+CREATE INDEX IF NOT EXISTS idx_projects_user_created_id
+    ON public.projects(user_id, created_at DESC, id DESC);
+
+-- Liste admin de tous les projets (user_id=all)
+CREATE INDEX IF NOT EXISTS idx_projects_created_id
+    ON public.projects(created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_illustrations_project_created_id
+    ON public.illustrations(project_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_exports_project_created_id
+    ON public.exports(project_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_manuscripts_project_created_id
+    ON public.manuscripts(project_id, user_id, created_at DESC, id DESC);
+
+-- ────────────────────────────────────────────────────
+-- Colonnes de la liste des illustrations (IllustrationSummary)
+-- `position` (inline, cover_front...) est déjà écrit à la création et par
+-- la couverture ; `caption` par la mise à jour d'une illustration. Le
+-- schéma initial n'a que position_in_chapter.
+-- ────────────────────────────────────────────────────
+ALTER TABLE public.illustrations
+ADD COLUMN IF NOT EXISTS position TEXT,
+ADD COLUMN IF NOT EXISTS caption TEXT;
@@ -0,0 +1,57 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - MANUSCRIPT CHUNKS (amélioration reprenable)
+-- ════════════════════════════════════════════════════
+-- Chaque morceau d'un manuscrit est un point de reprise : son texte
+-- amélioré et son statut sont enregistrés dès qu'il est traité.
+-- Une relance ne retraite que les morceaux en échec ou non terminés.
+-- Un morceau est réservé ('processing') avant l'appel à Claude ; une
+-- réservation plus ancienne que MANUSCRIPT_CHUNK_CLAIM_TIMEOUT_SECONDS
+-- (updated_at) est considérée comme abandonnée et peut être reprise.
+-- ════════════════════════════════════════════════════
+
+CREATE TABLE IF NOT EXISTS public.manuscript_chunks (
+    id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
+    manuscript_id UUID REFERENCES public.manuscripts(id) ON DELETE CASCADE NOT NULL,
+    chunk_index INTEGER NOT NULL,
+
+    original_text TEXT NOT NULL,
+    improved_text TEXT,
+
+    status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'processing', 'completed', 'failed')),
+    error_message TEXT,
+    attempts INTEGER DEFAULT 0,
+
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    UNIQUE (manuscript_id, chunk_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_manuscript_chunks_manuscript_id
+    ON public.manuscript_chunks(manuscript_id, chunk_index);
+
+CREATE TRIGGER manuscript_chunks_updated_at BEFORE UPDATE ON public.manuscript_chunks
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at();
+
+-- Écritures par le backend (service_role, hors RLS) : le job tourne hors
+-- requête et l'API vérifie la propriété du manuscrit. Les utilisateurs
+-- n'ont qu'un accès en lecture.
+ALTER TABLE public.manuscript_chunks ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own manuscript chunks"
+    ON public.manuscript_chunks
+    FOR SELECT
+    USING (EXISTS (
+        SELECT 1 FROM public.manuscripts
+        WHERE manuscripts.id = manuscript_chunks.manuscript_id
+        AND manuscripts.user_id = auth.uid()
+    ));
+
+-- ────────────────────────────────────────────────────
+-- Statut 'improving' : amélioration en cours (job en arrière-plan)
+-- Statut 'improve_error' : amélioration interrompue après une analyse
+-- réussie (reprenable), distinct de 'error' (analyse en échec)
+-- ────────────────────────────────────────────────────
+ALTER TABLE public.manuscripts DROP CONSTRAINT IF EXISTS manuscripts_status_check;
+ALTER TABLE public.manuscripts ADD CONSTRAINT manuscripts_status_check
+    CHECK (status IN ('pending', 'analyzing', 'analyzed', 'improving', 'improved', 'improve_error', 'error'));
@@ -0,0 +1,15 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - PROGRESSION DU TRAITEMENT DES MANUSCRITS
+-- ════════════════════════════════════════════════════
+-- Les manuscrits sont analysés / améliorés par morceaux traités en
+-- parallèle : la progression est mise à jour après chaque morceau.
+-- ════════════════════════════════════════════════════
+
+ALTER TABLE public.manuscripts
+ADD COLUMN IF NOT EXISTS chunks_total INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS chunks_done INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS progress INTEGER DEFAULT 0;
+
+ALTER TABLE public.manuscripts DROP CONSTRAINT IF EXISTS manuscripts_progress_check;
+ALTER TABLE public.manuscripts ADD CONSTRAINT manuscripts_progress_check
+    CHECK (progress >= 0 AND progress <= 100);
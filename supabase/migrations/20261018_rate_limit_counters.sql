@@ -0,0 +1,105 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - RATE LIMITING PARTAGÉ (sliding window counter)
+-- ════════════════════════════════════════════════════
+-- Compteurs partagés entre tous les workers / instances.
+-- Une ligne par (clé, fenêtre) : coût O(1) par requête, quel que soit le trafic.
+-- La clé est libre (ip:..., user:...), contrairement à rate_limits
+-- qui exige un user_id (FK profiles) et stocke une ligne par action.
+-- ════════════════════════════════════════════════════
+
+CREATE TABLE IF NOT EXISTS public.rate_limit_counters (
+    key TEXT NOT NULL,
+    window_index BIGINT NOT NULL,  -- FLOOR(epoch / window_seconds)
+    count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (key, window_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limit_counters_updated_at
+    ON public.rate_limit_counters(updated_at);
+
+ALTER TABLE public.rate_limit_counters ENABLE ROW LEVEL SECURITY;
+-- Aucune policy : accessible uniquement via la fonction ci-dessous (service role)
+
+-- ────────────────────────────────────────────────────
+-- FONCTION : Enregistrer une requête et vérifier la limite
+-- Estimation = précédente * (1 - part écoulée de la fenêtre) + courante
+-- ────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION hit_rate_limit(
+    p_key TEXT,
+    p_max_count INTEGER,
+    p_window_seconds INTEGER
+)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_now DOUBLE PRECISION := EXTRACT(EPOCH FROM clock_timestamp());
+    v_window BIGINT := FLOOR(v_now / p_window_seconds);
+    v_elapsed DOUBLE PRECISION := (v_now - v_window * p_window_seconds) / p_window_seconds;
+    v_previous INTEGER;
+    v_current INTEGER;
+BEGIN
+    INSERT INTO public.rate_limit_counters (key, window_index, count)
+    VALUES (p_key, v_window, 1)
+    ON CONFLICT (key, window_index)
+    DO UPDATE SET count = rate_limit_counters.count + 1, updated_at = NOW()
+    RETURNING count INTO v_current;
+
+    SELECT count INTO v_previous
+    FROM public.rate_limit_counters
+    WHERE key = p_key AND window_index = v_window - 1;
+
+    -- Les fenêtres plus anciennes ne servent plus (via la clé primaire)
+    DELETE FROM public.rate_limit_counters
+    WHERE key = p_key AND window_index < v_window - 1;
+
+    RETURN COALESCE(v_previous, 0) * (1 - v_elapsed) + v_current <= p_max_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- ────────────────────────────────────────────────────
+-- FONCTION : Plusieurs clés en un seul appel (ip/user × portée)
+-- Les clés sont comptées dans l'ordre ; renvoie la première refusée
+-- (les suivantes ne sont pas comptées), NULL si tout passe
+-- ────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION hit_rate_limits(
+    p_keys TEXT[],
+    p_max_counts INTEGER[],
+    p_window_seconds INTEGER
+)
+RETURNS TEXT AS $$
+BEGIN
+    FOR i IN 1 .. COALESCE(array_length(p_keys, 1), 0) LOOP
+        IF NOT hit_rate_limit(p_keys[i], p_max_counts[i], p_window_seconds) THEN
+            RETURN p_keys[i];
+        END IF;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- ────────────────────────────────────────────────────
+-- FONCTION : Purge des clés inactives (à exécuter via cron)
+-- ────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION cleanup_rate_limit_counters(p_idle_minutes INTEGER DEFAULT 60)
+RETURNS INTEGER AS $$
+DECLARE
+    v_deleted INTEGER;
+BEGIN
+    DELETE FROM public.rate_limit_counters
+    WHERE updated_at < NOW() - (p_idle_minutes || ' minutes')::INTERVAL;
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    RETURN v_deleted;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Supabase accorde EXECUTE à anon / authenticated par défaut : sans ce
+-- REVOKE explicite, un client pourrait incrémenter la clé d'un autre
+REVOKE ALL ON FUNCTION hit_rate_limit FROM PUBLIC;
+REVOKE ALL ON FUNCTION hit_rate_limits FROM PUBLIC;
+REVOKE ALL ON FUNCTION cleanup_rate_limit_counters FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION hit_rate_limit FROM anon, authenticated;
+REVOKE EXECUTE ON FUNCTION hit_rate_limits FROM anon, authenticated;
+REVOKE EXECUTE ON FUNCTION cleanup_rate_limit_counters FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION hit_rate_limit TO service_role;
+GRANT EXECUTE ON FUNCTION hit_rate_limits TO service_role;
+GRANT EXECUTE ON FUNCTION cleanup_rate_limit_counters TO service_role;
@@ -0,0 +1,44 @@
+-- ════════════════════════════════════════════════════
+-- HAKAWA - REMPLACEMENT ATOMIQUE DU PLAN DE CHAPITRES
+-- ════════════════════════════════════════════════════
+-- Utilisé par POST /api/generation/plan : suppression des anciens chapitres,
+-- insertion en masse du nouveau plan et mise à jour du projet,
+-- dans une seule transaction et un seul aller-retour réseau.
+-- ════════════════════════════════════════════════════
+
+-- ────────────────────────────────────────────────────
+-- FONCTION : Remplacer les chapitres d'un projet
+-- p_chapters : tableau JSON [{"title": ..., "summary": ...}, ...]
+-- (numérotés dans l'ordre du tableau, à partir de 1)
+-- ────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION replace_project_chapters(
+    p_project_id UUID,
+    p_chapters JSONB
+)
+RETURNS SETOF public.chapters AS $$
+BEGIN
+    DELETE FROM public.chapters WHERE project_id = p_project_id;
+
+    RETURN QUERY
+    INSERT INTO public.chapters (project_id, number, title, summary, content, word_count)
+    SELECT
+        p_project_id,
+        c.ordinality::INTEGER,
+        COALESCE(NULLIF(c.value->>'title', ''), 'Chapitre ' || c.ordinality),
+        COALESCE(c.value->>'summary', ''),
+        '',
+        0
+    FROM jsonb_array_elements(p_chapters) WITH ORDINALITY AS c(value, ordinality)
+    ORDER BY c.ordinality
+    RETURNING *;
+
+    UPDATE public.projects
+    SET chapter_count = jsonb_array_length(p_chapters),
+        status = 'planning'
+    WHERE id = p_project_id;
+END;
+$$ LANGUAGE plpgsql;
+
+REVOKE ALL ON FUNCTION replace_project_chapters FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION replace_project_chapters FROM anon, authenticated;
+GRANT EXECUTE ON FUNCTION replace_project_chapters TO service_role;